@@ -3,6 +3,16 @@ drop table if exists chat_messages cascade;
 
 drop table if exists agent_decision_log cascade;
 
+drop table if exists expenses_mirror cascade;
+
+drop table if exists notion_sync_state cascade;
+
+drop table if exists llm_response_cache cascade;
+
+drop table if exists background_jobs cascade;
+
+drop table if exists expense_daily_rollup cascade;
+
 create table
     agent_decision_log (
         id serial primary key,
@@ -11,6 +21,10 @@ create table
         llm_reasoning text,
         action_taken text not null,
         result jsonb,
+        plan_source text,
+        llm_calls_saved integer,
+        latency_ms double precision,
+        latency_saved_ms double precision,
         created_at timestamp default current_timestamp
     );
 
@@ -30,4 +44,79 @@ create index idx_chat_messages_user_id on chat_messages (user_id);
 
 create index idx_chat_messages_timestamp on chat_messages (timestamp desc);
 
-create index idx_chat_messages_session on chat_messages (session_id);
\ No newline at end of file
+create index idx_chat_messages_session on chat_messages (session_id);
+
+create table
+    expenses_mirror (
+        id text primary key,
+        amount numeric(12, 2) not null default 0,
+        category text not null default '',
+        merchant text not null default '',
+        date text not null default '',
+        description text not null default '',
+        created_time text,
+        last_edited_time timestamptz not null,
+        archived boolean not null default false,
+        synced_at timestamptz default current_timestamp
+    );
+
+create index idx_expenses_mirror_date on expenses_mirror (date) where not archived;
+
+create index idx_expenses_mirror_created on expenses_mirror (created_time desc, id desc) where not archived;
+
+create index idx_expenses_mirror_last_edited on expenses_mirror (last_edited_time desc);
+
+create table
+    expense_daily_rollup (
+        day text not null,
+        category text not null,
+        total_cents bigint not null default 0,
+        count integer not null default 0,
+        primary key (day, category)
+    );
+
+create table
+    notion_sync_state (
+        database_id text primary key,
+        watermark timestamptz,
+        last_synced_at timestamptz,
+        last_full_sync_at timestamptz,
+        last_error text
+    );
+
+create table
+    llm_response_cache (
+        cache_key text primary key,
+        prompt_type text not null,
+        model text not null,
+        response jsonb not null,
+        hit_count integer not null default 0,
+        created_at timestamptz not null default now(),
+        last_hit_at timestamptz,
+        expires_at timestamptz not null
+    );
+
+create index idx_llm_response_cache_expires on llm_response_cache (expires_at);
+
+create table
+    background_jobs (
+        id uuid primary key,
+        kind text not null,
+        payload jsonb not null default '{}',
+        attachment bytea,
+        status text not null default 'queued' check (status in ('queued', 'running', 'succeeded', 'failed')),
+        attempts integer not null default 0,
+        max_attempts integer not null default 3,
+        run_at timestamptz not null default now(),
+        locked_by text,
+        locked_until timestamptz,
+        result jsonb,
+        last_error text,
+        created_at timestamptz not null default now(),
+        updated_at timestamptz not null default now(),
+        finished_at timestamptz
+    );
+
+create index idx_background_jobs_ready on background_jobs (run_at) where status = 'queued';
+
+create index idx_background_jobs_locked on background_jobs (locked_until) where status = 'running';
@@ -1,12 +1,42 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from src.router import expenses_router, agent_router, budget_router, receipt_router, chat_router
+from src.router import expenses_router, agent_router, budget_router, receipt_router, chat_router, notion_router, job_router
+import asyncio
 import logging
-from fastapi import FastAPI, APIRouter
+import os
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, APIRouter, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from src.service.clients import Clients
+from src.service.llm_cache import llm_cache
+from src.utils.cache import cache_bypass
+from src.utils.metrics import registry
 
-app = FastAPI(title="FinanceBot API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background_tasks = []
+    # Build the shared clients up front so configuration errors surface at startup
+    Clients.get_agent_service()
+    if Clients.get_notion_service().mirror_enabled:
+        background_tasks.append(asyncio.create_task(Clients.get_sync_service().run_forever()))
+    # Set to false when jobs are handled only by separate `python -m src.worker` replicas
+    if os.getenv("JOB_WORKERS_IN_PROCESS", "true").lower() == "true":
+        background_tasks.append(asyncio.create_task(Clients.get_job_queue().run_forever()))
+    
+    yield
+    
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await llm_cache.flush_hits()
+    await Clients.close()
+
+
+app = FastAPI(title="FinanceBot API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +46,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def cache_control(request: Request, call_next):
+    # "Cache-Control: no-cache" skips in-process cached reads for this request only
+    token = cache_bypass.set("no-cache" in request.headers.get("cache-control", "").lower())
+    try:
+        return await call_next(request)
+    finally:
+        cache_bypass.reset(token)
+
 logging.getLogger("uvicorn.access").addFilter(lambda _: False)
 
 router = APIRouter(prefix="/api")
@@ -24,10 +63,17 @@ router = APIRouter(prefix="/api")
 def health_check():
     return {"status": "healthy", "service": "FinanceBot API"}
 
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 router.include_router(expenses_router.router)
 router.include_router(agent_router.router)
 router.include_router(budget_router.router)
 router.include_router(receipt_router.router)
 router.include_router(chat_router.router)
+router.include_router(notion_router.router)
+router.include_router(job_router.router)
 
 app.include_router(router)
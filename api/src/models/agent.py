@@ -33,6 +33,10 @@ class AgentDecision(BaseModel):
     llm_reasoning: Optional[str] = None
     action_taken: ActionType
     result: Optional[Dict[str, Any]] = None
+    plan_source: Optional[str] = None
+    llm_calls_saved: Optional[int] = None
+    latency_ms: Optional[float] = None
+    latency_saved_ms: Optional[float] = None
 
 class ChatMessage(BaseModel):
     role: str = Field(..., pattern="^(user|assistant|system)$")
@@ -49,6 +53,11 @@ class ChatResponse(BaseModel):
     action_taken: ActionType
     state: AgentState
     data: Optional[Dict[str, Any]] = None
+    plan_source: Optional[str] = None
+    llm_calls_saved: Optional[int] = None
+    latency_ms: Optional[float] = None
+    latency_saved_ms: Optional[float] = None
+    run: Optional[Dict[str, Any]] = None
 
 class AddExpenseRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=500)
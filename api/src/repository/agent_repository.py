@@ -7,8 +7,9 @@ class AgentRepository:
     def log_decision(self, decision: AgentDecision) -> int:
         query = """
             INSERT INTO agent_decision_log 
-            (user_message, agent_state, llm_reasoning, action_taken, result)
-            VALUES (%s, %s, %s, %s, %s)
+            (user_message, agent_state, llm_reasoning, action_taken, result,
+             plan_source, llm_calls_saved, latency_ms, latency_saved_ms)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
             RETURNING id
         """
         result_json = json.dumps(decision.result) if decision.result else None
@@ -17,7 +18,11 @@ class AgentRepository:
             decision.agent_state.value,
             decision.llm_reasoning,
             decision.action_taken.value,
-            result_json
+            result_json,
+            decision.plan_source,
+            decision.llm_calls_saved,
+            decision.latency_ms,
+            decision.latency_saved_ms
         )
         result = run_sql(query, params)
         return result[0][0] if result else None
@@ -55,3 +60,25 @@ class AgentRepository:
         """
         result = run_sql(query, (decision_id,))
         return result[0] if result else None
+    
+    def get_fast_path_stats(self) -> Dict[str, Any]:
+        query = """
+            SELECT count(*) FILTER (WHERE plan_source = 'rules'),
+                   count(*) FILTER (WHERE plan_source IS NOT NULL),
+                   coalesce(sum(llm_calls_saved), 0),
+                   coalesce(sum(latency_saved_ms), 0),
+                   avg(latency_ms) FILTER (WHERE plan_source = 'rules'),
+                   avg(latency_ms) FILTER (WHERE plan_source = 'llm')
+            FROM agent_decision_log
+        """
+        row = run_sql(query)[0]
+        hits, total = row[0], row[1]
+        return {
+            "fast_path_hits": hits,
+            "planned_messages": total,
+            "hit_ratio": hits / total if total else 0.0,
+            "llm_calls_saved": row[2],
+            "latency_saved_ms": float(row[3]),
+            "avg_latency_ms_rules": float(row[4]) if row[4] is not None else None,
+            "avg_latency_ms_llm": float(row[5]) if row[5] is not None else None,
+        }
@@ -0,0 +1,241 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from src.repository.expense_rollup_repository import (
+    ROLLUP_COLUMNS,
+    ExpenseRollupRepository,
+    rollup_deltas,
+)
+from src.service.database.helper import Database, run_sql
+
+EXPENSE_COLUMNS = (
+    "id, amount::float8 as amount, category, merchant, date, description, created_time"
+)
+
+
+class ExpenseMirrorRepository:
+    @staticmethod
+    def upsert_expenses(records: List[dict]) -> int:
+        """Upsert records, never letting an older snapshot overwrite a newer row (or a tombstone)"""
+        if not records:
+            return 0
+
+        pool = Database.get_pool()
+        expense_ids = [record["id"] for record in records]
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                ExpenseRollupRepository.lock(cursor)
+                before = ExpenseRollupRepository.snapshot(cursor, expense_ids)
+                cursor.executemany(
+                    """
+                    INSERT INTO expenses_mirror
+                    (id, amount, category, merchant, date, description, created_time, last_edited_time, archived)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (id) DO UPDATE SET
+                        amount = excluded.amount,
+                        category = excluded.category,
+                        merchant = excluded.merchant,
+                        date = excluded.date,
+                        description = excluded.description,
+                        created_time = excluded.created_time,
+                        last_edited_time = excluded.last_edited_time,
+                        archived = excluded.archived,
+                        synced_at = current_timestamp
+                    WHERE expenses_mirror.last_edited_time <= excluded.last_edited_time
+                    """,
+                    [
+                        (
+                            record["id"],
+                            record["amount"],
+                            record["category"],
+                            record["merchant"],
+                            record["date"],
+                            record["description"],
+                            record["created_time"],
+                            record["last_edited_time"],
+                            record["archived"],
+                        )
+                        for record in records
+                    ],
+                )
+                after = ExpenseRollupRepository.snapshot(cursor, expense_ids)
+                ExpenseRollupRepository.apply(cursor, rollup_deltas(before, after))
+                conn.commit()
+                return len(records)
+
+    @staticmethod
+    def mark_archived(expense_id: str) -> None:
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                ExpenseRollupRepository.lock(cursor)
+                before = ExpenseRollupRepository.snapshot(cursor, [expense_id])
+                # Bumping last_edited_time makes any in-flight sync snapshot of the page lose the
+                # upsert guard; inserting covers pages deleted before the mirror ever saw them
+                cursor.execute(
+                    """
+                    INSERT INTO expenses_mirror (id, last_edited_time, archived)
+                    VALUES (%s, now(), true)
+                    ON CONFLICT (id) DO UPDATE SET
+                        archived = true,
+                        last_edited_time = GREATEST(expenses_mirror.last_edited_time, now()),
+                        synced_at = current_timestamp
+                    """,
+                    (expense_id,),
+                )
+                ExpenseRollupRepository.apply(cursor, rollup_deltas(before, {}))
+                conn.commit()
+
+    @staticmethod
+    def database_now() -> datetime:
+        return run_sql("SELECT now()")[0][0]
+
+    @staticmethod
+    def archive_missing(seen_ids: List[str], started_at: datetime) -> int:
+        """Tombstone rows that a full sync no longer saw in Notion.
+
+        Rows written after the sync started (e.g. an expense created through the API
+        mid-sync) are left alone even if the paginated read missed them.
+        """
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                ExpenseRollupRepository.lock(cursor)
+                # Only live rows are updated and their day/category/amount don't change, so
+                # RETURNING hands back exactly what the rollup counted for them
+                cursor.execute(
+                    f"""
+                    UPDATE expenses_mirror
+                    SET archived = true, synced_at = current_timestamp
+                    WHERE NOT archived AND synced_at < %s AND NOT (id = ANY(%s))
+                    RETURNING {ROLLUP_COLUMNS}
+                    """,
+                    (started_at, seen_ids),
+                )
+                archived = {
+                    expense_id: (day, category, cents)
+                    for expense_id, day, category, cents in cursor.fetchall()
+                }
+                ExpenseRollupRepository.apply(cursor, rollup_deltas(archived, {}))
+                archived_count = len(archived)
+                conn.commit()
+                return archived_count
+
+    @staticmethod
+    def fetch_expenses_page(
+        after: Optional[Tuple[str, str]] = None,
+        limit: int = 100,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        category: Optional[str] = None,
+        amount_eq: Optional[float] = None,
+        merchant_contains: Optional[str] = None,
+    ) -> List[dict]:
+        """Keyset-paginated read: the next `limit` matching rows after the (created_time, id) cursor"""
+        conditions = ["NOT archived"]
+        params: list = []
+        if after is not None:
+            conditions.append("(created_time, id) < (%s, %s)")
+            params.extend(after)
+        if start_date:
+            conditions.append("date >= %s")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= %s")
+            params.append(end_date)
+        if category:
+            conditions.append("category = %s")
+            params.append(category)
+        if amount_eq is not None:
+            conditions.append("amount BETWEEN %s AND %s")
+            params.extend((amount_eq - 0.01, amount_eq + 0.01))
+        if merchant_contains:
+            conditions.append("position(lower(%s) in lower(merchant)) > 0")
+            params.append(merchant_contains)
+        params.append(limit)
+
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT {EXPENSE_COLUMNS}
+                    FROM expenses_mirror
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY created_time DESC, id DESC
+                    LIMIT %s
+                    """,
+                    params,
+                )
+                columns = [desc[0] for desc in cursor.description]
+                return [dict(zip(columns, row, strict=True)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def get_expense_by_id(expense_id: str) -> Optional[dict]:
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT {EXPENSE_COLUMNS}
+                    FROM expenses_mirror
+                    WHERE id = %s AND NOT archived
+                    """,
+                    (expense_id,),
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                columns = [desc[0] for desc in cursor.description]
+                return dict(zip(columns, row, strict=True))
+
+    @staticmethod
+    def get_sync_state(database_id: str) -> Optional[dict]:
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT database_id, watermark, last_synced_at, last_full_sync_at, last_error
+                    FROM notion_sync_state
+                    WHERE database_id = %s
+                    """,
+                    (database_id,),
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                columns = [desc[0] for desc in cursor.description]
+                return dict(zip(columns, row, strict=True))
+
+    @staticmethod
+    def save_sync_state(database_id: str, watermark, full_sync: bool = False) -> None:
+        run_sql(
+            """
+            INSERT INTO notion_sync_state (database_id, watermark, last_synced_at, last_full_sync_at, last_error)
+            VALUES (%s, %s, now(), CASE WHEN %s THEN now() END, NULL)
+            ON CONFLICT (database_id) DO UPDATE SET
+                watermark = excluded.watermark,
+                last_synced_at = excluded.last_synced_at,
+                last_full_sync_at = COALESCE(excluded.last_full_sync_at, notion_sync_state.last_full_sync_at),
+                last_error = NULL
+            """,
+            (database_id, watermark, full_sync),
+        )
+
+    @staticmethod
+    def record_sync_error(database_id: str, error: str) -> None:
+        run_sql(
+            """
+            INSERT INTO notion_sync_state (database_id, last_error)
+            VALUES (%s, %s)
+            ON CONFLICT (database_id) DO UPDATE SET last_error = excluded.last_error
+            """,
+            (database_id, error),
+        )
@@ -0,0 +1,137 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from src.service.database.helper import Database, run_sql
+
+# expense id -> (day, category, cents) for each live expense, as the rollup sees it
+RollupKeys = Dict[str, Tuple[str, str, int]]
+
+# Rollup key and cents of a mirror row; left() drops any time of day Notion stored with the date
+ROLLUP_COLUMNS = "id, left(date, 10) as day, category, (amount * 100)::bigint as cents"
+
+
+def rollup_deltas(before: RollupKeys, after: RollupKeys) -> Dict[Tuple[str, str], List[int]]:
+    """Net [cents, count] change per (day, category) between two states of the same expenses"""
+    deltas: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0])
+    for day, category, cents in before.values():
+        delta = deltas[(day, category)]
+        delta[0] -= cents
+        delta[1] -= 1
+    for day, category, cents in after.values():
+        delta = deltas[(day, category)]
+        delta[0] += cents
+        delta[1] += 1
+    return {key: delta for key, delta in deltas.items() if delta != [0, 0]}
+
+
+class ExpenseRollupRepository:
+    """expense_daily_rollup: spending per day and category over the live rows of expenses_mirror.
+
+    Every statement that changes expenses_mirror also applies its net effect here, inside the
+    same transaction and under one advisory lock, so API writes and the sync worker can't
+    interleave their read-modify-write of the same totals.
+    """
+
+    @staticmethod
+    def lock(cursor) -> None:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('expense_daily_rollup'))")
+
+    @staticmethod
+    def snapshot(cursor, expense_ids: List[str]) -> RollupKeys:
+        cursor.execute(
+            f"SELECT {ROLLUP_COLUMNS} FROM expenses_mirror WHERE id = ANY(%s) AND NOT archived",
+            (expense_ids,),
+        )
+        return {
+            expense_id: (day, category, cents)
+            for expense_id, day, category, cents in cursor.fetchall()
+        }
+
+    @staticmethod
+    def apply(cursor, deltas: Dict[Tuple[str, str], List[int]]) -> None:
+        if not deltas:
+            return
+        cursor.executemany(
+            """
+            INSERT INTO expense_daily_rollup AS stored (day, category, total_cents, count)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (day, category) DO UPDATE SET
+                total_cents = stored.total_cents + excluded.total_cents,
+                count = stored.count + excluded.count
+            """,
+            [(day, category, cents, count) for (day, category), (cents, count) in deltas.items()],
+        )
+        cursor.execute("DELETE FROM expense_daily_rollup WHERE count = 0")
+
+    @staticmethod
+    def rebuild() -> int:
+        """Recompute the whole rollup from expenses_mirror; returns the number of rollup rows"""
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                ExpenseRollupRepository.lock(cursor)
+                cursor.execute("DELETE FROM expense_daily_rollup")
+                cursor.execute("""
+                    INSERT INTO expense_daily_rollup (day, category, total_cents, count)
+                    SELECT left(date, 10), category, sum((amount * 100)::bigint), count(*)
+                    FROM expenses_mirror
+                    WHERE NOT archived
+                    GROUP BY 1, 2
+                    """)
+                rows = cursor.rowcount
+                conn.commit()
+                return rows
+
+    @staticmethod
+    def fetch_range(start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[dict]:
+        """Rollup rows for the date range; undated expenses only come back for an unbounded range"""
+        conditions = []
+        params: list = []
+        if start_date:
+            conditions.append("day >= %s")
+            params.append(start_date)
+        if end_date:
+            conditions.append("day <= %s")
+            params.append(end_date)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT day, category, total_cents, count FROM expense_daily_rollup {where} ORDER BY day, category",
+                    params,
+                )
+                columns = [desc[0] for desc in cursor.description]
+                return [dict(zip(columns, row, strict=True)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def find_drift() -> List[dict]:
+        """(day, category) cells where the rollup disagrees with a fresh aggregate of expenses_mirror"""
+        rows = run_sql("""
+            WITH actual AS (
+                SELECT left(date, 10) AS day, category, sum((amount * 100)::bigint) AS total_cents, count(*) AS count
+                FROM expenses_mirror
+                WHERE NOT archived
+                GROUP BY 1, 2
+            )
+            SELECT coalesce(actual.day, stored.day), coalesce(actual.category, stored.category),
+                   stored.total_cents, stored.count, actual.total_cents, actual.count
+            FROM actual
+            FULL OUTER JOIN expense_daily_rollup stored
+                ON stored.day = actual.day AND stored.category = actual.category
+            WHERE stored.total_cents IS DISTINCT FROM actual.total_cents
+               OR stored.count IS DISTINCT FROM actual.count
+            ORDER BY 1, 2
+            """)
+        columns = (
+            "day",
+            "category",
+            "rollup_cents",
+            "rollup_count",
+            "actual_cents",
+            "actual_count",
+        )
+        return [dict(zip(columns, row, strict=True)) for row in rows]
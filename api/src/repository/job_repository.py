@@ -0,0 +1,159 @@
+import json
+from typing import List, Optional
+
+from src.service.database.helper import Database, run_sql
+
+JOB_COLUMNS = "id::text as id, kind, payload, status, attempts, max_attempts, run_at, result, last_error, created_at, finished_at"
+
+
+class JobRepository:
+    @staticmethod
+    def enqueue(
+        job_id: str, kind: str, payload: dict, attachment: Optional[bytes], max_attempts: int
+    ) -> dict:
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO background_jobs (id, kind, payload, attachment, max_attempts)
+                    VALUES (%s, %s, %s, %s, %s)
+                    RETURNING {JOB_COLUMNS}
+                    """,
+                    (job_id, kind, json.dumps(payload), attachment, max_attempts),
+                )
+                columns = [desc[0] for desc in cursor.description]
+                job = dict(zip(columns, cursor.fetchone(), strict=True))
+                conn.commit()
+                return job
+
+    @staticmethod
+    def claim(worker_id: str, kinds: List[str], visibility_timeout: float) -> Optional[dict]:
+        """Lease the oldest runnable job: queued and due, or running with an expired lease.
+
+        SKIP LOCKED lets any number of workers poll the table without blocking on, or
+        double-claiming, a row another worker is already taking.
+        """
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    WITH next_job AS (
+                        SELECT id FROM background_jobs
+                        WHERE kind = ANY(%s)
+                          AND ((status = 'queued' AND run_at <= now())
+                               OR (status = 'running' AND locked_until < now()))
+                        ORDER BY run_at
+                        LIMIT 1
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE background_jobs AS job SET
+                        status = 'running',
+                        attempts = job.attempts + 1,
+                        locked_by = %s,
+                        locked_until = now() + make_interval(secs => %s),
+                        updated_at = now()
+                    FROM next_job
+                    WHERE job.id = next_job.id
+                    RETURNING job.id::text, job.kind, job.payload, job.attachment, job.attempts, job.max_attempts
+                    """,
+                    (kinds, worker_id, visibility_timeout),
+                )
+                row = cursor.fetchone()
+                conn.commit()
+                if row is None:
+                    return None
+                columns = [desc[0] for desc in cursor.description]
+                return dict(zip(columns, row, strict=True))
+
+    @staticmethod
+    def extend_lease(job_id: str, worker_id: str, visibility_timeout: float) -> bool:
+        rows = run_sql(
+            """
+            UPDATE background_jobs
+            SET locked_until = now() + make_interval(secs => %s), updated_at = now()
+            WHERE id = %s AND locked_by = %s AND status = 'running'
+            RETURNING id
+            """,
+            (visibility_timeout, job_id, worker_id),
+        )
+        return bool(rows)
+
+    @staticmethod
+    def complete(job_id: str, worker_id: str, result: dict) -> bool:
+        # Guarded by locked_by: a worker whose lease expired and was re-claimed can't overwrite the new run
+        rows = run_sql(
+            """
+            UPDATE background_jobs SET
+                status = 'succeeded', result = %s, attachment = NULL, last_error = NULL,
+                locked_by = NULL, locked_until = NULL, updated_at = now(), finished_at = now()
+            WHERE id = %s AND locked_by = %s AND status = 'running'
+            RETURNING id
+            """,
+            (json.dumps(result), job_id, worker_id),
+        )
+        return bool(rows)
+
+    @staticmethod
+    def retry(job_id: str, worker_id: str, error: str, delay_seconds: float) -> bool:
+        rows = run_sql(
+            """
+            UPDATE background_jobs SET
+                status = 'queued', last_error = %s, run_at = now() + make_interval(secs => %s),
+                locked_by = NULL, locked_until = NULL, updated_at = now()
+            WHERE id = %s AND locked_by = %s AND status = 'running'
+            RETURNING id
+            """,
+            (error, delay_seconds, job_id, worker_id),
+        )
+        return bool(rows)
+
+    @staticmethod
+    def fail(job_id: str, worker_id: str, error: str) -> bool:
+        rows = run_sql(
+            """
+            UPDATE background_jobs SET
+                status = 'failed', last_error = %s, attachment = NULL,
+                locked_by = NULL, locked_until = NULL, updated_at = now(), finished_at = now()
+            WHERE id = %s AND locked_by = %s AND status = 'running'
+            RETURNING id
+            """,
+            (error, job_id, worker_id),
+        )
+        return bool(rows)
+
+    @staticmethod
+    def get(job_id: str) -> Optional[dict]:
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {JOB_COLUMNS} FROM background_jobs WHERE id = %s", (job_id,)
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                columns = [desc[0] for desc in cursor.description]
+                return dict(zip(columns, row, strict=True))
+
+    @staticmethod
+    def delete_finished(older_than_seconds: float) -> int:
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    DELETE FROM background_jobs
+                    WHERE status IN ('succeeded', 'failed')
+                      AND finished_at < now() - make_interval(secs => %s)
+                    """,
+                    (older_than_seconds,),
+                )
+                deleted = cursor.rowcount
+                conn.commit()
+                return deleted
@@ -0,0 +1,72 @@
+import json
+from typing import Dict, Optional
+
+from src.service.database.helper import Database, run_sql
+
+
+class LLMCacheRepository:
+    @staticmethod
+    def get(cache_key: str) -> Optional[dict]:
+        rows = run_sql(
+            "SELECT response FROM llm_response_cache WHERE cache_key = %s AND expires_at > now()",
+            (cache_key,),
+        )
+        return rows[0][0] if rows else None
+
+    @staticmethod
+    def put(
+        cache_key: str, prompt_type: str, model: str, response: dict, ttl_seconds: float
+    ) -> None:
+        run_sql(
+            """
+            INSERT INTO llm_response_cache (cache_key, prompt_type, model, response, expires_at)
+            VALUES (%s, %s, %s, %s, now() + make_interval(secs => %s))
+            ON CONFLICT (cache_key) DO UPDATE SET
+                response = excluded.response,
+                expires_at = excluded.expires_at,
+                created_at = now()
+            """,
+            (cache_key, prompt_type, model, json.dumps(response), ttl_seconds),
+        )
+
+    @staticmethod
+    def record_hits(hits: Dict[str, int]) -> None:
+        """Add batched read counts to hit_count and mark the rows as recently used"""
+        keys = list(hits)
+        run_sql(
+            """
+            UPDATE llm_response_cache AS cached
+            SET hit_count = cached.hit_count + hit.n, last_hit_at = now()
+            FROM unnest(%s::text[], %s::int[]) AS hit(cache_key, n)
+            WHERE cached.cache_key = hit.cache_key
+            """,
+            (keys, [hits[key] for key in keys]),
+        )
+
+    @staticmethod
+    def evict(max_rows: int) -> int:
+        """Drop expired rows, then the least recently used ones beyond max_rows"""
+        pool = Database.get_pool()
+
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM llm_response_cache WHERE expires_at <= now()")
+                evicted = cursor.rowcount
+                cursor.execute(
+                    """
+                    DELETE FROM llm_response_cache
+                    WHERE cache_key IN (
+                        SELECT cache_key FROM llm_response_cache
+                        ORDER BY coalesce(last_hit_at, created_at) DESC
+                        OFFSET %s
+                    )
+                    """,
+                    (max_rows,),
+                )
+                evicted += cursor.rowcount
+                conn.commit()
+                return evicted
+
+    @staticmethod
+    def clear() -> None:
+        run_sql("DELETE FROM llm_response_cache")
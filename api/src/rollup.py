@@ -0,0 +1,50 @@
+"""Daily spending rollup maintenance: `python -m src.rollup check|rebuild`.
+
+check compares expense_daily_rollup against a fresh aggregate of expenses_mirror and exits
+non-zero if any day/category disagrees; rebuild recomputes the rollup from scratch.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import argparse
+import sys
+
+from src.repository.expense_rollup_repository import ExpenseRollupRepository
+
+
+def check() -> int:
+    drift = ExpenseRollupRepository.find_drift()
+    for cell in drift:
+        print(
+            f"{cell['day'] or '(no date)'} {cell['category'] or '(no category)'}: "
+            f"rollup {cell['rollup_count'] or 0} expenses / {(cell['rollup_cents'] or 0) / 100:.2f}, "
+            f"mirror {cell['actual_count'] or 0} expenses / {(cell['actual_cents'] or 0) / 100:.2f}"
+        )
+    if drift:
+        print(
+            f"Rollup disagrees with the mirror on {len(drift)} day/category cells; run `python -m src.rollup rebuild`"
+        )
+        return 1
+    print("Rollup matches the mirror")
+    return 0
+
+
+def rebuild() -> int:
+    rows = ExpenseRollupRepository.rebuild()
+    print(f"Rebuilt expense_daily_rollup: {rows} day/category rows")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.rollup", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("command", choices=["check", "rebuild"])
+    args = parser.parse_args(argv)
+    return check() if args.command == "check" else rebuild()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
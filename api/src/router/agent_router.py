@@ -1,14 +1,19 @@
-from fastapi import APIRouter, HTTPException, status, Header
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi.responses import StreamingResponse
 from src.models.agent import ChatRequest, ChatResponse, AddExpenseRequest, DeleteTransactionRequest, GenerateReportRequest, SetBudgetRequest, AgentDecision
 from src.service.agent_service import AgentService
-from src.repository.agent_repository import AgentRepository
+from src.service.chat_log import agent_repository, record_reply
+from src.service.clients import Clients
+from src.service.job_queue import JobQueue
+from src.router.job_router import accepted
 from src.repository.chat_repository import ChatRepository
+from src.service.llm_cache import llm_cache
 from src.utils.decorators import handle_notion_errors
 import jwt
 
 router = APIRouter(prefix="/agent", tags=["agent"])
-agent_service = AgentService()
-agent_repository = AgentRepository()
 
 
 def get_user_id_from_token(authorization: str) -> str:
@@ -23,40 +28,26 @@ def get_user_id_from_token(authorization: str) -> str:
         return "anonymous"
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/chat", response_model=ChatResponse)
 @handle_notion_errors
-async def chat(request: ChatRequest, authorization: str = Header(None)):
+async def chat(request: ChatRequest, authorization: str = Header(None),
+               agent_service: AgentService = Depends(Clients.get_agent_service)):
     try:
         user_id = get_user_id_from_token(authorization)
         
-        ChatRepository.save_message(
+        await asyncio.to_thread(
+            ChatRepository.save_message,
             user_id=user_id,
             role="user",
             content=request.message
         )
         
-        response = agent_service.process_message(request.message)
-        
-        ChatRepository.save_message(
-            user_id=user_id,
-            role="assistant",
-            content=response.message,
-            reasoning=response.reasoning,
-            metadata={
-                "action_taken": response.action_taken,
-                "state": response.state,
-                "data": response.data
-            }
-        )
-        
-        decision = AgentDecision(
-            user_message=request.message,
-            agent_state=response.state,
-            llm_reasoning=response.reasoning,
-            action_taken=response.action_taken,
-            result=response.data
-        )
-        agent_repository.log_decision(decision)
+        response = await agent_service.process_message(request.message)
+        await asyncio.to_thread(record_reply, user_id, request.message, response)
         return response
     except Exception as e:
         print(f"Error in chat endpoint: {e}")
@@ -66,11 +57,69 @@ async def chat(request: ChatRequest, authorization: str = Header(None)):
         )
 
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, authorization: str = Header(None),
+                      agent_service: AgentService = Depends(Clients.get_agent_service)):
+    user_id = get_user_id_from_token(authorization)
+    try:
+        await asyncio.to_thread(
+            ChatRepository.save_message,
+            user_id=user_id,
+            role="user",
+            content=request.message
+        )
+    except Exception as e:
+        print(f"Error in chat stream endpoint: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing message: {str(e)}"
+        )
+    
+    async def events():
+        try:
+            async for event, data in agent_service.stream_message(request.message):
+                if event == "done":
+                    # Persist before the client sees completion, like the non-streaming endpoint
+                    await asyncio.to_thread(record_reply, user_id, request.message, ChatResponse(**data))
+                yield _sse(event, data)
+        except Exception as e:
+            print(f"Error in chat stream endpoint: {e}")
+            yield _sse("error", {"detail": f"Error processing message: {str(e)}"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/chat/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def chat_job(request: ChatRequest, authorization: str = Header(None),
+                   job_queue: JobQueue = Depends(Clients.get_job_queue)):
+    user_id = get_user_id_from_token(authorization)
+    try:
+        await asyncio.to_thread(
+            ChatRepository.save_message,
+            user_id=user_id,
+            role="user",
+            content=request.message
+        )
+        job = await job_queue.enqueue("agent_chat", {"user_id": user_id, "message": request.message})
+        return accepted(job)
+    except Exception as e:
+        print(f"Error in chat job endpoint: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error queueing message: {str(e)}"
+        )
+
+
 @router.post("/add-expense", response_model=ChatResponse)
 @handle_notion_errors
-async def add_expense_from_text(request: AddExpenseRequest):
+async def add_expense_from_text(request: AddExpenseRequest,
+                                agent_service: AgentService = Depends(Clients.get_agent_service)):
     try:
-        expense_data = agent_service.parse_expense_from_text(request.text)
+        expense_data = await agent_service.parse_expense_from_text(request.text)
         
         if not expense_data:
             raise HTTPException(
@@ -89,7 +138,7 @@ async def add_expense_from_text(request: AddExpenseRequest):
             description=expense_data.description or ""
         )
         
-        created_expense = agent_service.notion_service.create_expense(
+        created_expense = await agent_service.notion_service.create_expense(
             amount=expense_create.amount,
             category=expense_create.category,
             merchant=expense_create.merchant,
@@ -109,7 +158,7 @@ async def add_expense_from_text(request: AddExpenseRequest):
                 "expense_id": created_expense.get("id") if created_expense else None
             }
         )
-        agent_repository.log_decision(decision)
+        await asyncio.to_thread(agent_repository.log_decision, decision)
         
         response = ChatResponse(
             message=f"Added expense: ${expense_data.amount:.2f} at {expense_data.merchant} for {expense_data.category}",
@@ -134,7 +183,7 @@ async def add_expense_from_text(request: AddExpenseRequest):
 @router.get("/decisions")
 async def get_recent_decisions(limit: int = 10):
     try:
-        decisions = agent_repository.get_recent_decisions(limit)
+        decisions = await asyncio.to_thread(agent_repository.get_recent_decisions, limit)
         return {"decisions": decisions}
     except Exception as e:
         print(f"Error getting decisions: {e}")
@@ -144,11 +193,29 @@ async def get_recent_decisions(limit: int = 10):
         )
 
 
+@router.get("/fast-path/stats")
+async def get_fast_path_stats():
+    try:
+        return await asyncio.to_thread(agent_repository.get_fast_path_stats)
+    except Exception as e:
+        print(f"Error getting fast path stats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving fast path stats: {str(e)}"
+        )
+
+
+@router.get("/llm-cache/stats")
+async def get_llm_cache_stats():
+    return llm_cache.stats()
+
+
 @router.post("/delete-transaction", response_model=ChatResponse)
 @handle_notion_errors
-async def delete_transaction(request: DeleteTransactionRequest):
+async def delete_transaction(request: DeleteTransactionRequest,
+                             agent_service: AgentService = Depends(Clients.get_agent_service)):
     try:
-        result = agent_service.delete_transaction_by_query(
+        result = await agent_service.delete_transaction_by_query(
             query=request.query,
             confirmed=request.confirmed,
             transaction_id=request.transaction_id
@@ -164,7 +231,7 @@ async def delete_transaction(request: DeleteTransactionRequest):
                 action_taken=ActionType.DELETE_TRANSACTION,
                 result=result
             )
-            agent_repository.log_decision(decision)
+            await asyncio.to_thread(agent_repository.log_decision, decision)
 
             matches = result.get("matches", [])
             transaction_to_delete = result.get("transaction_to_delete")
@@ -201,7 +268,7 @@ async def delete_transaction(request: DeleteTransactionRequest):
                 action_taken=ActionType.ERROR,
                 result=result
             )
-            agent_repository.log_decision(decision)
+            await asyncio.to_thread(agent_repository.log_decision, decision)
 
             return ChatResponse(
                 message=result.get("message", "Transaction not found"),
@@ -219,7 +286,7 @@ async def delete_transaction(request: DeleteTransactionRequest):
             action_taken=ActionType.DELETE_TRANSACTION,
             result=result
         )
-        agent_repository.log_decision(decision)
+        await asyncio.to_thread(agent_repository.log_decision, decision)
 
         return ChatResponse(
             message=result.get("message", "Transaction deleted successfully"),
@@ -241,9 +308,10 @@ async def delete_transaction(request: DeleteTransactionRequest):
 
 @router.post("/generate-report", response_model=ChatResponse)
 @handle_notion_errors
-async def generate_report(request: GenerateReportRequest):
+async def generate_report(request: GenerateReportRequest,
+                          agent_service: AgentService = Depends(Clients.get_agent_service)):
     try:
-        result = agent_service.generate_spending_report(
+        result = await agent_service.generate_spending_report(
             report_type=request.report_type,
             start_date=request.start_date,
             end_date=request.end_date
@@ -259,7 +327,7 @@ async def generate_report(request: GenerateReportRequest):
                 action_taken=ActionType.ERROR,
                 result=result
             )
-            agent_repository.log_decision(decision)
+            await asyncio.to_thread(agent_repository.log_decision, decision)
             
             return ChatResponse(
                 message=result.get("message", "Failed to generate report"),
@@ -276,7 +344,7 @@ async def generate_report(request: GenerateReportRequest):
             action_taken=ActionType.GENERATE_REPORT,
             result=result
         )
-        agent_repository.log_decision(decision)
+        await asyncio.to_thread(agent_repository.log_decision, decision)
         
         total = result.get('total_spent', 0)
         count = result.get('transaction_count', 0)
@@ -304,9 +372,10 @@ async def generate_report(request: GenerateReportRequest):
 
 @router.post("/set-budget", response_model=ChatResponse)
 @handle_notion_errors
-async def set_budget(request: SetBudgetRequest):
+async def set_budget(request: SetBudgetRequest,
+                     agent_service: AgentService = Depends(Clients.get_agent_service)):
     try:
-        result = agent_service.set_budget_goal(request.text)
+        result = await agent_service.set_budget_goal(request.text)
         
         from src.models.agent import ActionType, AgentState
         
@@ -318,7 +387,7 @@ async def set_budget(request: SetBudgetRequest):
                 action_taken=ActionType.ERROR,
                 result=result
             )
-            agent_repository.log_decision(decision)
+            await asyncio.to_thread(agent_repository.log_decision, decision)
             
             return ChatResponse(
                 message=result.get("message", "Failed to set budget"),
@@ -338,7 +407,7 @@ async def set_budget(request: SetBudgetRequest):
             action_taken=ActionType.SET_BUDGET,
             result=result
         )
-        agent_repository.log_decision(decision)
+        await asyncio.to_thread(agent_repository.log_decision, decision)
         
         return ChatResponse(
             message=result.get("message", "Budget set successfully"),
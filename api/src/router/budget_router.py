@@ -1,25 +1,23 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
 from src.models.budget import Budget, BudgetCreate, BudgetUpdate
+from src.service.clients import Clients
 from src.service.notion_service import NotionService
 
 router = APIRouter(prefix="/budgets", tags=["budgets"])
 
-def get_notion_service():
-    return NotionService()
-
 @router.get("", response_model=List[Budget])
-async def get_budgets(notion_service: NotionService = Depends(get_notion_service)):
+async def get_budgets(notion_service: NotionService = Depends(Clients.get_notion_service)):
     try:
-        budgets = notion_service.get_all_budgets()
+        budgets = await notion_service.get_all_budgets()
         return budgets
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{budget_id}", response_model=Budget)
-async def get_budget(budget_id: str, notion_service: NotionService = Depends(get_notion_service)):
+async def get_budget(budget_id: str, notion_service: NotionService = Depends(Clients.get_notion_service)):
     try:
-        budget = notion_service.get_budget_by_id(budget_id)
+        budget = await notion_service.get_budget_by_id(budget_id)
         if not budget:
             raise HTTPException(status_code=404, detail="Budget not found")
         return budget
@@ -29,9 +27,9 @@ async def get_budget(budget_id: str, notion_service: NotionService = Depends(get
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("", response_model=Budget)
-async def create_budget(budget: BudgetCreate, notion_service: NotionService = Depends(get_notion_service)):
+async def create_budget(budget: BudgetCreate, notion_service: NotionService = Depends(Clients.get_notion_service)):
     try:
-        created = notion_service.create_budget(
+        created = await notion_service.create_budget(
             category=budget.category,
             amount=budget.amount,
             period=budget.period,
@@ -42,9 +40,9 @@ async def create_budget(budget: BudgetCreate, notion_service: NotionService = De
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{budget_id}", response_model=Budget)
-async def update_budget(budget_id: str, budget: BudgetUpdate, notion_service: NotionService = Depends(get_notion_service)):
+async def update_budget(budget_id: str, budget: BudgetUpdate, notion_service: NotionService = Depends(Clients.get_notion_service)):
     try:
-        updated = notion_service.update_budget(
+        updated = await notion_service.update_budget(
             budget_id=budget_id,
             category=budget.category,
             amount=budget.amount,
@@ -56,9 +54,9 @@ async def update_budget(budget_id: str, budget: BudgetUpdate, notion_service: No
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{budget_id}")
-async def delete_budget(budget_id: str, notion_service: NotionService = Depends(get_notion_service)):
+async def delete_budget(budget_id: str, notion_service: NotionService = Depends(Clients.get_notion_service)):
     try:
-        success = notion_service.delete_budget(budget_id)
+        success = await notion_service.delete_budget(budget_id)
         return {"success": success, "message": "Budget deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
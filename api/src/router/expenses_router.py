@@ -1,17 +1,22 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+import shutil
+import tempfile
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from src.models.expense import ExpenseCreate, ExpenseUpdate, ExpenseResponse
+from src.service.clients import Clients
 from src.service.notion_service import NotionService
+from src.service.expense_sync_service import ExpenseSyncService
+from src.service.expense_import_service import ExpenseImportService
 from src.utils.decorators import handle_notion_errors
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
-notion_service = NotionService()
 
 
 @router.get("", response_model=List[ExpenseResponse])
 @handle_notion_errors
-async def get_all_expenses():
-    expenses = notion_service.get_all_expenses()
+async def get_all_expenses(notion_service: NotionService = Depends(Clients.get_notion_service)):
+    expenses = await notion_service.get_all_expenses()
     valid_expenses = [
         exp for exp in expenses
         if exp.get('id') and (exp.get('amount', 0) > 0 or exp.get('merchant'))
@@ -19,10 +24,69 @@ async def get_all_expenses():
     return valid_expenses
 
 
+@router.get("/search", response_model=List[ExpenseResponse])
+@handle_notion_errors
+async def search_expenses(q: str = "",
+                          min_amount: Optional[float] = None,
+                          max_amount: Optional[float] = None,
+                          start_date: Optional[str] = Query(None, alias="from"),
+                          end_date: Optional[str] = Query(None, alias="to"),
+                          fuzzy: bool = False,
+                          limit: int = Query(100, ge=1, le=1000),
+                          notion_service: NotionService = Depends(Clients.get_notion_service)):
+    return await notion_service.search_expenses(
+        q, min_amount=min_amount, max_amount=max_amount,
+        start_date=start_date, end_date=end_date, fuzzy=fuzzy, limit=limit
+    )
+
+
+@router.get("/sync/status")
+async def get_sync_status(sync_service: ExpenseSyncService = Depends(Clients.get_sync_service)):
+    if not sync_service.notion_service.mirror_enabled:
+        return {"enabled": False}
+    try:
+        return await sync_service.get_status()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error reading sync status: {str(e)}"
+        )
+
+
+@router.post("/import", status_code=status.HTTP_202_ACCEPTED)
+async def import_expenses(file: UploadFile = File(...),
+                          spending_sign: Optional[str] = Query(None, pattern="^(negative|positive)$"),
+                          import_service: ExpenseImportService = Depends(Clients.get_import_service)):
+    """Start a CSV/OFX import. Jobs are tracked in this process, so the API must run as a single worker"""
+    try:
+        # Spool the upload to disk in chunks; the import job streams rows back out of it
+        with tempfile.NamedTemporaryFile(prefix="expense-import-", delete=False) as tmp:
+            await asyncio.to_thread(shutil.copyfileobj, file.file, tmp)
+        return import_service.start_import(tmp.name, file.filename, spending_sign)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error starting import: {str(e)}"
+        )
+    finally:
+        await file.close()
+
+
+@router.get("/import/{job_id}")
+async def get_import_job(job_id: str, import_service: ExpenseImportService = Depends(Clients.get_import_service)):
+    job = import_service.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Import job {job_id} not found"
+        )
+    return job
+
+
 @router.get("/{expense_id}", response_model=ExpenseResponse)
 @handle_notion_errors
-async def get_expense(expense_id: str):
-    expense = notion_service.get_expense_by_id(expense_id)
+async def get_expense(expense_id: str, notion_service: NotionService = Depends(Clients.get_notion_service)):
+    expense = await notion_service.get_expense_by_id(expense_id)
     if not expense:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -33,8 +97,8 @@ async def get_expense(expense_id: str):
 
 @router.post("", response_model=ExpenseResponse, status_code=status.HTTP_201_CREATED)
 @handle_notion_errors
-async def create_expense(expense: ExpenseCreate):
-    new_expense = notion_service.create_expense(
+async def create_expense(expense: ExpenseCreate, notion_service: NotionService = Depends(Clients.get_notion_service)):
+    new_expense = await notion_service.create_expense(
         amount=expense.amount,
         category=expense.category,
         merchant=expense.merchant,
@@ -46,8 +110,9 @@ async def create_expense(expense: ExpenseCreate):
 
 @router.put("/{expense_id}", response_model=ExpenseResponse)
 @handle_notion_errors
-async def update_expense(expense_id: str, expense: ExpenseUpdate):
-    updated_expense = notion_service.update_expense(
+async def update_expense(expense_id: str, expense: ExpenseUpdate,
+                         notion_service: NotionService = Depends(Clients.get_notion_service)):
+    updated_expense = await notion_service.update_expense(
         expense_id=expense_id,
         amount=expense.amount,
         category=expense.category,
@@ -60,8 +125,8 @@ async def update_expense(expense_id: str, expense: ExpenseUpdate):
 
 @router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
 @handle_notion_errors
-async def delete_expense(expense_id: str):
-    success = notion_service.delete_expense(expense_id)
+async def delete_expense(expense_id: str, notion_service: NotionService = Depends(Clients.get_notion_service)):
+    success = await notion_service.delete_expense(expense_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
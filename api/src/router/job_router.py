@@ -0,0 +1,57 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from src.service.clients import Clients
+from src.service.job_queue import TERMINAL_STATUSES, JobQueue
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def accepted(job: dict) -> dict:
+    """Body of a 202 response: where to poll or stream the job's outcome"""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['id']}",
+        "events_url": f"/api/jobs/{job['id']}/events",
+    }
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, job_queue: JobQueue = Depends(Clients.get_job_queue)):
+    try:
+        job = await job_queue.get(job_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error reading job: {str(e)}"
+        )
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/events")
+async def stream_job(job_id: str, job_queue: JobQueue = Depends(Clients.get_job_queue)):
+    if not await job_queue.get(job_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    async def events():
+        try:
+            async for job in job_queue.watch(job_id):
+                yield _sse("done" if job["status"] in TERMINAL_STATUSES else "status", job)
+        except Exception as e:
+            print(f"Error streaming job {job_id}: {e}")
+            yield _sse("error", {"detail": f"Error reading job: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
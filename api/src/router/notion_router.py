@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+
+from src.service.notion_scheduler import notion_scheduler
+from src.service.notion_service import (
+    expense_cache,
+    expense_index,
+    expense_query_cache,
+    notion_reads,
+    schema_cache,
+)
+
+router = APIRouter(prefix="/notion", tags=["notion"])
+
+
+@router.get("/stats")
+async def get_notion_stats():
+    return {
+        "schema_cache": schema_cache.stats(),
+        "expense_cache": expense_cache.stats(),
+        "expense_query_cache": expense_query_cache.stats(),
+        "expense_index": expense_index.stats(),
+        "scheduler": notion_scheduler.stats(),
+        "single_flight": notion_reads.stats(),
+    }
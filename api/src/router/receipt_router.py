@@ -1,25 +1,33 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from src.service.agent_service import AgentService
-from src.models.expense import ExpenseCreate
+from src.service.clients import Clients
+from src.service.job_queue import JobQueue
+from src.router.job_router import accepted
+from src.service.receipt_batch_service import ReceiptBatchService
+from src.service.receipt_preprocessing import prepare_receipt
+import asyncio
 import base64
-import os
-from typing import Dict, Any
+import json
+import shutil
+import tempfile
+from typing import List
 
 router = APIRouter(prefix="/receipts", tags=["receipts"])
 
 @router.post("/upload")
-async def upload_receipt(file: UploadFile = File(...)) -> JSONResponse:
+async def upload_receipt(file: UploadFile = File(...),
+                         agent_service: AgentService = Depends(Clients.get_agent_service)) -> JSONResponse:
     if not file.content_type or not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="Only image files are allowed")
     
     try:
         contents = await file.read()
+        receipt = await prepare_receipt(contents, file.content_type)
         
-        base64_image = base64.b64encode(contents).decode('utf-8')
+        base64_image = base64.b64encode(receipt.data).decode('utf-8')
         
-        agent_service = AgentService()
-        expense_data = agent_service.extract_receipt_data(base64_image)
+        expense_data = await agent_service.extract_receipt_data(base64_image, receipt.mime_type, receipt.sha256)
         
         if not expense_data:
             return JSONResponse(
@@ -31,12 +39,15 @@ async def upload_receipt(file: UploadFile = File(...)) -> JSONResponse:
                 }
             )
         
+        duplicates = await agent_service.find_duplicate_expenses(expense_data)
+        
         return JSONResponse(
             status_code=200,
             content={
                 "success": True,
                 "message": "Receipt processed successfully",
                 "expense_data": expense_data,
+                "possible_duplicates": duplicates,
                 "filename": file.filename
             }
         )
@@ -47,16 +58,17 @@ async def upload_receipt(file: UploadFile = File(...)) -> JSONResponse:
         await file.close()
 
 @router.post("/upload-and-save")
-async def upload_and_save_receipt(file: UploadFile = File(...)) -> JSONResponse:
+async def upload_and_save_receipt(file: UploadFile = File(...),
+                                  agent_service: AgentService = Depends(Clients.get_agent_service)) -> JSONResponse:
     if not file.content_type or not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="Only image files are allowed")
     
     try:
         contents = await file.read()
-        base64_image = base64.b64encode(contents).decode('utf-8')
+        receipt = await prepare_receipt(contents, file.content_type)
+        base64_image = base64.b64encode(receipt.data).decode('utf-8')
         
-        agent_service = AgentService()
-        expense_data = agent_service.extract_receipt_data(base64_image)
+        expense_data = await agent_service.extract_receipt_data(base64_image, receipt.mime_type, receipt.sha256)
         
         if not expense_data:
             return JSONResponse(
@@ -67,8 +79,11 @@ async def upload_and_save_receipt(file: UploadFile = File(...)) -> JSONResponse:
                 }
             )
         
+        # Flagged for the user to review, never a reason to refuse the save
+        duplicates = await agent_service.find_duplicate_expenses(expense_data)
+        
         from datetime import datetime
-        created_expense = agent_service.notion_service.create_expense(
+        created_expense = await agent_service.notion_service.create_expense(
             amount=expense_data.get('amount', 0),
             category=expense_data.get('category', 'Other'),
             merchant=expense_data.get('merchant', 'Unknown'),
@@ -83,6 +98,7 @@ async def upload_and_save_receipt(file: UploadFile = File(...)) -> JSONResponse:
                 "message": "Receipt processed and expense created",
                 "expense_data": expense_data,
                 "expense_id": created_expense.get("id") if created_expense else None,
+                "possible_duplicates": duplicates,
                 "filename": file.filename
             }
         )
@@ -91,3 +107,68 @@ async def upload_and_save_receipt(file: UploadFile = File(...)) -> JSONResponse:
         raise HTTPException(status_code=500, detail=f"Error processing receipt: {str(e)}")
     finally:
         await file.close()
+
+@router.post("/batch")
+async def upload_receipt_batch(files: List[UploadFile] = File(...),
+                               allow_duplicate: bool = False,
+                               batch_service: ReceiptBatchService = Depends(Clients.get_receipt_batch_service)) -> StreamingResponse:
+    if len(files) > batch_service.max_files:
+        raise HTTPException(status_code=400, detail=f"At most {batch_service.max_files} receipts per batch")
+    
+    # Uploads are closed once this handler returns, before the stream is consumed. Spool each
+    # to its own temp file on disk; the batch reads them one at a time as it gets to them
+    received = []
+    try:
+        for file in files:
+            spooled = tempfile.TemporaryFile(prefix="receipt-batch-")
+            received.append((file.filename, file.content_type, spooled))
+            await asyncio.to_thread(shutil.copyfileobj, file.file, spooled)
+            spooled.seek(0)
+    except Exception:
+        for _, _, spooled in received:
+            spooled.close()
+        raise
+    finally:
+        for file in files:
+            await file.close()
+    
+    async def results():
+        try:
+            async for result in batch_service.process(received, allow_duplicates=allow_duplicate):
+                yield json.dumps(result) + "\n"
+        finally:
+            for _, _, spooled in received:
+                spooled.close()
+    
+    return StreamingResponse(
+        results(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_receipt(file: UploadFile = File(...),
+                          save: bool = False,
+                          job_queue: JobQueue = Depends(Clients.get_job_queue)):
+    if not file.content_type or not file.content_type.startswith('image/'):
+        raise HTTPException(status_code=400, detail="Only image files are allowed")
+    
+    try:
+        contents = await file.read()
+        # Store the shrunk image, not the raw photo, in the job row
+        receipt = await prepare_receipt(contents, file.content_type)
+        job = await job_queue.enqueue(
+            "receipt_ocr",
+            {
+                "filename": file.filename,
+                "mime_type": receipt.mime_type,
+                "original_bytes": receipt.original_bytes,
+                "save": save
+            },
+            attachment=receipt.data
+        )
+        return accepted(job)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing receipt: {str(e)}")
+    finally:
+        await file.close()
@@ -0,0 +1,71 @@
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from src.models.agent import AgentState
+
+
+class AgentRun:
+    """Execution context for one chat message: state, phase timings, LLM usage and the
+    intermediate plan/result.
+
+    AgentService keeps no per-message state of its own, so one instance can serve many
+    chats at once; each call works on its own run.
+    """
+
+    def __init__(self, user_message: str):
+        self.run_id = uuid.uuid4().hex
+        self.user_message = user_message
+        self.state = AgentState.PLANNING
+        self.started = time.perf_counter()
+        self._phase_started = self.started
+        self.timings_ms: Dict[str, float] = {}
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.plan: Optional[Dict[str, Any]] = None
+        self.result: Optional[Dict[str, Any]] = None
+
+    def transition(self, state: AgentState) -> None:
+        now = time.perf_counter()
+        self.timings_ms[self.state.value] = (now - self._phase_started) * 1000
+        self.state = state
+        self._phase_started = now
+
+    def record_llm_call(
+        self,
+        model: str,
+        elapsed_ms: float,
+        usage: Any = None,
+        prompt_type: Optional[str] = None,
+        outcome: str = "ok",
+    ) -> None:
+        self.llm_calls.append(
+            {
+                "model": model,
+                "prompt_type": prompt_type,
+                "outcome": outcome,
+                "elapsed_ms": elapsed_ms,
+                "prompt_tokens": getattr(usage, "prompt_tokens", None) or 0,
+                "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
+            }
+        )
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "state": self.state.value,
+            "timings_ms": dict(self.timings_ms),
+            "llm_calls": len(self.llm_calls),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in self.llm_calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in self.llm_calls),
+            "llm": [dict(call) for call in self.llm_calls],
+        }
+
+
+# The run the current task is working on, so LLM usage deep in the parsers is attributed
+# to the right chat; asyncio tasks (and gather children) each see their own copy
+current_run: ContextVar[Optional[AgentRun]] = ContextVar("current_run", default=None)
@@ -1,15 +1,37 @@
+import asyncio
+import contextlib
 import os
 import json
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, AsyncIterator, Tuple
 from datetime import datetime
-from openai import OpenAI
-from src.models.agent import AgentState, ActionType, ExpenseParseResult, AgentDecision, ChatResponse
-from src.models.expense import ExpenseCreate
+import httpx
+from openai import AsyncOpenAI
+from pydantic import ValidationError
+from src.models.agent import AgentState, ActionType, ExpenseParseResult, ChatResponse
 from src.models.budget import BudgetParseResult
-from src.service.notion_service import NotionService
+from src.service.agent_run import AgentRun, current_run
+from src.service.intent_rules import classify_message
+from src.service.llm_cache import llm_cache
+from src.service.notion_service import NotionService, expense_index
+from src.service.report_engine import ExpenseFrame, ExpenseFrameBuilder, build_report, rollup_can_build
+from src.utils.metrics import LATENCY_BUCKETS, TOKEN_BUCKETS, registry
+
+llm_request_seconds = registry.histogram(
+    "llm_request_duration_seconds", "Wall time of LLM chat completion calls",
+    ["model", "prompt_type", "outcome"], LATENCY_BUCKETS,
+)
+llm_tokens = registry.histogram(
+    "llm_tokens", "Tokens per LLM chat completion call",
+    ["model", "prompt_type", "kind"], TOKEN_BUCKETS,
+)
+
+# Intents _act handles itself; anything else gets a generated general response
+ACTION_INTENTS = {"ADD_EXPENSE", "DELETE_EXPENSE", "SET_BUDGET", "GET_BUDGET", "GET_EXPENSES"}
+
 
 class AgentService:
-    def __init__(self):
+    def __init__(self, notion_service: Optional[NotionService] = None, http_client: Optional[httpx.AsyncClient] = None):
         api_key = os.getenv("OPENAI_API_KEY") or os.getenv("AI_TOKEN")
         base_url = os.getenv("OPENAI_BASE_URL") or os.getenv("AI_BASE_URL")
         
@@ -17,68 +39,180 @@ class AgentService:
             raise RuntimeError("OpenAI API key not set. Provide OPENAI_API_KEY or AI_TOKEN in the environment.")
         
         if base_url:
-            self.client = OpenAI(api_key=api_key, base_url=base_url)
+            self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
         else:
-            self.client = OpenAI(api_key=api_key)
-        self.notion_service = NotionService()
-        self.current_state = AgentState.PLANNING
+            self.client = AsyncOpenAI(api_key=api_key, http_client=http_client)
+        self.notion_service = notion_service or NotionService()
+        # Obvious messages ("spent $12 at Chipotle") are planned and parsed without the LLM
+        self.fast_path_enabled = os.getenv("AGENT_FAST_PATH_ENABLED", "true").lower() == "true"
+        # Moving average of LLM round-trip time, used to estimate what the fast path saves
+        self.llm_latency_ms: Optional[float] = None
+        # "combined" plans and extracts the payload in one LLM call; "split" uses a call for each
+        self.planner_mode = os.getenv("AGENT_PLANNER_MODE", "split").lower()
+        
+    async def process_message(self, user_message: str) -> ChatResponse:
+        run = AgentRun(user_message)
+        token = current_run.set(run)
+        try:
+            run.plan = await self._plan_message(user_message)
+            run.transition(AgentState.ACTING)
+            run.result = await self._act(run.plan, user_message)
+            run.transition(AgentState.OBSERVING)
+            response = await self._observe(run.result, run.plan)
+            run.transition(AgentState.COMPLETED)
+            return self._annotate_response(response, run)
+        finally:
+            current_run.reset(token)
+    
+    async def stream_message(self, user_message: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Run the plan/act/observe loop, yielding (event, data) pairs as it goes.
         
-    def process_message(self, user_message: str) -> ChatResponse:
-        self.current_state = AgentState.PLANNING
-        plan = self._plan(user_message)
-        self.current_state = AgentState.ACTING
-        result = self._act(plan, user_message)
-        self.current_state = AgentState.OBSERVING
-        response = self._observe(result, plan)
-        self.current_state = AgentState.COMPLETED
+        Emits a "state" event on each transition and "token" events while a general
+        response is generated; the last event is "done" with the full ChatResponse.
+        """
+        run = AgentRun(user_message)
+        token = current_run.set(run)
+        try:
+            yield "state", {"state": run.state.value}
+            run.plan = await self._plan_message(user_message)
+            
+            run.transition(AgentState.ACTING)
+            yield "state", {"state": run.state.value, "intent": run.plan.get("intent")}
+            if run.plan.get("intent") in ACTION_INTENTS:
+                run.result = await self._act(run.plan, user_message)
+            else:
+                chunks = []
+                async for text in self._stream_general_response(user_message):
+                    chunks.append(text)
+                    yield "token", {"text": text}
+                run.result = self._general_response_result(run.plan, "".join(chunks))
+            
+            run.transition(AgentState.OBSERVING)
+            yield "state", {"state": run.state.value}
+            response = await self._observe(run.result, run.plan)
+            run.transition(AgentState.COMPLETED)
+            yield "state", {"state": run.state.value}
+            yield "done", self._annotate_response(response, run).model_dump(mode="json")
+        finally:
+            # A stream abandoned by its client may be finalized from another context
+            with contextlib.suppress(ValueError):
+                current_run.reset(token)
+    
+    async def _plan_message(self, user_message: str) -> Dict[str, Any]:
+        plan = classify_message(user_message) if self.fast_path_enabled else None
+        if plan:
+            plan["source"] = "rules"
+            # The planner call is skipped, and the parse call too when the rules filled the payload
+            plan["llm_calls_saved"] = 1 + int(any(key in plan for key in ("expense", "budget", "deletion")))
+        elif self.planner_mode == "combined":
+            plan = self._validate_plan_payload(await self._plan_combined(user_message))
+            plan["source"] = "llm"
+            # A valid payload means the separate parse call is skipped
+            plan["llm_calls_saved"] = int(any(key in plan for key in ("expense", "budget", "deletion")))
+        else:
+            plan = self._validate_plan_payload(await self._plan(user_message))
+            plan["source"] = "llm"
+            plan["llm_calls_saved"] = 0
+        return plan
+    
+    def _annotate_response(self, response: ChatResponse, run: AgentRun) -> ChatResponse:
+        response.state = run.state
+        response.plan_source = run.plan["source"]
+        response.llm_calls_saved = run.plan["llm_calls_saved"]
+        response.latency_ms = run.elapsed_ms
+        response.latency_saved_ms = run.plan["llm_calls_saved"] * (self.llm_latency_ms or 0.0)
+        response.run = run.summary()
+        return response
+    
+    async def _chat_completion(self, prompt_type: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.chat.completions.create(**kwargs)
+        except Exception:
+            self._record_llm_call(prompt_type, kwargs.get("model"), started, "error")
+            raise
+        # A streamed call returns once the headers arrive; the caller records it when the stream ends
+        if kwargs.get("stream"):
+            return response
+        elapsed_ms = self._record_llm_call(prompt_type, kwargs.get("model"), started, "ok", getattr(response, "usage", None))
+        if self.llm_latency_ms is None:
+            self.llm_latency_ms = elapsed_ms
+        else:
+            self.llm_latency_ms = 0.8 * self.llm_latency_ms + 0.2 * elapsed_ms
         return response
     
-    def search_transactions(self, query: str, amount: Optional[float] = None, merchant: Optional[str] = None, date: Optional[str] = None) -> list:
+    def _record_llm_call(self, prompt_type: str, model: str, started: float, outcome: str, usage: Any = None) -> float:
+        """Export one LLM call to the metrics histograms and the current chat's run"""
+        elapsed = time.perf_counter() - started
+        llm_request_seconds.observe(elapsed, model=model, prompt_type=prompt_type, outcome=outcome)
+        if usage is not None:
+            llm_tokens.observe(getattr(usage, "prompt_tokens", 0) or 0, model=model, prompt_type=prompt_type, kind="prompt")
+            llm_tokens.observe(getattr(usage, "completion_tokens", 0) or 0, model=model, prompt_type=prompt_type, kind="completion")
+        run = current_run.get()
+        if run is not None:
+            run.record_llm_call(model, elapsed * 1000, usage, prompt_type=prompt_type, outcome=outcome)
+        return elapsed * 1000
+    
+    async def _cached_json_completion(self, prompt_type: str, model: str, system_prompt: str, text: str,
+                                user_content: str, date_context: str = "", **kwargs) -> Dict[str, Any]:
+        """JSON completion for a parser prompt, answered from the LLM cache when the same text was seen"""
+        key = llm_cache.key(model, system_prompt, text, date_context)
+        cached = await llm_cache.get(prompt_type, key)
+        if cached is not None:
+            return cached
+        
+        response = await self._chat_completion(
+            prompt_type,
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content}
+            ],
+            **kwargs
+        )
+        result = json.loads(response.choices[0].message.content.strip())
+        await llm_cache.put(prompt_type, key, model, result)
+        return result
+    
+    async def _warm_search_index(self) -> None:
+        try:
+            await self.notion_service.warm_search_index()
+        except Exception as e:
+            # The search will fetch what it needs itself
+            print(f"Error building the expense search index: {e}")
+    
+    async def search_transactions(self, query: str, amount: Optional[float] = None, merchant: Optional[str] = None, date: Optional[str] = None) -> list:
         """Search transactions with optional specific filters"""
         try:
-            all_expenses = self.notion_service.get_all_expenses()
-            query_lower = query.lower()
-            matching = []
-
-            for expense in all_expenses:
-                # If specific filters are provided, use exact matching
-                if amount is not None:
-                    if abs(expense.get('amount', 0) - amount) > 0.01:  # Allow small floating point differences
-                        continue
-                
-                if merchant is not None:
-                    expense_merchant = expense.get('merchant', '').lower()
-                    if merchant.lower() not in expense_merchant:
-                        continue
-                
-                if date is not None:
-                    if expense.get('date', '') != date:
-                        continue
-                
-                # If no specific filters, do general search
-                if amount is None and merchant is None and date is None:
-                    merchant_field = expense.get('merchant', '').lower()
-                    category_field = expense.get('category', '').lower()
-                    description_field = expense.get('description', '').lower()
-                    amount_str = str(expense.get('amount', ''))
-
-                    if (query_lower in merchant_field or
-                        query_lower in category_field or
-                        query_lower in description_field or
-                        query_lower in amount_str):
-                        matching.append(expense)
-                else:
-                    # All filters passed
+            structured = amount is not None or merchant is not None or date is not None
+
+            if structured and not expense_index.fresh():
+                # Structured filters are evaluated by Notion, so only matching pages are fetched
+                # rather than loading the whole ledger to build the index
+                matching = []
+                async for expense in self.notion_service.query_expenses(
+                    start_date=date, end_date=date, amount_eq=amount, merchant_contains=merchant
+                ):
                     matching.append(expense)
-
-            return matching
+                return matching
+
+            # Free text spans select and number properties, which Notion can't substring-match;
+            # the index answers it from trigram postings instead of scanning every expense
+            return await self.notion_service.search_expenses(
+                "" if structured else query,
+                merchant=merchant,
+                min_amount=amount - 0.01 if amount is not None else None,
+                max_amount=amount + 0.01 if amount is not None else None,
+                start_date=date,
+                end_date=date,
+            )
         except Exception as e:
             print(f"Error searching transactions: {e}")
             import traceback
             traceback.print_exc()
             return []
     
-    def extract_deletion_details(self, deletion_request: str) -> Dict[str, Any]:
+    async def extract_deletion_details(self, deletion_request: str) -> Dict[str, Any]:
         """Extract structured transaction details from deletion request using LLM"""
         system_prompt = """You are a transaction detail extractor. Given a user's deletion request, extract the transaction details.
 
@@ -97,17 +231,14 @@ Examples:
 Return ONLY valid JSON with extracted fields. Include only fields that are explicitly mentioned."""
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-oss-120b",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Extract details from: {deletion_request}"}
-                ],
+            result = await self._cached_json_completion(
+                "deletion_details",
+                "gpt-oss-120b",
+                system_prompt,
+                deletion_request,
+                f"Extract details from: {deletion_request}",
                 max_tokens=100
             )
-
-            import json
-            result = json.loads(response.choices[0].message.content.strip())
             return result
         except Exception as e:
             print(f"Error extracting deletion details: {e}")
@@ -125,17 +256,18 @@ Return ONLY valid JSON with extracted fields. Include only fields that are expli
             
             return result
 
-    def delete_transaction_by_query(self, query: str, confirmed: bool = False, transaction_id: Optional[str] = None) -> Dict[str, Any]:
+    async def delete_transaction_by_query(self, query: str, confirmed: bool = False, transaction_id: Optional[str] = None,
+                                          details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         if confirmed and transaction_id:
             try:
-                transaction = self.notion_service.get_expense_by_id(transaction_id)
+                transaction = await self.notion_service.get_expense_by_id(transaction_id)
                 if not transaction:
                     return {
                         "success": False,
                         "message": "Transaction not found"
                     }
 
-                self.notion_service.delete_expense(transaction_id)
+                await self.notion_service.delete_expense(transaction_id)
                 return {
                     "success": True,
                     "message": f"Deleted ${transaction['amount']:.2f} at {transaction['merchant']}",
@@ -150,11 +282,17 @@ Return ONLY valid JSON with extracted fields. Include only fields that are expli
                     "message": f"Failed to delete transaction: {str(e)}"
                 }
 
-        # Extract structured details from the query
-        details = self.extract_deletion_details(query)
+        # Extract structured details from the query, unless the caller already has them. The
+        # extraction is an LLM round trip, so a stale search index is rebuilt while it runs and
+        # the search reads from it; a fresh index means no ledger read at all
+        if details is None:
+            details, _ = await asyncio.gather(
+                self.extract_deletion_details(query),
+                self._warm_search_index()
+            )
         
         # Search with structured filters
-        matches = self.search_transactions(
+        matches = await self.search_transactions(
             query=details.get("query", query),
             amount=details.get("amount"),
             merchant=details.get("merchant"),
@@ -192,13 +330,13 @@ Return ONLY valid JSON with extracted fields. Include only fields that are expli
             return {
                 "success": False,
                 "needs_confirmation": True,
-                "message": f"Are you sure you want to delete this transaction?",
+                "message": "Are you sure you want to delete this transaction?",
                 "transaction_to_delete": transaction,
                 "matches": [transaction]
             }
 
         try:
-            self.notion_service.delete_expense(transaction['id'])
+            await self.notion_service.delete_expense(transaction['id'])
             return {
                 "success": True,
                 "message": f"Deleted ${transaction['amount']:.2f} at {transaction['merchant']}",
@@ -210,107 +348,27 @@ Return ONLY valid JSON with extracted fields. Include only fields that are expli
                 "message": f"Failed to delete transaction: {str(e)}"
             }
     
-    def generate_spending_report(self, report_type: str = "monthly", start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    async def generate_spending_report(self, report_type: str = "monthly", start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
         """Generate a spending report"""
         try:
-            from datetime import datetime, timedelta
-            all_expenses = self.notion_service.get_all_expenses()
-            
             if report_type == "monthly" and not start_date and not end_date:
                 now = datetime.now()
                 start_date = now.replace(day=1).strftime("%Y-%m-%d")
                 end_date = now.strftime("%Y-%m-%d")
             
-            if start_date or end_date:
-                filtered = []
-                for expense in all_expenses:
-                    exp_date = expense.get('date', '')
-                    if start_date and exp_date < start_date:
-                        continue
-                    if end_date and exp_date > end_date:
-                        continue
-                    filtered.append(expense)
-                all_expenses = filtered
+            # With the mirror on, reports that only group by day and category come from the
+            # daily rollup: days x categories rows, however many transactions the range holds
+            if rollup_can_build(report_type):
+                rollup = await self.notion_service.get_daily_rollup(start_date, end_date)
+                if rollup is not None:
+                    return build_report(ExpenseFrame.from_rollup(rollup), report_type, start_date, end_date)
             
-            total_spent = sum(exp.get('amount', 0) for exp in all_expenses)
+            # Only the requested date range crosses the wire, and it's held as compact columns
+            frame = ExpenseFrameBuilder()
+            async for expense in self.notion_service.query_expenses(start_date=start_date, end_date=end_date):
+                frame.append(expense)
             
-            by_category = {}
-            for expense in all_expenses:
-                cat = expense.get('category', 'Other')
-                if cat not in by_category:
-                    by_category[cat] = {'total': 0, 'count': 0}
-                by_category[cat]['total'] += expense.get('amount', 0)
-                by_category[cat]['count'] += 1
-            
-            category_breakdown = [
-                {
-                    'category': cat,
-                    'total': data['total'],
-                    'count': data['count'],
-                    'percentage': (data['total'] / total_spent * 100) if total_spent > 0 else 0
-                }
-                for cat, data in by_category.items()
-            ]
-            category_breakdown.sort(key=lambda x: x['total'], reverse=True)
-            
-            report_data = {
-                "success": True,
-                "report_type": report_type,
-                "total_spent": total_spent,
-                "transaction_count": len(all_expenses),
-                "category_breakdown": category_breakdown,
-                "top_category": category_breakdown[0]['category'] if category_breakdown else None,
-                "start_date": start_date,
-                "end_date": end_date
-            }
-            
-            if report_type == "monthly":
-                if start_date:
-                    days_in_period = (datetime.strptime(end_date or start_date, "%Y-%m-%d") - 
-                                     datetime.strptime(start_date, "%Y-%m-%d")).days + 1
-                else:
-                    days_in_period = 30
-                report_data["daily_average"] = total_spent / days_in_period if days_in_period > 0 else 0
-                report_data["period_description"] = "This Month"
-                
-            elif report_type == "category":
-                report_data["category_breakdown"] = sorted(
-                    category_breakdown, 
-                    key=lambda x: x['category']
-                )
-                report_data["total_categories"] = len(category_breakdown)
-                report_data["period_description"] = "All Time"
-                
-            elif report_type == "trends":
-                by_date = {}
-                for expense in all_expenses:
-                    exp_date = expense.get('date', '')
-                    if exp_date:
-                        if exp_date not in by_date:
-                            by_date[exp_date] = 0
-                        by_date[exp_date] += expense.get('amount', 0)
-                
-                sorted_dates = sorted(by_date.keys(), reverse=True)[:7]
-                trend_data = [
-                    {'date': date, 'amount': by_date[date]}
-                    for date in sorted(sorted_dates)
-                ]
-                report_data["trend_data"] = trend_data
-                report_data["period_description"] = "Last 7 Days"
-                
-                if len(trend_data) >= 2:
-                    recent_avg = sum(d['amount'] for d in trend_data[-3:]) / 3 if len(trend_data) >= 3 else trend_data[-1]['amount']
-                    older_avg = sum(d['amount'] for d in trend_data[:3]) / 3 if len(trend_data) >= 3 else trend_data[0]['amount']
-                    if recent_avg > older_avg * 1.1:
-                        report_data["trend_direction"] = "increasing"
-                    elif recent_avg < older_avg * 0.9:
-                        report_data["trend_direction"] = "decreasing"
-                    else:
-                        report_data["trend_direction"] = "stable"
-                else:
-                    report_data["trend_direction"] = "insufficient_data"
-            
-            return report_data
+            return build_report(frame.build(), report_type, start_date, end_date)
             
         except Exception as e:
             print(f"Error generating report: {e}")
@@ -321,7 +379,7 @@ Return ONLY valid JSON with extracted fields. Include only fields that are expli
                 "message": f"Failed to generate report: {str(e)}"
             }
     
-    def _plan(self, user_message: str) -> Dict[str, Any]:
+    async def _plan(self, user_message: str) -> Dict[str, Any]:
         system_prompt = """You are a financial assistant AI. Analyze the user's message and determine their intent.
 
 Possible intents:
@@ -339,27 +397,89 @@ Respond in JSON format:
     "confidence": 0.0-1.0
 }"""
         
-        response = self.client.chat.completions.create(
-            model="gpt-oss-120b",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
+        plan = await self._cached_json_completion(
+            "plan",
+            "gpt-oss-120b",
+            system_prompt,
+            user_message,
+            user_message,
+            response_format={"type": "json_object"}
+        )
+        return plan
+    
+    async def _plan_combined(self, user_message: str) -> Dict[str, Any]:
+        system_prompt = f"""You are a financial assistant AI. Determine the user's intent and, in the same answer, extract the details needed to act on it.
+
+Possible intents:
+- ADD_EXPENSE: User is reporting a spending/expense
+- DELETE_EXPENSE: User wants to delete or remove an expense/transaction
+- SET_BUDGET: User wants to set or update a budget goal
+- GET_BUDGET: User wants to see their budget
+- GET_EXPENSES: User wants to see their expenses
+- GENERAL_RESPONSE: General question or conversation
+
+Today is {datetime.now().strftime('%Y-%m-%d')}.
+
+For ADD_EXPENSE include "expense": {{"amount": 45.00, "category": "Groceries|Dining|Transportation|Entertainment|Shopping|Bills|Healthcare|Other", "merchant": "Whole Foods", "date": "YYYY-MM-DD (today if not mentioned)", "description": "Weekly shopping", "confidence": 0.0-1.0}}
+For SET_BUDGET include "budget": {{"category": "Dining", "amount": 400.00, "period": "monthly|weekly|yearly", "confidence": 0.0-1.0}}
+For DELETE_EXPENSE include "deletion" with only the fields explicitly mentioned: {{"amount": 65.00, "merchant": "Gas station", "date": "YYYY-MM-DD", "query": "general search term"}}
+Omit the payload for other intents.
+
+Respond in JSON format:
+{{
+    "intent": "ADD_EXPENSE|DELETE_EXPENSE|SET_BUDGET|GET_BUDGET|GET_EXPENSES|GENERAL_RESPONSE",
+    "reasoning": "Brief explanation of why you chose this intent",
+    "confidence": 0.0-1.0,
+    "expense": {{...}},
+    "budget": {{...}},
+    "deletion": {{...}}
+}}"""
+        
+        # Today's date is part of the system prompt, so it is already in the cache key
+        return await self._cached_json_completion(
+            "plan_combined",
+            "gpt-oss-120b",
+            system_prompt,
+            user_message,
+            user_message,
             response_format={"type": "json_object"}
         )
+    
+    def _validate_plan_payload(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Type the payload that came with an LLM plan; drop anything invalid or unconfident so _act parses it itself"""
+        intent = plan.get("intent")
+        expense = plan.pop("expense", None)
+        budget = plan.pop("budget", None)
+        deletion = plan.pop("deletion", None)
         
-        plan = json.loads(response.choices[0].message.content)
+        try:
+            if intent == "ADD_EXPENSE" and isinstance(expense, dict):
+                expense_result = ExpenseParseResult(**expense)
+                if expense_result.confidence >= 0.5:
+                    plan["expense"] = expense_result
+            elif intent == "SET_BUDGET" and isinstance(budget, dict):
+                budget_result = BudgetParseResult(**budget)
+                if budget_result.confidence >= 0.5:
+                    plan["budget"] = budget_result
+            elif intent == "DELETE_EXPENSE" and isinstance(deletion, dict):
+                details = {key: deletion[key] for key in ("amount", "merchant", "date", "query") if deletion.get(key) not in (None, "")}
+                if "amount" in details:
+                    details["amount"] = float(details["amount"])
+                if details:
+                    plan["deletion"] = details
+        except (ValidationError, TypeError, ValueError) as e:
+            print(f"Discarding invalid plan payload: {e}")
         return plan
     
-    def _act(self, plan: Dict[str, Any], user_message: str) -> Dict[str, Any]:
+    async def _act(self, plan: Dict[str, Any], user_message: str) -> Dict[str, Any]:
         intent = plan.get("intent", "GENERAL_RESPONSE")
         reasoning = plan.get("reasoning", "")
         
         if intent == "ADD_EXPENSE":
-            expense_data = self.parse_expense_from_text(user_message)
+            expense_data = plan.get("expense") or await self.parse_expense_from_text(user_message)
             
             if expense_data:
-                created_expense = self.notion_service.create_expense(
+                created_expense = await self.notion_service.create_expense(
                     amount=expense_data.amount,
                     category=expense_data.category,
                     merchant=expense_data.merchant,
@@ -385,7 +505,7 @@ Respond in JSON format:
                 }
         
         elif intent == "DELETE_EXPENSE":
-            delete_result = self.delete_transaction_by_query(user_message)
+            delete_result = await self.delete_transaction_by_query(user_message, details=plan.get("deletion"))
 
             if delete_result.get("needs_confirmation"):
                 return {
@@ -411,7 +531,7 @@ Respond in JSON format:
                 }
 
         elif intent == "SET_BUDGET":
-            budget_result = self.set_budget_goal(user_message)
+            budget_result = await self.set_budget_goal(user_message, budget_data=plan.get("budget"))
 
             if budget_result.get("success"):
                 return {
@@ -445,15 +565,18 @@ Respond in JSON format:
             }
         
         else:
-            response = self._generate_general_response(user_message)
-            return {
-                "action": ActionType.GENERAL_RESPONSE,
-                "reasoning": reasoning,
-                "success": True,
-                "data": {"response": response}
-            }
+            response = await self._generate_general_response(user_message)
+            return self._general_response_result(plan, response)
+    
+    def _general_response_result(self, plan: Dict[str, Any], response: str) -> Dict[str, Any]:
+        return {
+            "action": ActionType.GENERAL_RESPONSE,
+            "reasoning": plan.get("reasoning", ""),
+            "success": True,
+            "data": {"response": response}
+        }
     
-    def _observe(self, result: Dict[str, Any], plan: Dict[str, Any]) -> ChatResponse:
+    async def _observe(self, result: Dict[str, Any], plan: Dict[str, Any]) -> ChatResponse:
         action = result.get("action", ActionType.GENERAL_RESPONSE)
         success = result.get("success", False)
         reasoning = result.get("reasoning", "")
@@ -487,7 +610,6 @@ Respond in JSON format:
                 message = data.get("message", "I couldn't find that transaction. Please try being more specific.")
 
         elif action == ActionType.SET_BUDGET and success:
-            budget = data.get("budget", {})
             action_type = data.get("action", "set")
             message = data.get("message", f"Budget {action_type} successfully!")
 
@@ -508,7 +630,7 @@ Respond in JSON format:
             data=data
         )
     
-    def parse_expense_from_text(self, text: str) -> Optional[ExpenseParseResult]:
+    async def parse_expense_from_text(self, text: str) -> Optional[ExpenseParseResult]:
         system_prompt = """You are an expense parser. Extract expense details from natural language.
 
 Extract these fields:
@@ -532,16 +654,16 @@ Respond ONLY in JSON format:
 If you cannot parse the expense, return confidence: 0.0"""
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-oss-120b",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Today is {datetime.now().strftime('%Y-%m-%d')}. Parse this expense: {text}"}
-                ],
+            today = datetime.now().strftime('%Y-%m-%d')
+            parsed_data = await self._cached_json_completion(
+                "expense",
+                "gpt-oss-120b",
+                system_prompt,
+                text,
+                f"Today is {today}. Parse this expense: {text}",
+                date_context=today,
                 response_format={"type": "json_object"}
             )
-            
-            parsed_data = json.loads(response.choices[0].message.content)
             expense_result = ExpenseParseResult(**parsed_data)
             
             if expense_result.confidence >= 0.5:
@@ -553,7 +675,7 @@ If you cannot parse the expense, return confidence: 0.0"""
             print(f"Error parsing expense: {e}")
             return None
     
-    def parse_budget_from_text(self, text: str) -> Optional[BudgetParseResult]:
+    async def parse_budget_from_text(self, text: str) -> Optional[BudgetParseResult]:
         """Parse budget details from natural language using LLM"""
         
         system_prompt = """You are a budget parser. Extract budget details from natural language.
@@ -580,16 +702,14 @@ Respond ONLY in JSON format:
 If you cannot parse the budget, return confidence: 0.0"""
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-oss-120b",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Parse this budget request: {text}"}
-                ],
+            parsed_data = await self._cached_json_completion(
+                "budget",
+                "gpt-oss-120b",
+                system_prompt,
+                text,
+                f"Parse this budget request: {text}",
                 response_format={"type": "json_object"}
             )
-            
-            parsed_data = json.loads(response.choices[0].message.content)
             budget_result = BudgetParseResult(**parsed_data)
             
             if budget_result.confidence >= 0.5:
@@ -601,8 +721,8 @@ If you cannot parse the budget, return confidence: 0.0"""
             print(f"Error parsing budget: {e}")
             return None
     
-    def set_budget_goal(self, text: str) -> Dict[str, Any]:
-        budget_data = self.parse_budget_from_text(text)
+    async def set_budget_goal(self, text: str, budget_data: Optional[BudgetParseResult] = None) -> Dict[str, Any]:
+        budget_data = budget_data or await self.parse_budget_from_text(text)
         
         if not budget_data:
             return {
@@ -611,11 +731,11 @@ If you cannot parse the budget, return confidence: 0.0"""
             }
         
         try:
-            existing_budgets = self.notion_service.get_all_budgets()
+            existing_budgets = await self.notion_service.get_all_budgets()
             existing = next((b for b in existing_budgets if b['category'].lower() == budget_data.category.lower()), None)
             
             if existing:
-                updated = self.notion_service.update_budget(
+                updated = await self.notion_service.update_budget(
                     budget_id=existing['id'],
                     amount=budget_data.amount,
                     period=budget_data.period
@@ -627,7 +747,7 @@ If you cannot parse the budget, return confidence: 0.0"""
                     "action": "updated"
                 }
             else:
-                created = self.notion_service.create_budget(
+                created = await self.notion_service.create_budget(
                     category=budget_data.category,
                     amount=budget_data.amount,
                     period=budget_data.period
@@ -644,7 +764,29 @@ If you cannot parse the budget, return confidence: 0.0"""
                 "message": f"Failed to set budget: {str(e)}"
             }
     
-    def extract_receipt_data(self, base64_image: str) -> Optional[Dict[str, Any]]:
+    async def find_duplicate_expenses(self, expense_data: Dict[str, Any]) -> list:
+        """Existing expenses with the same date and amount whose merchant names overlap"""
+        date = expense_data.get('date')
+        amount = expense_data.get('amount')
+        merchant = (expense_data.get('merchant') or '').strip().lower()
+        # Without a merchant on both sides, same day and amount alone is too weak a signal
+        if not date or not isinstance(amount, (int, float)) or not merchant:
+            return []
+        try:
+            duplicates = []
+            async for expense in self.notion_service.query_expenses(start_date=date, end_date=date, amount_eq=amount):
+                existing = (expense.get('merchant') or '').strip().lower()
+                if existing and (merchant in existing or existing in merchant):
+                    duplicates.append(expense)
+            return duplicates
+        except Exception as e:
+            # Duplicate detection is advisory; never block a save on it
+            print(f"Error checking for duplicate expenses: {e}")
+            return []
+    
+    async def extract_receipt_data(self, base64_image: str, mime_type: str = "image/jpeg",
+                                   image_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """OCR a receipt; with image_hash (SHA-256 of the image bytes) a repeat upload is answered from the LLM cache"""
         system_prompt = """You are an OCR system specialized in reading receipts. Extract the following information:
 
 - merchant: The store/restaurant name
@@ -668,8 +810,17 @@ Respond ONLY in JSON format:
 
 If the image is not a receipt or you cannot read it, return confidence: 0.0"""
         
+        # The prompt falls back to today's date when the receipt's is unreadable, so the key includes it
+        today = datetime.now().strftime('%Y-%m-%d')
+        cache_key = llm_cache.key("gemma3-27b", system_prompt, image_hash, today) if image_hash else None
+        if cache_key:
+            cached = await llm_cache.get("receipt", cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            response = self.client.chat.completions.create(
+            response = await self._chat_completion(
+                "receipt",
                 model="gemma3-27b",
                 messages=[
                     {
@@ -681,12 +832,12 @@ If the image is not a receipt or you cannot read it, return confidence: 0.0"""
                         "content": [
                             {
                                 "type": "text",
-                                "text": f"Today is {datetime.now().strftime('%Y-%m-%d')}. Extract expense details from this receipt image:"
+                                "text": f"Today is {today}. Extract expense details from this receipt image:"
                             },
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": f"data:{mime_type};base64,{base64_image}"
                                 }
                             }
                         ]
@@ -699,6 +850,8 @@ If the image is not a receipt or you cannot read it, return confidence: 0.0"""
             parsed_data = json.loads(response.choices[0].message.content)
             
             if parsed_data.get('confidence', 0) >= 0.5:
+                if cache_key:
+                    await llm_cache.put("receipt", cache_key, "gemma3-27b", parsed_data)
                 return parsed_data
             
             return None
@@ -709,12 +862,13 @@ If the image is not a receipt or you cannot read it, return confidence: 0.0"""
             traceback.print_exc()
             return None
     
-    def _generate_general_response(self, message: str) -> str:
+    async def _generate_general_response(self, message: str) -> str:
         system_prompt = """You are a helpful financial assistant. Respond to the user's question or comment in a friendly, concise way. 
         Keep responses brief (1-2 sentences). If they're asking about features, mention that you can help track expenses, budgets, and provide financial insights."""
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self._chat_completion(
+                "general_response",
                 model="gpt-oss-120b",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -728,3 +882,38 @@ If the image is not a receipt or you cannot read it, return confidence: 0.0"""
         except Exception as e:
             print(f"Error generating response: {e}")
             return "I'm here to help with your finances! You can tell me about expenses, ask about your budget, or chat with me."
+    
+    async def _stream_general_response(self, message: str) -> AsyncIterator[str]:
+        system_prompt = """You are a helpful financial assistant. Respond to the user's question or comment in a friendly, concise way. 
+        Keep responses brief (1-2 sentences). If they're asking about features, mention that you can help track expenses, budgets, and provide financial insights."""
+        
+        streamed = False
+        stream = None
+        started = time.perf_counter()
+        try:
+            stream = await self._chat_completion(
+                "general_response_stream",
+                model="gpt-oss-120b",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": message}
+                ],
+                max_tokens=150,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            usage = None
+            async for chunk in stream:
+                # With include_usage the last chunk has no choices, only token counts
+                usage = chunk.usage or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    streamed = True
+                    yield chunk.choices[0].delta.content
+            self._record_llm_call("general_response_stream", "gpt-oss-120b", started, "ok", usage)
+        except Exception as e:
+            # A failure to open the stream was already recorded by _chat_completion
+            if stream is not None:
+                self._record_llm_call("general_response_stream", "gpt-oss-120b", started, "error")
+            print(f"Error streaming response: {e}")
+            if not streamed:
+                yield "I'm here to help with your finances! You can tell me about expenses, ask about your budget, or chat with me."
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from src.models.agent import AgentDecision, ChatResponse
+from src.repository.agent_repository import AgentRepository
+from src.repository.chat_repository import ChatRepository
+from src.service.agent_service import AgentService
+
+agent_repository = AgentRepository()
+
+
+def record_reply(user_id: str, user_message: str, response: ChatResponse) -> None:
+    ChatRepository.save_message(
+        user_id=user_id,
+        role="assistant",
+        content=response.message,
+        reasoning=response.reasoning,
+        metadata={
+            "action_taken": response.action_taken,
+            "state": response.state,
+            "data": response.data,
+        },
+    )
+
+    result = response.data
+    if response.run:
+        # Ties the log row to the run that produced it: run id, phase timings and LLM usage
+        result = {**(response.data or {}), "run": response.run}
+
+    decision = AgentDecision(
+        user_message=user_message,
+        agent_state=response.state,
+        llm_reasoning=response.reasoning,
+        action_taken=response.action_taken,
+        result=result,
+        plan_source=response.plan_source,
+        llm_calls_saved=response.llm_calls_saved,
+        latency_ms=response.latency_ms,
+        latency_saved_ms=response.latency_saved_ms,
+    )
+    agent_repository.log_decision(decision)
+
+
+class AgentChatJob:
+    """Job queue handler for "agent_chat": runs a chat message that was accepted with 202"""
+
+    def __init__(self, agent_service: AgentService):
+        self.agent_service = agent_service
+
+    async def run(self, payload: dict, attachment: Optional[bytes]) -> Dict[str, Any]:
+        response = await self.agent_service.process_message(payload["message"])
+        try:
+            await asyncio.to_thread(record_reply, payload["user_id"], payload["message"], response)
+        except Exception as e:
+            # The action already ran; a retry would repeat it just to fix up the history
+            print(f"Error recording chat job reply: {e}")
+        return response.model_dump(mode="json")
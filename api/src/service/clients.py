@@ -0,0 +1,107 @@
+import importlib.util
+import os
+from typing import Optional
+
+import httpx
+from openai import DefaultAsyncHttpxClient
+
+from src.service.agent_service import AgentService
+from src.service.chat_log import AgentChatJob
+from src.service.expense_import_service import ExpenseImportService
+from src.service.expense_sync_service import ExpenseSyncService
+from src.service.job_queue import JobQueue
+from src.service.notion_service import NotionService
+from src.service.receipt_batch_service import ReceiptBatchService
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30")),
+    )
+
+
+def _http2_available() -> bool:
+    # httpx only speaks HTTP/2 when the optional h2 package is installed
+    return importlib.util.find_spec("h2") is not None
+
+
+class Clients:
+    """Process-wide registry of long-lived API clients and the services built on them.
+
+    Services are built on first use and then shared, so requests reuse pooled keep-alive
+    connections and TLS sessions instead of paying client setup every time. Notion and
+    OpenAI get separate pools: notion_client rewrites its httpx client's base URL and
+    auth headers. The app lifespan closes the pools on shutdown.
+    """
+
+    _notion_http: Optional[httpx.AsyncClient] = None
+    _openai_http: Optional[httpx.AsyncClient] = None
+    _notion_service: Optional[NotionService] = None
+    _agent_service: Optional[AgentService] = None
+    _sync_service: Optional[ExpenseSyncService] = None
+    _import_service: Optional[ExpenseImportService] = None
+    _receipt_batch_service: Optional[ReceiptBatchService] = None
+    _job_queue: Optional[JobQueue] = None
+
+    @classmethod
+    def get_notion_service(cls) -> NotionService:
+        if cls._notion_service is None:
+            cls._notion_http = httpx.AsyncClient(limits=_pool_limits(), http2=_http2_available())
+            cls._notion_service = NotionService(http_client=cls._notion_http)
+        return cls._notion_service
+
+    @classmethod
+    def get_agent_service(cls) -> AgentService:
+        if cls._agent_service is None:
+            cls._openai_http = DefaultAsyncHttpxClient(
+                limits=_pool_limits(), http2=_http2_available()
+            )
+            cls._agent_service = AgentService(
+                notion_service=cls.get_notion_service(),
+                http_client=cls._openai_http,
+            )
+        return cls._agent_service
+
+    @classmethod
+    def get_sync_service(cls) -> ExpenseSyncService:
+        if cls._sync_service is None:
+            cls._sync_service = ExpenseSyncService(cls.get_notion_service())
+        return cls._sync_service
+
+    @classmethod
+    def get_import_service(cls) -> ExpenseImportService:
+        if cls._import_service is None:
+            cls._import_service = ExpenseImportService(cls.get_notion_service())
+        return cls._import_service
+
+    @classmethod
+    def get_receipt_batch_service(cls) -> ReceiptBatchService:
+        if cls._receipt_batch_service is None:
+            cls._receipt_batch_service = ReceiptBatchService(cls.get_agent_service())
+        return cls._receipt_batch_service
+
+    @classmethod
+    def get_job_queue(cls) -> JobQueue:
+        if cls._job_queue is None:
+            job_queue = JobQueue()
+            job_queue.register("receipt_ocr", cls.get_receipt_batch_service().run_job)
+            job_queue.register("agent_chat", AgentChatJob(cls.get_agent_service()).run)
+            cls._job_queue = job_queue
+        return cls._job_queue
+
+    @classmethod
+    async def close(cls) -> None:
+        if cls._notion_http is not None:
+            await cls._notion_http.aclose()
+        if cls._openai_http is not None:
+            await cls._openai_http.aclose()
+        cls._notion_http = None
+        cls._openai_http = None
+        cls._notion_service = None
+        cls._agent_service = None
+        cls._sync_service = None
+        cls._import_service = None
+        cls._receipt_batch_service = None
+        cls._job_queue = None
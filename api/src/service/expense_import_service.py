@@ -0,0 +1,289 @@
+import asyncio
+import codecs
+import csv
+import os
+import re
+import uuid
+from datetime import UTC, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from src.models.expense import ExpenseCreate
+from src.service.notion_service import NotionService
+
+IMPORT_CHUNK_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 500
+MAX_TRACKED_JOBS = 100
+DEFAULT_CATEGORY = "Other"
+SPENDING_SIGNS = ("negative", "positive")
+
+CSV_COLUMN_ALIASES = {
+    "amount": ("amount", "value", "debit"),
+    "category": ("category",),
+    "merchant": ("merchant", "payee", "name", "description"),
+    "date": ("date", "transaction date", "posted date", "posting date"),
+    "description": ("description", "memo", "notes", "note"),
+}
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+
+def iter_text_lines(path: str, encoding: str = "utf-8-sig") -> Iterator[str]:
+    """Yield decoded lines from a file, reading fixed-size chunks so large exports stay out of memory"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(IMPORT_CHUNK_SIZE)
+            pending += decoder.decode(chunk, final=not chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line + "\n"
+            if not chunk:
+                break
+    if pending:
+        yield pending
+
+
+def _parse_amount(value: Optional[str]) -> Any:
+    """Parse a bank-formatted amount as a positive expense; unparseable values are left for validation"""
+    if value is None:
+        return None
+    cleaned = value.strip().replace("$", "").replace(",", "")
+    if not cleaned:
+        return None
+    if cleaned.startswith("(") and cleaned.endswith(")"):
+        cleaned = "-" + cleaned[1:-1]
+    try:
+        return float(cleaned)
+    except ValueError:
+        return value
+
+
+def _parse_date(value: str) -> str:
+    value = value.strip()
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d.%m.%Y", "%Y%m%d"):
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return value
+
+
+def _resolve_columns(header: List[str]) -> Dict[str, str]:
+    normalized = {name.strip().lower(): name for name in header}
+    columns = {}
+    for field, aliases in CSV_COLUMN_ALIASES.items():
+        for alias in aliases:
+            # A column already claimed by another field (e.g. "description") isn't reused
+            if alias in normalized and normalized[alias] not in columns.values():
+                columns[field] = normalized[alias]
+                break
+    return columns
+
+
+def parse_csv_rows(
+    lines: Iterator[str], spending_sign: str = "negative"
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (row number, raw expense fields) from a CSV export with a header row.
+
+    spending_sign says how the export books spending: "negative" (most bank exports) or
+    "positive" (hand-kept ledgers). Rows of the other sign are credits and are skipped,
+    like OFX credits. A "debit" column only ever holds spending, so it counts as positive.
+    """
+    if spending_sign not in SPENDING_SIGNS:
+        raise ValueError(f"spending_sign must be one of {', '.join(SPENDING_SIGNS)}")
+    reader = csv.DictReader(lines)
+    columns = _resolve_columns(reader.fieldnames or [])
+    if "amount" not in columns:
+        raise ValueError("CSV import needs an amount column")
+    if columns["amount"].strip().lower() == "debit":
+        spending_sign = "positive"
+
+    for row_number, row in enumerate(reader, start=2):
+        amount = _parse_amount(row.get(columns["amount"]))
+        if isinstance(amount, float) and not (
+            amount < 0 if spending_sign == "negative" else amount > 0
+        ):
+            continue
+        yield row_number, {
+            "amount": abs(amount) if isinstance(amount, float) else amount,
+            "category": (row.get(columns.get("category", "")) or "").strip() or DEFAULT_CATEGORY,
+            "merchant": (row.get(columns.get("merchant", "")) or "").strip(),
+            "date": _parse_date(row.get(columns.get("date", "")) or ""),
+            "description": (row.get(columns.get("description", "")) or "").strip(),
+        }
+
+
+def parse_ofx_rows(lines: Iterator[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (transaction number, raw expense fields) for debit STMTTRN blocks of an OFX/QFX export"""
+    transaction = None
+    number = 0
+    for line in lines:
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    transaction = {}
+                    continue
+                if transaction is not None:
+                    number += 1
+                    amount = _parse_amount(transaction.get("TRNAMT"))
+                    # Credits (deposits, refunds) are not expenses
+                    if not isinstance(amount, float) or amount < 0:
+                        yield number, {
+                            "amount": abs(amount) if isinstance(amount, float) else amount,
+                            "category": DEFAULT_CATEGORY,
+                            "merchant": transaction.get("NAME", "").strip(),
+                            "date": _parse_date(transaction.get("DTPOSTED", "")[:8]),
+                            "description": transaction.get("MEMO", "").strip(),
+                        }
+                transaction = None
+            elif transaction is not None and not closing:
+                transaction[tag] = value.strip()
+
+
+def detect_format(filename: Optional[str], first_line: str) -> str:
+    name = (filename or "").lower()
+    if (
+        name.endswith((".ofx", ".qfx"))
+        or "OFXHEADER" in first_line
+        or "<OFX>" in first_line.upper()
+    ):
+        return "ofx"
+    return "csv"
+
+
+class ExpenseImportService:
+    """Runs bulk expense imports as background jobs.
+
+    Rows are parsed lazily from the uploaded file and handed to a fixed pool of workers
+    through a bounded queue, so memory stays flat regardless of file size. Every page
+    create goes through the shared Notion scheduler, and the database schema is served
+    from schema_cache, so steady state is one Notion call per row.
+
+    Job state lives in this process's memory: the upload is spooled to local disk and the
+    job runs where it was started, so the status endpoint only sees jobs started by the
+    same process. Run the API as a single worker process (as kube/backend-dep.yml does);
+    behind several workers, polls that land on another one get a 404.
+    """
+
+    def __init__(self, notion_service: NotionService):
+        self.notion_service = notion_service
+        self.concurrency = int(os.getenv("EXPENSE_IMPORT_CONCURRENCY", "4"))
+        self.spending_sign = os.getenv("EXPENSE_IMPORT_CSV_SPENDING_SIGN", "negative")
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start_import(
+        self, path: str, filename: Optional[str], spending_sign: Optional[str] = None
+    ) -> Dict[str, Any]:
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "filename": filename,
+            "format": None,
+            "spending_sign": spending_sign or self.spending_sign,
+            "status": "queued",
+            "processed": 0,
+            "created": 0,
+            "failed": 0,
+            "errors": [],
+            "started_at": datetime.now(UTC).isoformat(),
+            "finished_at": None,
+        }
+        self.jobs[job_id] = job
+        self._prune_jobs()
+        task = asyncio.create_task(self._run(job, path))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return job
+
+    def _prune_jobs(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job["finished_at"] is not None]
+        for job_id in finished[: max(0, len(self.jobs) - MAX_TRACKED_JOBS)]:
+            del self.jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    async def wait(self, job_id: str) -> Optional[Dict[str, Any]]:
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await task
+        return self.jobs.get(job_id)
+
+    async def _run(self, job: Dict[str, Any], path: str) -> None:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        workers = [asyncio.create_task(self._worker(job, queue)) for _ in range(self.concurrency)]
+        job["status"] = "running"
+        lines = iter_text_lines(path)
+        try:
+            first_line = next(lines, "")
+            job["format"] = detect_format(job["filename"], first_line)
+            if job["format"] == "ofx":
+                rows = parse_ofx_rows(_prepend(first_line, lines))
+            else:
+                rows = parse_csv_rows(_prepend(first_line, lines), job["spending_sign"])
+            while True:
+                # File reads and parsing are blocking; keep them off the event loop
+                row = await asyncio.to_thread(next, rows, None)
+                if row is None:
+                    break
+                await queue.put(row)
+
+            await queue.join()
+            job["status"] = "completed"
+        except Exception as e:
+            print(f"Error importing expenses from {job['filename']}: {e}")
+            job["status"] = "failed"
+            self._record_error(job, None, str(e))
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            lines.close()
+            os.unlink(path)
+            job["finished_at"] = datetime.now(UTC).isoformat()
+
+    async def _worker(self, job: Dict[str, Any], queue: asyncio.Queue) -> None:
+        while True:
+            row_number, fields = await queue.get()
+            try:
+                expense = ExpenseCreate(**fields)
+                await self.notion_service.create_expense(
+                    amount=expense.amount,
+                    category=expense.category,
+                    merchant=expense.merchant,
+                    date=expense.date,
+                    description=expense.description or "",
+                )
+                job["created"] += 1
+            except ValidationError as e:
+                job["failed"] += 1
+                self._record_error(
+                    job,
+                    row_number,
+                    "; ".join(
+                        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+                        for error in e.errors()
+                    ),
+                )
+            except Exception as e:
+                job["failed"] += 1
+                self._record_error(job, row_number, str(e))
+            finally:
+                job["processed"] += 1
+                queue.task_done()
+
+    def _record_error(self, job: Dict[str, Any], row: Optional[int], error: str) -> None:
+        # Failed counts stay exact; only the detailed list is capped
+        if len(job["errors"]) < MAX_REPORTED_ERRORS:
+            job["errors"].append({"row": row, "error": error})
+
+
+def _prepend(first: str, rest: Iterator[str]) -> Iterator[str]:
+    if first:
+        yield first
+    yield from rest
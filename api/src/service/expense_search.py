@@ -0,0 +1,267 @@
+import bisect
+import heapq
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Share of a query's trigrams an expense must contain to count as a fuzzy match
+FUZZY_MIN_SCORE = 0.6
+
+# Joins an expense's fields into one haystack; never part of a query, so no match spans two fields
+FIELD_SEPARATOR = "\x00"
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _haystack(expense: dict) -> str:
+    # Merchant first: merchant-only searches look at the first field. The amount is indexed
+    # as str() renders it, like the scan search_transactions used to do
+    return FIELD_SEPARATOR.join(
+        (
+            (expense.get("merchant") or "").lower(),
+            (expense.get("category") or "").lower(),
+            (expense.get("description") or "").lower(),
+            str(expense.get("amount", "")),
+        )
+    )
+
+
+def _haystack_trigrams(haystack: str) -> Set[str]:
+    return set().union(*(trigrams(field) for field in haystack.split(FIELD_SEPARATOR)))
+
+
+class _SortedColumn:
+    """Values kept sorted next to their expense ids, so a range is two bisects"""
+
+    def __init__(self, pairs: Iterable[tuple] = ()):
+        ordered = sorted(pairs)
+        self.keys: list = [key for key, _ in ordered]
+        self.ids: List[str] = [expense_id for _, expense_id in ordered]
+
+    def add(self, key, expense_id: str) -> None:
+        position = bisect.bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.ids.insert(position, expense_id)
+
+    def remove(self, key, expense_id: str) -> None:
+        start = bisect.bisect_left(self.keys, key)
+        end = bisect.bisect_right(self.keys, key)
+        position = self.ids.index(expense_id, start, end)
+        del self.keys[position]
+        del self.ids[position]
+
+    def between(self, low=None, high=None) -> Set[str]:
+        start = 0 if low is None else bisect.bisect_left(self.keys, low)
+        end = len(self.keys) if high is None else bisect.bisect_right(self.keys, high)
+        return set(self.ids[start:end])
+
+
+class ExpenseSearchIndex:
+    """In-memory search index over parsed expenses.
+
+    Merchant, category, description and the amount text are split into trigrams with
+    postings to expense ids. A substring query intersects the postings of its trigrams
+    and only verifies the survivors; a fuzzy query ranks expenses by the share of its
+    trigrams they contain. Amounts and dates live in sorted arrays for range filters.
+    add/remove keep everything up to date one expense at a time.
+    """
+
+    def __init__(self):
+        self._expenses: Dict[str, dict] = {}
+        self._haystacks: Dict[str, str] = {}
+        # (date, id) per expense: the newest-first result order
+        self._order: Dict[str, Tuple[str, str]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._amounts = _SortedColumn()
+        self._dates = _SortedColumn()
+
+    @classmethod
+    def build(cls, expenses: Iterable[dict]) -> "ExpenseSearchIndex":
+        index = cls()
+        for expense in expenses:
+            index._remove_text(expense["id"])
+            index._add_text(expense)
+        # Sorting once is far cheaper than inserting into the sorted columns row by row
+        index._amounts = _SortedColumn(
+            (expense.get("amount") or 0, expense_id)
+            for expense_id, expense in index._expenses.items()
+        )
+        index._dates = _SortedColumn(
+            (date, expense_id) for date, expense_id in index._order.values()
+        )
+        return index
+
+    def __len__(self) -> int:
+        return len(self._expenses)
+
+    def add(self, expense: dict) -> None:
+        self.remove(expense["id"])
+        self._add_text(expense)
+        self._amounts.add(expense.get("amount") or 0, expense["id"])
+        self._dates.add(expense.get("date") or "", expense["id"])
+
+    def remove(self, expense_id: str) -> None:
+        expense = self._remove_text(expense_id)
+        if expense is not None:
+            self._amounts.remove(expense.get("amount") or 0, expense_id)
+            self._dates.remove(expense.get("date") or "", expense_id)
+
+    def _add_text(self, expense: dict) -> None:
+        expense_id = expense["id"]
+        haystack = _haystack(expense)
+        self._expenses[expense_id] = dict(expense)
+        self._haystacks[expense_id] = haystack
+        self._order[expense_id] = (expense.get("date") or "", expense_id)
+        for gram in _haystack_trigrams(haystack):
+            self._postings[gram].add(expense_id)
+
+    def _remove_text(self, expense_id: str) -> Optional[dict]:
+        expense = self._expenses.pop(expense_id, None)
+        if expense is None:
+            return None
+        del self._order[expense_id]
+        for gram in _haystack_trigrams(self._haystacks.pop(expense_id)):
+            postings = self._postings[gram]
+            postings.discard(expense_id)
+            if not postings:
+                del self._postings[gram]
+        return expense
+
+    def search(
+        self,
+        query: str = "",
+        merchant: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        fuzzy: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """Expenses matching every given filter, newest first (best fuzzy score first with fuzzy)"""
+        candidates: Optional[Set[str]] = None
+        if min_amount is not None or max_amount is not None:
+            candidates = self._amounts.between(min_amount, max_amount)
+        if start_date or end_date:
+            in_range = self._dates.between(start_date or None, end_date or None)
+            candidates = in_range if candidates is None else candidates & in_range
+
+        if merchant:
+            candidates = self._substring(merchant.lower(), candidates, merchant_only=True)
+
+        query = query.lower().replace(FIELD_SEPARATOR, "")
+        if query and fuzzy:
+            scores = self._fuzzy(query, candidates)
+            order = self._order
+            return self._top(
+                scores, lambda expense_id: (scores[expense_id], order[expense_id]), limit
+            )
+        if query:
+            candidates = self._substring(query, candidates)
+
+        return self._top(
+            self._expenses if candidates is None else candidates, self._order.__getitem__, limit
+        )
+
+    def _top(self, ids: Iterable[str], key, limit: Optional[int]) -> List[dict]:
+        if limit is None:
+            ranked = sorted(ids, key=key, reverse=True)
+        else:
+            ranked = heapq.nlargest(limit, ids, key=key)
+        return [dict(self._expenses[expense_id]) for expense_id in ranked]
+
+    def _substring(
+        self, text: str, candidates: Optional[Set[str]], merchant_only: bool = False
+    ) -> Set[str]:
+        grams = trigrams(text)
+        if grams:
+            # Rarest trigram first keeps the intersection small from the start
+            for gram in sorted(grams, key=lambda gram: len(self._postings.get(gram, ()))):
+                postings = self._postings.get(gram, set())
+                candidates = postings if candidates is None else candidates & postings
+                if not candidates:
+                    return set()
+        # Trigrams can come from different fields; check the text really occurs in one
+        pool = self._expenses.keys() if candidates is None else candidates
+        haystacks = self._haystacks
+        if merchant_only:
+            return {
+                expense_id
+                for expense_id in pool
+                if text in haystacks[expense_id].split(FIELD_SEPARATOR, 1)[0]
+            }
+        return {expense_id for expense_id in pool if text in haystacks[expense_id]}
+
+    def _fuzzy(self, text: str, candidates: Optional[Set[str]]) -> Dict[str, float]:
+        grams = trigrams(text)
+        if not grams:
+            return {expense_id: 1.0 for expense_id in self._substring(text, candidates)}
+        shared = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram, set())
+            shared.update(postings if candidates is None else postings & candidates)
+        return {
+            expense_id: count / len(grams)
+            for expense_id, count in shared.items()
+            if count / len(grams) >= FUZZY_MIN_SCORE
+        }
+
+
+class LiveExpenseIndex:
+    """The current ExpenseSearchIndex, replaced wholesale when it goes stale.
+
+    Writes apply to the current index straight away and are also logged, so a
+    replacement built from a ledger snapshot can replay the writes that the snapshot
+    may have missed before it is swapped in.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.index: Optional[ExpenseSearchIndex] = None
+        self.built_at = 0.0
+        self._writes: deque = deque(maxlen=10000)
+        self._lock = threading.Lock()
+
+    def fresh(self) -> bool:
+        return self.index is not None and time.monotonic() - self.built_at < self.ttl
+
+    def replace(self, index: ExpenseSearchIndex, snapshot_started: float) -> None:
+        with self._lock:
+            for written_at, expense_id, expense in self._writes:
+                if written_at >= snapshot_started:
+                    if expense is None:
+                        index.remove(expense_id)
+                    else:
+                        index.add(expense)
+            self.index = index
+            self.built_at = snapshot_started
+
+    def upsert(self, expense: dict) -> None:
+        with self._lock:
+            self._writes.append((time.monotonic(), expense["id"], dict(expense)))
+            if self.index is not None:
+                self.index.add(expense)
+
+    def remove(self, expense_id: str) -> None:
+        with self._lock:
+            self._writes.append((time.monotonic(), expense_id, None))
+            if self.index is not None:
+                self.index.remove(expense_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.index = None
+            self.built_at = 0.0
+            self._writes.clear()
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.index is not None,
+            "fresh": self.fresh(),
+            "size": len(self.index) if self.index is not None else 0,
+            "age_seconds": time.monotonic() - self.built_at if self.index is not None else None,
+            "ttl_seconds": self.ttl,
+        }
@@ -0,0 +1,125 @@
+import asyncio
+import os
+from datetime import UTC, datetime
+from typing import Any, Dict, Optional
+
+from src.repository.expense_mirror_repository import ExpenseMirrorRepository
+from src.service.notion_service import NotionService
+
+SYNC_BATCH_SIZE = 200
+
+
+class ExpenseSyncService:
+    """Keeps the expenses_mirror table in step with the Notion expenses database.
+
+    Incremental runs only pull pages whose last_edited_time is at or after the stored
+    watermark. Notion's query endpoint never returns archived pages, so a periodic full
+    sync tombstones mirror rows that are no longer present upstream.
+    """
+
+    def __init__(self, notion_service: NotionService):
+        self.notion_service = notion_service
+        self.database_id = notion_service.expenses_db_id
+        self.interval = float(os.getenv("EXPENSES_SYNC_INTERVAL_SECONDS", "60"))
+        self.full_sync_interval = float(os.getenv("EXPENSES_FULL_SYNC_INTERVAL_SECONDS", "3600"))
+
+    async def sync_once(self) -> Dict[str, Any]:
+        state = (
+            await asyncio.to_thread(ExpenseMirrorRepository.get_sync_state, self.database_id) or {}
+        )
+        watermark = state.get("watermark")
+        last_full_sync_at = state.get("last_full_sync_at")
+
+        if watermark is None or last_full_sync_at is None:
+            return await self.full_sync()
+        if (datetime.now(UTC) - last_full_sync_at).total_seconds() >= self.full_sync_interval:
+            return await self.full_sync()
+        return await self.incremental_sync(watermark)
+
+    async def incremental_sync(self, watermark: datetime) -> Dict[str, Any]:
+        # Notion rounds last_edited_time to the minute, so "on or after" re-reads the
+        # boundary minute; upserts are idempotent so that is harmless
+        pages = self.notion_service.iter_expense_pages(
+            filter={
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": watermark.isoformat()},
+            },
+            sorts=[{"timestamp": "last_edited_time", "direction": "ascending"}],
+        )
+        synced, new_watermark, _ = await self._upsert_pages(pages, watermark)
+        await asyncio.to_thread(
+            ExpenseMirrorRepository.save_sync_state, self.database_id, new_watermark
+        )
+        return {"mode": "incremental", "synced": synced, "archived": 0, "watermark": new_watermark}
+
+    async def full_sync(self) -> Dict[str, Any]:
+        # Database clock, so the synced_at comparison in archive_missing is skew-free
+        started_at = await asyncio.to_thread(ExpenseMirrorRepository.database_now)
+        synced, newest, seen_ids = await self._upsert_pages(
+            self.notion_service.iter_expense_pages(), None
+        )
+        archived = await asyncio.to_thread(
+            ExpenseMirrorRepository.archive_missing, seen_ids, started_at
+        )
+        watermark = newest or started_at
+        await asyncio.to_thread(
+            ExpenseMirrorRepository.save_sync_state, self.database_id, watermark, full_sync=True
+        )
+        return {"mode": "full", "synced": synced, "archived": archived, "watermark": watermark}
+
+    async def _upsert_pages(self, pages, watermark: Optional[datetime]):
+        synced = 0
+        seen_ids = []
+        batch = []
+        plan = await self.notion_service.get_expense_parse_plan()
+        async for page in pages:
+            record = self.notion_service.to_mirror_record(page, plan)
+            batch.append(record)
+            if not record["archived"]:
+                seen_ids.append(record["id"])
+            if watermark is None or record["last_edited_time"] > watermark:
+                watermark = record["last_edited_time"]
+            if len(batch) >= SYNC_BATCH_SIZE:
+                synced += await asyncio.to_thread(ExpenseMirrorRepository.upsert_expenses, batch)
+                batch = []
+        synced += await asyncio.to_thread(ExpenseMirrorRepository.upsert_expenses, batch)
+        return synced, watermark, seen_ids
+
+    async def get_status(self) -> Dict[str, Any]:
+        state = (
+            await asyncio.to_thread(ExpenseMirrorRepository.get_sync_state, self.database_id) or {}
+        )
+        last_synced_at = state.get("last_synced_at")
+        lag_seconds = None
+        if last_synced_at:
+            lag_seconds = (datetime.now(UTC) - last_synced_at).total_seconds()
+
+        return {
+            "enabled": self.notion_service.mirror_enabled,
+            "ready": state.get("last_full_sync_at") is not None,
+            "watermark": state.get("watermark").isoformat() if state.get("watermark") else None,
+            "last_synced_at": last_synced_at.isoformat() if last_synced_at else None,
+            "last_full_sync_at": (
+                state["last_full_sync_at"].isoformat() if state.get("last_full_sync_at") else None
+            ),
+            "lag_seconds": lag_seconds,
+            "last_error": state.get("last_error"),
+        }
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                result = await self.sync_once()
+                if result["synced"] or result["archived"]:
+                    print(
+                        f"Expenses mirror {result['mode']} sync: {result['synced']} upserted, {result['archived']} archived"
+                    )
+            except Exception as e:
+                print(f"Error syncing expenses mirror: {e}")
+                try:
+                    await asyncio.to_thread(
+                        ExpenseMirrorRepository.record_sync_error, self.database_id, str(e)
+                    )
+                except Exception:
+                    pass
+            await asyncio.sleep(self.interval)
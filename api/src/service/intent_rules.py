@@ -0,0 +1,218 @@
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from pydantic import ValidationError
+
+from src.models.agent import ExpenseParseResult
+from src.models.budget import BudgetParseResult
+
+# Deterministic classifier for messages whose intent and fields are unambiguous. Anything
+# it isn't sure about returns None and goes to the LLM planner as before.
+
+AMOUNT = r"\$?\s?(?P<amount>\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)"
+
+EXPENSE_PATTERNS = [
+    # "spent $12.50 at Chipotle", "paid 40 for gas at Shell yesterday"
+    re.compile(
+        rf"^(?:i\s+)?(?:spent|paid|bought|dropped)\s+{AMOUNT}(?:\s+(?:on|for)\s+(?P<item>[\w' &-]+?))?\s+(?:at|from)\s+(?P<merchant>[\w' &.-]+?)(?P<rest>\s+(?:today|yesterday|on\s+\d{{4}}-\d{{2}}-\d{{2}}))?[.!]?$",
+        re.I,
+    ),
+    # "$5 coffee at starbucks", "12.50 at Chipotle"
+    re.compile(
+        rf"^{AMOUNT}\s+(?:(?:on|for)\s+)?(?:(?P<item>[\w' &-]+?)\s+)?(?:at|from)\s+(?P<merchant>[\w' &.-]+?)(?P<rest>\s+(?:today|yesterday|on\s+\d{{4}}-\d{{2}}-\d{{2}}))?[.!]?$",
+        re.I,
+    ),
+]
+
+# A merchant or item holding an amount, currency or a joining word means the message is more
+# than one clean expense: "12 at Chipotle and 8 at Starbucks", "at gas station for 2 hours"
+NOT_ONE_EXPENSE = re.compile(r"[\d$€£]|\b(?:and|or|for|with|plus|then|but|on|at|from)\b", re.I)
+
+BUDGET_PATTERN = re.compile(
+    rf"^(?:please\s+)?(?:set|change|update|make)\s+(?:my\s+|the\s+)?(?P<category>[a-z][\w &-]*?)\s+budget\s+(?:to|at|=)\s+{AMOUNT}"
+    r"(?:\s*(?:(?:per|a|an|each|every|this)\s+)?(?P<period>week|month|year|weekly|monthly|yearly))?[.!]?$",
+    re.I,
+)
+
+# Time phrases that follow "at"/"from" but are not merchants: "the $20 from yesterday", "at Target last week"
+TEMPORAL = (
+    r"(?:yesterday|today|tonight|(?:last|this)\s+(?:week|month|year|night|morning|weekend)"
+    r"|(?:(?:last|this)\s+)?(?:mon|tues|wednes|thurs|fri|satur|sun)day)\b"
+)
+TEMPORAL_PHRASE = re.compile(rf"\b{TEMPORAL}", re.I)
+
+DELETE_PATTERN = re.compile(r"^(?:please\s+)?(?:delete|remove)\s+(?P<target>.+?)[.!]?$", re.I)
+DELETE_AMOUNT = re.compile(r"\$(?P<amount>\d+(?:\.\d{1,2})?)")
+DELETE_MERCHANT = re.compile(
+    rf"\b(?:at|from)\s+(?!{TEMPORAL})(?P<merchant>[\w' &.-]+?)(?=\s+on\s|\s+{TEMPORAL}|\s*$)", re.I
+)
+DELETE_DATE = re.compile(r"\b(?P<date>\d{4}-\d{2}-\d{2})\b")
+DELETE_SUBJECT = re.compile(r"\b(?:expense|transaction|purchase|charge|payment)s?\b", re.I)
+# Things a user might delete that aren't transactions; these always go to the LLM
+NON_EXPENSE_SUBJECT = re.compile(
+    r"\b(?:budget|categor(?:y|ies)|account|profile|goal|limit|alert|reminder|chat|conversation|history)s?\b",
+    re.I,
+)
+
+CATEGORY_KEYWORDS = {
+    "Dining": (
+        "coffee",
+        "lunch",
+        "dinner",
+        "breakfast",
+        "starbucks",
+        "chipotle",
+        "mcdonald",
+        "restaurant",
+        "pizza",
+        "cafe",
+        "burger",
+        "taco",
+    ),
+    "Groceries": ("grocer", "whole foods", "trader joe", "safeway", "kroger", "aldi", "costco"),
+    "Transportation": (
+        "gas",
+        "uber",
+        "lyft",
+        "shell",
+        "chevron",
+        "parking",
+        "taxi",
+        "bus",
+        "train",
+    ),
+    "Entertainment": ("movie", "netflix", "spotify", "concert", "cinema", "game"),
+    "Shopping": ("amazon", "target", "walmart", "clothes", "shoes"),
+    "Bills": ("rent", "electric", "internet", "phone bill", "utilities"),
+    "Healthcare": ("pharmacy", "cvs", "walgreens", "doctor", "dentist"),
+}
+
+PERIODS = {"week": "weekly", "month": "monthly", "year": "yearly"}
+
+
+def _amount(value: str) -> float:
+    return float(value.replace(",", ""))
+
+
+def _category_for(*texts: Optional[str]) -> Optional[str]:
+    haystack = " ".join(text.lower() for text in texts if text)
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if any(keyword in haystack for keyword in keywords):
+            return category
+    return None
+
+
+def _date_for(rest: Optional[str], today: datetime) -> Optional[str]:
+    """The expense date for a trailing "yesterday"/"on YYYY-MM-DD", or None if it isn't a real date"""
+    rest = (rest or "").strip().lower()
+    if rest == "yesterday":
+        return (today - timedelta(days=1)).strftime("%Y-%m-%d")
+    if rest.startswith("on "):
+        try:
+            return datetime.strptime(rest[3:].strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            return None
+    return today.strftime("%Y-%m-%d")
+
+
+def _classify_expense(message: str, today: datetime) -> Optional[Dict[str, Any]]:
+    for pattern in EXPENSE_PATTERNS:
+        match = pattern.match(message)
+        if not match:
+            continue
+        merchant = match.group("merchant").strip()
+        item = match.group("item")
+        if TEMPORAL_PHRASE.search(merchant):
+            # "at Shell last week" leaves the date to the LLM
+            return None
+        if NOT_ONE_EXPENSE.search(merchant) or (item and NOT_ONE_EXPENSE.search(item)):
+            return None
+        date = _date_for(match.group("rest"), today)
+        if date is None:
+            return None
+        plan = {
+            "intent": "ADD_EXPENSE",
+            "reasoning": "Matched an amount-and-merchant expense pattern",
+            "confidence": 0.95,
+        }
+        category = _category_for(item, merchant)
+        # Without a confident category the LLM still parses the payload; only planning is skipped
+        if category:
+            try:
+                plan["expense"] = ExpenseParseResult(
+                    amount=_amount(match.group("amount")),
+                    category=category,
+                    merchant=merchant.title() if merchant.islower() else merchant,
+                    date=date,
+                    description=(item or "").strip(),
+                    confidence=0.95,
+                )
+            except ValidationError:
+                return None
+        return plan
+    return None
+
+
+def _classify_budget(message: str) -> Optional[Dict[str, Any]]:
+    match = BUDGET_PATTERN.match(message)
+    if not match:
+        return None
+    period = (match.group("period") or "month").lower()
+    try:
+        budget = BudgetParseResult(
+            category=match.group("category").strip().title(),
+            amount=_amount(match.group("amount")),
+            period=PERIODS.get(period, period),
+            confidence=0.95,
+        )
+    except ValidationError:
+        return None
+    return {
+        "intent": "SET_BUDGET",
+        "reasoning": "Matched a 'set <category> budget to $X' pattern",
+        "confidence": 0.95,
+        "budget": budget,
+    }
+
+
+def _classify_delete(message: str) -> Optional[Dict[str, Any]]:
+    match = DELETE_PATTERN.match(message)
+    if not match:
+        return None
+    target = match.group("target")
+    if NON_EXPENSE_SUBJECT.search(target):
+        # "remove my $400 dining budget" has an amount but isn't a transaction
+        return None
+    plan = {
+        "intent": "DELETE_EXPENSE",
+        "reasoning": "Message starts with delete/remove",
+        "confidence": 0.9,
+    }
+
+    details: Dict[str, Any] = {}
+    amount = DELETE_AMOUNT.search(target)
+    merchant = DELETE_MERCHANT.search(target)
+    date = DELETE_DATE.search(target)
+    if amount:
+        details["amount"] = float(amount.group("amount"))
+    if merchant:
+        details["merchant"] = merchant.group("merchant").strip()
+    if date:
+        details["date"] = date.group("date")
+    if details:
+        plan["deletion"] = details
+    elif not DELETE_SUBJECT.search(target):
+        # "delete my account" and the like aren't obviously about a transaction
+        return None
+    # Free-form targets ("the mexican store expense") still go through LLM extraction
+    return plan
+
+
+def classify_message(message: str, today: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """Return a plan (and, when possible, its parsed payload) for high-confidence messages, else None"""
+    message = " ".join(message.strip().split())
+    today = today or datetime.now()
+    return (
+        _classify_budget(message) or _classify_delete(message) or _classify_expense(message, today)
+    )
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from src.repository.job_repository import JobRepository
+from src.utils.metrics import registry
+
+JobHandler = Callable[[dict, Optional[bytes]], Awaitable[dict]]
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+job_run_seconds = registry.histogram(
+    "background_job_duration_seconds",
+    "Wall time of background job attempts",
+    ["kind", "outcome"],
+)
+
+
+def _serialize(job: dict) -> Dict[str, Any]:
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in job.items()
+    }
+
+
+class JobQueue:
+    """Durable job queue on the background_jobs table.
+
+    Workers lease one job at a time with FOR UPDATE SKIP LOCKED and keep the lease alive
+    while the handler runs. A worker that dies stops renewing, so once the visibility
+    timeout lapses another worker picks the job up again. Failed attempts are retried with
+    exponential backoff up to max_attempts. Workers run inside the API process and/or as
+    separate `python -m src.worker` replicas; they only coordinate through Postgres.
+    """
+
+    def __init__(self):
+        self.concurrency = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))
+        self.poll_interval = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+        self.visibility_timeout = float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "120"))
+        self.max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self.backoff_base = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "5"))
+        self.backoff_max = float(os.getenv("JOB_RETRY_BACKOFF_MAX_SECONDS", "300"))
+        self.retention = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+        self.handlers: Dict[str, JobHandler] = {}
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self.handlers[kind] = handler
+
+    async def enqueue(
+        self, kind: str, payload: dict, attachment: Optional[bytes] = None
+    ) -> Dict[str, Any]:
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        job = await asyncio.to_thread(
+            JobRepository.enqueue, str(uuid.uuid4()), kind, payload, attachment, self.max_attempts
+        )
+        return _serialize(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+        job = await asyncio.to_thread(JobRepository.get, job_id)
+        return _serialize(job) if job else None
+
+    async def watch(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job each time its status or attempt count changes, ending once it's finished"""
+        last_seen = None
+        while True:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            if (job["status"], job["attempts"]) != last_seen:
+                last_seen = (job["status"], job["attempts"])
+                yield job
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def backoff(self, attempts: int) -> float:
+        # Full jitter keeps a burst of failures from retrying in lockstep
+        return random.uniform(0.5, 1.0) * min(
+            self.backoff_max, self.backoff_base * 2 ** (attempts - 1)
+        )
+
+    async def run_forever(self) -> None:
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        workers = [
+            asyncio.create_task(self._worker(f"{prefix}-{n}")) for n in range(self.concurrency)
+        ]
+        workers.append(asyncio.create_task(self._prune_forever()))
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def run_once(self, worker_id: str) -> bool:
+        """Claim and run one job; False when nothing was due"""
+        job = await asyncio.to_thread(
+            JobRepository.claim, worker_id, list(self.handlers), self.visibility_timeout
+        )
+        if job is None:
+            return False
+        await self._execute(job, worker_id)
+        return True
+
+    async def _worker(self, worker_id: str) -> None:
+        while True:
+            try:
+                if await self.run_once(worker_id):
+                    continue
+            except Exception as e:
+                print(f"Job worker {worker_id} error: {e}")
+            # Jittered so idle replicas don't all poll at the same instant
+            await asyncio.sleep(self.poll_interval * random.uniform(0.5, 1.5))
+
+    async def _execute(self, job: dict, worker_id: str) -> None:
+        job_id, kind, attempts = job["id"], job["kind"], job["attempts"]
+        if attempts > job["max_attempts"]:
+            # Workers kept dying mid-job (the lease expired each time); don't let it loop forever
+            await asyncio.to_thread(
+                JobRepository.fail, job_id, worker_id, "Job lease expired too many times"
+            )
+            return
+
+        heartbeat = asyncio.create_task(self._keep_leased(job_id, worker_id))
+        started = time.perf_counter()
+        try:
+            result = await self.handlers[kind](job["payload"], job["attachment"])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Job {job_id} ({kind}) attempt {attempts} failed: {error}")
+            if attempts < job["max_attempts"]:
+                job_run_seconds.observe(time.perf_counter() - started, kind=kind, outcome="retry")
+                await asyncio.to_thread(
+                    JobRepository.retry, job_id, worker_id, error, self.backoff(attempts)
+                )
+            else:
+                job_run_seconds.observe(time.perf_counter() - started, kind=kind, outcome="failed")
+                await asyncio.to_thread(JobRepository.fail, job_id, worker_id, error)
+            return
+        finally:
+            heartbeat.cancel()
+        job_run_seconds.observe(time.perf_counter() - started, kind=kind, outcome="succeeded")
+        await asyncio.to_thread(JobRepository.complete, job_id, worker_id, result)
+
+    async def _keep_leased(self, job_id: str, worker_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            try:
+                await asyncio.to_thread(
+                    JobRepository.extend_lease, job_id, worker_id, self.visibility_timeout
+                )
+            except Exception as e:
+                print(f"Error extending lease on job {job_id}: {e}")
+
+    async def _prune_forever(self) -> None:
+        while True:
+            try:
+                deleted = await asyncio.to_thread(JobRepository.delete_finished, self.retention)
+                if deleted:
+                    print(f"Pruned {deleted} finished background jobs")
+            except Exception as e:
+                print(f"Error pruning background jobs: {e}")
+            await asyncio.sleep(3600)
@@ -0,0 +1,172 @@
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Optional
+
+from src.repository.llm_cache_repository import LLMCacheRepository
+from src.utils.cache import TTLCache, cache_bypass
+
+
+def normalize_text(text: str) -> str:
+    """Case, spacing and trailing punctuation don't change what a parser prompt returns"""
+    return re.sub(r"\s+", " ", text.strip().lower()).rstrip(".!?")
+
+
+def _confident(result: Any, min_confidence: float) -> bool:
+    # Combined plans carry a confidence for the intent and another for the payload
+    if not isinstance(result, dict):
+        return True
+    confidence = result.get("confidence")
+    if confidence is not None and (
+        not isinstance(confidence, (int, float)) or confidence < min_confidence
+    ):
+        return False
+    return all(
+        _confident(value, min_confidence) for value in result.values() if isinstance(value, dict)
+    )
+
+
+class LLMCache:
+    """Caches parsed LLM JSON answers in memory (LRU + TTL) in front of a Postgres table.
+
+    Keys cover the model, a hash of the system prompt, the normalized user text and any
+    date the prompt depends on, so a prompt change or a new day never serves stale answers.
+    Results under min_confidence are never stored. Table reads and writes run in worker
+    threads, and hit counts for LRU eviction are written in batches rather than per read.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.persistent = os.getenv("LLM_CACHE_PERSISTENT", "true").lower() == "true"
+        self.ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", "604800"))
+        self.max_rows = int(os.getenv("LLM_CACHE_MAX_ROWS", "50000"))
+        self.min_confidence = float(os.getenv("LLM_CACHE_MIN_CONFIDENCE", "0.8"))
+        self.memory = TTLCache(
+            maxsize=int(os.getenv("LLM_CACHE_MEMORY_MAXSIZE", "2048")), ttl=self.ttl
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hit_flush_size = int(os.getenv("LLM_CACHE_HIT_FLUSH_SIZE", "50"))
+        self._hits: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key(model: str, system_prompt: str, text: str, date_context: str = "") -> str:
+        prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()
+        material = json.dumps([model, prompt_hash, normalize_text(text), date_context])
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    async def get(self, prompt_type: str, key: str) -> Optional[dict]:
+        if not self.enabled or cache_bypass.get():
+            return None
+
+        result = self.memory.get(key)
+        if result is not None:
+            self._count(prompt_type, "memory_hits")
+            await self._record_hit(key)
+            return copy.deepcopy(result)
+
+        if self.persistent:
+            try:
+                result = await asyncio.to_thread(LLMCacheRepository.get, key)
+            except Exception as e:
+                print(f"LLM cache read failed: {e}")
+                result = None
+            if result is not None:
+                self.memory.set(key, result)
+                self._count(prompt_type, "db_hits")
+                await self._record_hit(key)
+                return copy.deepcopy(result)
+
+        self._count(prompt_type, "misses")
+        return None
+
+    async def put(self, prompt_type: str, key: str, model: str, result: dict) -> None:
+        if not self.enabled:
+            return
+        if not _confident(result, self.min_confidence):
+            self._count(prompt_type, "skipped_low_confidence")
+            return
+
+        self.memory.set(key, copy.deepcopy(result))
+        self._count(prompt_type, "stores")
+        if not self.persistent:
+            return
+
+        try:
+            await asyncio.to_thread(
+                LLMCacheRepository.put, key, prompt_type, model, result, self.ttl
+            )
+            with self._lock:
+                self._writes += 1
+                trim = self._writes % 500 == 0
+            if trim:
+                # Eviction orders by last hit, so pending hits go first
+                await self.flush_hits()
+                await asyncio.to_thread(LLMCacheRepository.evict, self.max_rows)
+        except Exception as e:
+            print(f"LLM cache write failed: {e}")
+
+    async def _record_hit(self, key: str) -> None:
+        if not self.persistent:
+            return
+        with self._lock:
+            self._hits[key] = self._hits.get(key, 0) + 1
+            flush = sum(self._hits.values()) >= self.hit_flush_size
+        if flush:
+            await self.flush_hits()
+
+    async def flush_hits(self) -> None:
+        """Write pending hit counts to the table in one UPDATE"""
+        with self._lock:
+            hits, self._hits = self._hits, {}
+        if not hits:
+            return
+        try:
+            await asyncio.to_thread(LLMCacheRepository.record_hits, hits)
+        except Exception as e:
+            print(f"LLM cache hit count update failed: {e}")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        with self._lock:
+            self._stats.clear()
+            self._hits.clear()
+
+    def _count(self, prompt_type: str, counter: str) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(
+                prompt_type,
+                {
+                    "memory_hits": 0,
+                    "db_hits": 0,
+                    "misses": 0,
+                    "stores": 0,
+                    "skipped_low_confidence": 0,
+                },
+            )
+            counters[counter] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_prompt_type = {}
+            for prompt_type, counters in self._stats.items():
+                hits = counters["memory_hits"] + counters["db_hits"]
+                lookups = hits + counters["misses"]
+                by_prompt_type[prompt_type] = {
+                    **counters,
+                    "hit_ratio": hits / lookups if lookups else 0.0,
+                }
+        return {
+            "enabled": self.enabled,
+            "persistent": self.persistent,
+            "memory": self.memory.stats(),
+            "by_prompt_type": by_prompt_type,
+        }
+
+
+llm_cache = LLMCache()
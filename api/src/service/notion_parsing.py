@@ -0,0 +1,109 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+Extractor = Callable[[dict], object]
+
+
+def get_rich_text(rich_text_prop: dict) -> str:
+    rich_text_array = rich_text_prop.get("rich_text", [])
+    if not rich_text_array:
+        return ""
+    return "".join([text.get("plain_text", "") for text in rich_text_array])
+
+
+def _number(prop_data: dict) -> float:
+    return prop_data.get("number", 0) or 0.0
+
+
+def _select_name(default: str) -> Extractor:
+    def extract(prop_data: dict) -> str:
+        select_data = prop_data.get("select")
+        return select_data.get("name", default) if select_data else default
+
+    return extract
+
+
+def _date_start(prop_data: dict) -> str:
+    date_data = prop_data.get("date")
+    return date_data.get("start", "") if date_data else ""
+
+
+# (substrings the lowercased property name must contain, property type, result field, extractor).
+# Order matters: the first matching rule wins, as in the original elif chains.
+FieldRule = Tuple[Tuple[str, ...], str, str, Extractor]
+
+EXPENSE_FIELD_RULES: List[FieldRule] = [
+    (("amount",), "number", "amount", _number),
+    (("category",), "select", "category", _select_name("")),
+    (("merchant",), "rich_text", "merchant", get_rich_text),
+    (("date",), "date", "date", _date_start),
+    (("description",), "rich_text", "description", get_rich_text),
+]
+
+BUDGET_FIELD_RULES: List[FieldRule] = [
+    (("category",), "rich_text", "category", get_rich_text),
+    (("amount",), "number", "amount", _number),
+    (("period",), "select", "period", _select_name("monthly")),
+    (("spent",), "number", "spent", _number),
+    (("start", "date"), "date", "start_date", _date_start),
+]
+
+
+class ParsePlan:
+    """Property-name-to-extractor map resolved once per database schema"""
+
+    def __init__(self, properties: dict, rules: List[FieldRule]):
+        self.entries = []
+        for prop_name, prop_data in properties.items():
+            prop_name_lower = prop_name.lower()
+            prop_type = prop_data.get("type")
+            for substrings, expected_type, field, extractor in rules:
+                if prop_type == expected_type and all(s in prop_name_lower for s in substrings):
+                    self.entries.append((prop_name, prop_type, field, extractor))
+                    break
+
+    def apply(self, props: dict, result: dict) -> bool:
+        """Fill result from props; returns False when a planned property is missing or retyped"""
+        get = props.get
+        for prop_name, prop_type, field, extractor in self.entries:
+            prop_data = get(prop_name)
+            if prop_data is None or prop_data["type"] != prop_type:
+                return False
+            result[field] = extractor(prop_data)
+        return True
+
+
+class PageParser:
+    """Decodes pages with a ParsePlan compiled from their database schema.
+
+    Plans are keyed on the schema object itself, so a schema refreshed in (or expired
+    from) the schema cache yields a fresh plan on the next lookup. Pages that don't match
+    the plan fall back to matching their own properties.
+    """
+
+    def __init__(self, rules: List[FieldRule]):
+        self.rules = rules
+        self._plans: Dict[str, Tuple[dict, ParsePlan]] = {}
+
+    def plan_for(self, database_id: str, properties: dict) -> ParsePlan:
+        cached = self._plans.get(database_id)
+        if cached is not None and cached[0] is properties:
+            return cached[1]
+        plan = ParsePlan(properties, self.rules)
+        self._plans[database_id] = (properties, plan)
+        return plan
+
+    def parse(
+        self, page: dict, make_result: Callable[[dict], dict], plan: Optional[ParsePlan] = None
+    ) -> dict:
+        props = page.get("properties", {})
+        result = make_result(page)
+        if plan is not None and plan.apply(props, result):
+            return result
+
+        result = make_result(page)
+        ParsePlan(props, self.rules).apply(props, result)
+        return result
+
+
+expense_page_parser = PageParser(EXPENSE_FIELD_RULES)
+budget_page_parser = PageParser(BUDGET_FIELD_RULES)
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from notion_client.errors import HTTPResponseError
+
+RATE_LIMITED_STATUS = 429
+
+
+class NotionRequestScheduler:
+    """Shared token bucket in front of every Notion API call.
+
+    Callers queue FIFO on a single lock, so bursts are served in arrival order at the
+    configured rate. A 429 pauses the whole bucket for the Retry-After period (plus
+    jitter) and the call is retried, so bursts turn into latency instead of errors.
+    """
+
+    def __init__(
+        self,
+        rate: float = 3.0,
+        burst: int = 3,
+        max_retries: int = 5,
+        base_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio.Lock binds to the loop it first waits on; tests and workers may run several loops
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def _acquire(self) -> None:
+        enqueued_at = time.monotonic()
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            async with self._get_lock():
+                while True:
+                    now = time.monotonic()
+                    if now < self._paused_until:
+                        await asyncio.sleep(self._paused_until - now)
+                        continue
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+        finally:
+            self.queue_depth -= 1
+
+        waited = time.monotonic() - enqueued_at
+        self.wait_count += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def _retry_delay(self, error: HTTPResponseError, attempt: int) -> float:
+        retry_after = error.headers.get("retry-after") if error.headers else None
+        if retry_after:
+            try:
+                return float(retry_after) + random.uniform(0, self.base_backoff)
+            except ValueError:
+                pass
+        backoff = min(self.max_backoff, self.base_backoff * (2**attempt))
+        return backoff * random.uniform(0.5, 1.5)
+
+    async def run(self, function: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        attempt = 0
+        while True:
+            await self._acquire()
+            self.requests += 1
+            try:
+                return await function(*args, **kwargs)
+            except HTTPResponseError as e:
+                if e.status != RATE_LIMITED_STATUS or attempt >= self.max_retries:
+                    raise
+                self.rate_limited += 1
+                delay = self._retry_delay(e, attempt)
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                self._tokens = 0.0
+                attempt += 1
+                self.retries += 1
+
+    def stats(self) -> dict:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "wait_seconds_avg": (
+                self.wait_seconds_total / self.wait_count if self.wait_count else 0.0
+            ),
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+notion_scheduler = NotionRequestScheduler(
+    rate=float(os.getenv("NOTION_RATE_LIMIT_PER_SECOND", "3")),
+    burst=int(os.getenv("NOTION_RATE_LIMIT_BURST", "3")),
+    max_retries=int(os.getenv("NOTION_MAX_RETRIES", "5")),
+)
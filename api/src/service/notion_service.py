@@ -1,15 +1,50 @@
+import asyncio
 import os
-from typing import List, Optional
-from notion_client import Client
-from notion_client.errors import APIResponseError
+import time
+from functools import partial
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional
+import httpx
+from notion_client import AsyncClient
+from notion_client.errors import APIErrorCode, APIResponseError
+from notion_client.helpers import async_iterate_paginated_api
+from src.repository.expense_mirror_repository import ExpenseMirrorRepository
+from src.repository.expense_rollup_repository import ExpenseRollupRepository
+from src.service.expense_search import ExpenseSearchIndex, LiveExpenseIndex
+from src.service.notion_parsing import PageParser, ParsePlan, budget_page_parser, expense_page_parser
+from src.service.notion_scheduler import notion_scheduler
+from src.utils.cache import TTLCache, cache_bypass
+from src.utils.singleflight import SingleFlight
+
+NOTION_PAGE_SIZE = 100
+
+# Database property schemas keyed by database id, shared by every NotionService instance
+schema_cache = TTLCache(maxsize=16, ttl=float(os.getenv("NOTION_SCHEMA_CACHE_TTL_SECONDS", "600")))
+
+# Parsed expenses by page id, and full query results keyed by their filters. Our own writes
+# update the page cache and clear the query cache, so reads after writes are consistent.
+EXPENSE_CACHE_TTL_SECONDS = float(os.getenv("EXPENSE_CACHE_TTL_SECONDS", "30"))
+expense_cache = TTLCache(maxsize=int(os.getenv("EXPENSE_CACHE_MAXSIZE", "1024")), ttl=EXPENSE_CACHE_TTL_SECONDS)
+expense_query_cache = TTLCache(maxsize=32, ttl=EXPENSE_CACHE_TTL_SECONDS)
+# Larger result sets are streamed through uncached so memory stays bounded
+EXPENSE_QUERY_CACHE_MAX_ROWS = int(os.getenv("EXPENSE_QUERY_CACHE_MAX_ROWS", "5000"))
+
+# Trigram/range index over the whole ledger for search. Rebuilt from a full read once it is
+# older than the TTL (edits made in Notion itself show up by then); our own writes update it
+expense_index = LiveExpenseIndex(ttl=float(os.getenv("EXPENSE_SEARCH_INDEX_TTL_SECONDS", "300")))
+
+# Concurrent identical reads (e.g. a dashboard load) share one in-flight Notion fetch
+notion_reads = SingleFlight()
 
 class NotionService:
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         api_key = os.getenv("NOTION_API_KEY")
         if not api_key:
             raise ValueError("NOTION_API_KEY environment variable is not set")
         
-        self.client = Client(auth=api_key)
+        # Pass a shared, pooled httpx client to reuse connections across requests
+        self.client = AsyncClient(auth=api_key, client=http_client)
+        self.scheduler = notion_scheduler
         self.expenses_db_id = os.getenv("NOTION_EXPENSES_DB_ID")
         self.budgets_db_id = os.getenv("NOTION_BUDGET_DB_ID")
         
@@ -18,37 +53,212 @@ class NotionService:
         
         if not self.budgets_db_id:
             raise ValueError("NOTION_BUDGET_DB_ID is not set in environment variables")
+        
+        # Serve expense reads from the Postgres mirror kept fresh by ExpenseSyncService
+        self.mirror_enabled = os.getenv("EXPENSES_MIRROR_ENABLED", "false").lower() == "true"
+        self._mirror_ready = False
     
-    def get_all_expenses(self) -> List[dict]:
+    async def iter_expense_pages(self, filter: Optional[dict] = None, sorts: Optional[list] = None,
+                                 page_size: int = NOTION_PAGE_SIZE) -> AsyncIterator[dict]:
+        """Yield raw Notion pages from the expenses database, following start_cursor/has_more"""
+        query = {"database_id": self.expenses_db_id, "page_size": page_size}
+        if filter:
+            query["filter"] = filter
+        if sorts:
+            query["sorts"] = sorts
+        
         try:
-            response = self.client.databases.query(database_id=self.expenses_db_id)
-            return [self._parse_expense_page(page) for page in response.get("results", [])]
+            query_database = partial(self.scheduler.run, self.client.databases.query)
+            async for page in async_iterate_paginated_api(query_database, **query):
+                yield page
         except APIResponseError as e:
             raise Exception(f"Failed to fetch expenses from Notion: {str(e)}")
     
-    def get_expense_by_id(self, expense_id: str) -> Optional[dict]:
+    async def iter_expenses(self, page_size: int = NOTION_PAGE_SIZE,
+                            cache_results: bool = False) -> AsyncIterator[dict]:
+        """Yield parsed expenses one Notion result page at a time, following start_cursor/has_more"""
+        async for expense in self.query_expenses(page_size=page_size, cache_results=cache_results):
+            yield expense
+    
+    async def query_expenses(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                             category: Optional[str] = None, amount_eq: Optional[float] = None,
+                             merchant_contains: Optional[str] = None,
+                             page_size: int = NOTION_PAGE_SIZE,
+                             cache_results: bool = False) -> AsyncIterator[dict]:
+        """Yield expenses matching the filters, evaluated by Notion (or the mirror) so only matches are fetched.
+
+        Cached result sets are served to every caller, but only cache_results callers, which
+        hold the whole list anyway, fill the cache; streaming reads keep one page resident.
+        """
+        filters = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "category": category,
+            "amount_eq": amount_eq,
+            "merchant_contains": merchant_contains,
+        }
+        cache_key = tuple(filters.values())
+        
+        cached = None if cache_bypass.get() else expense_query_cache.get(cache_key)
+        if cached is not None:
+            for expense in cached:
+                yield dict(expense)
+            return
+        
+        generation = expense_query_cache.generation
+        expenses = [] if cache_results else None
+        async for expense in self._fetch_expenses(filters, page_size):
+            if expenses is not None:
+                expenses.append(expense)
+                if len(expenses) > EXPENSE_QUERY_CACHE_MAX_ROWS:
+                    expenses = None
+            yield dict(expense)
+        # Only complete result sets are cached (a consumer that stops early never gets here),
+        # and not if one of our writes cleared the cache while this fetch was running
+        if expenses is not None and expense_query_cache.generation == generation:
+            expense_query_cache.set(cache_key, expenses)
+    
+    async def _fetch_expenses(self, filters: dict, page_size: int) -> AsyncIterator[dict]:
+        if await self._use_mirror():
+            after = None
+            while True:
+                batch = await asyncio.to_thread(
+                    partial(ExpenseMirrorRepository.fetch_expenses_page, after, page_size, **filters)
+                )
+                for expense in batch:
+                    yield expense
+                if len(batch) < page_size:
+                    return
+                after = (batch[-1]["created_time"], batch[-1]["id"])
+        
+        plan = await self.get_expense_parse_plan()
+        notion_filter = self._build_expense_filter(plan, **filters)
+        async for page in self.iter_expense_pages(filter=notion_filter, page_size=page_size):
+            expense = self._parse_expense_page(page, plan)
+            # Re-check locally: filters on properties the schema couldn't resolve aren't pushed down
+            if self._expense_matches(expense, **filters):
+                yield expense
+    
+    def _build_expense_filter(self, plan: Optional[ParsePlan], start_date: Optional[str], end_date: Optional[str],
+                              category: Optional[str], amount_eq: Optional[float],
+                              merchant_contains: Optional[str]) -> Optional[dict]:
+        """Translate expense filters into a Notion database query filter on the schema's actual property names"""
+        # Later properties win when decoding, so target the last one mapped to each field
+        property_names = {field: prop_name for prop_name, _, field, _ in plan.entries} if plan else {}
+        conditions = []
+        
+        date_prop = property_names.get("date")
+        if date_prop and start_date:
+            conditions.append({"property": date_prop, "date": {"on_or_after": start_date}})
+        if date_prop and end_date:
+            conditions.append({"property": date_prop, "date": {"on_or_before": end_date}})
+        if property_names.get("category") and category:
+            conditions.append({"property": property_names["category"], "select": {"equals": category}})
+        if property_names.get("amount") and amount_eq is not None:
+            conditions.append({"property": property_names["amount"], "number": {"greater_than_or_equal_to": amount_eq - 0.01}})
+            conditions.append({"property": property_names["amount"], "number": {"less_than_or_equal_to": amount_eq + 0.01}})
+        if property_names.get("merchant") and merchant_contains:
+            conditions.append({"property": property_names["merchant"], "rich_text": {"contains": merchant_contains}})
+        
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"and": conditions}
+    
+    def _expense_matches(self, expense: dict, start_date: Optional[str], end_date: Optional[str],
+                         category: Optional[str], amount_eq: Optional[float],
+                         merchant_contains: Optional[str]) -> bool:
+        expense_date = expense.get("date") or ""
+        if start_date and expense_date < start_date:
+            return False
+        if end_date and expense_date > end_date:
+            return False
+        if category and expense.get("category") != category:
+            return False
+        if amount_eq is not None and abs((expense.get("amount") or 0) - amount_eq) > 0.01:
+            return False
+        if merchant_contains and merchant_contains.lower() not in (expense.get("merchant") or "").lower():
+            return False
+        return True
+    
+    async def get_all_expenses(self) -> List[dict]:
+        expenses = await notion_reads.do(
+            ("expenses", self.expenses_db_id, cache_bypass.get()),
+            lambda: self._collect(self.iter_expenses(cache_results=True)),
+        )
+        return [dict(expense) for expense in expenses]
+    
+    async def _rebuild_search_index(self) -> None:
+        # Taken before the read so writes racing it are replayed onto the new index
+        started = time.monotonic()
+        expenses = await self._collect(self.iter_expenses(cache_results=True))
+        index = await asyncio.to_thread(ExpenseSearchIndex.build, expenses)
+        expense_index.replace(index, started)
+    
+    async def warm_search_index(self) -> None:
+        """Build the search index ahead of a search that would otherwise have to; a no-op while it's fresh"""
+        # Bypassed searches rebuild regardless, so warming for them would read the ledger twice
+        if cache_bypass.get() or expense_index.fresh():
+            return
+        await notion_reads.do(("expense_index", self.expenses_db_id), self._rebuild_search_index)
+    
+    async def search_expenses(self, query: str = "", merchant: Optional[str] = None,
+                              min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                              start_date: Optional[str] = None, end_date: Optional[str] = None,
+                              fuzzy: bool = False, limit: Optional[int] = None) -> List[dict]:
+        """Search the in-memory expense index, building it first if it's missing or stale.
+
+        Only searches pay for the build; plain expense listings never touch the index.
+        """
+        if cache_bypass.get() or not expense_index.fresh():
+            await notion_reads.do(("expense_index", self.expenses_db_id), self._rebuild_search_index)
+        return expense_index.index.search(
+            query, merchant=merchant, min_amount=min_amount, max_amount=max_amount,
+            start_date=start_date, end_date=end_date, fuzzy=fuzzy, limit=limit,
+        )
+    
+    async def _collect(self, items: AsyncIterator[dict]) -> List[dict]:
+        return [item async for item in items]
+    
+    async def get_expense_by_id(self, expense_id: str) -> Optional[dict]:
+        cached = None if cache_bypass.get() else expense_cache.get(expense_id)
+        if cached is not None:
+            return dict(cached)
+        
+        expense = await notion_reads.do(("expense", expense_id), lambda: self._fetch_expense_by_id(expense_id))
+        if expense:
+            expense_cache.set(expense_id, expense)
+            return dict(expense)
+        return expense
+    
+    async def _fetch_expense_by_id(self, expense_id: str) -> Optional[dict]:
+        if await self._use_mirror():
+            expense = await asyncio.to_thread(ExpenseMirrorRepository.get_expense_by_id, expense_id)
+            if expense:
+                return expense
+        
         try:
-            page = self.client.pages.retrieve(page_id=expense_id)
+            page = await self.scheduler.run(self.client.pages.retrieve, page_id=expense_id)
             return self._parse_expense_page(page)
         except APIResponseError as e:
             raise Exception(f"Failed to fetch expense {expense_id}: {str(e)}")
     
-    def create_expense(self, amount: float, category: str, merchant: str, date: str, description: str = "") -> dict:
+    async def create_expense(self, amount: float, category: str, merchant: str, date: str, description: str = "") -> dict:
         try:
-            db_schema = self.client.databases.retrieve(database_id=self.expenses_db_id)
-            actual_properties = db_schema.get("properties", {})
-            properties = self._build_expense_properties(actual_properties, amount, category, merchant, date, description)
-            
-            response = self.client.pages.create(
-                parent={"database_id": self.expenses_db_id},
-                properties=properties
+            response = await self._create_page(
+                self.expenses_db_id,
+                lambda actual_properties: self._build_expense_properties(
+                    actual_properties, amount, category, merchant, date, description
+                )
             )
-            return self._parse_expense_page(response)
+            await self._mirror_page(response)
+            return self._cache_written_expense(self._parse_expense_page(response))
         except APIResponseError as e:
             raise Exception(f"Failed to create expense: {str(e)}")
     
-    def update_expense(self, expense_id: str, amount: Optional[float] = None, category: Optional[str] = None, 
-                      merchant: Optional[str] = None, date: Optional[str] = None, description: Optional[str] = None) -> dict:
+    async def update_expense(self, expense_id: str, amount: Optional[float] = None, category: Optional[str] = None, 
+                             merchant: Optional[str] = None, date: Optional[str] = None, description: Optional[str] = None) -> dict:
         try:
             properties = {}
             if amount is not None:
@@ -62,18 +272,135 @@ class NotionService:
             if description is not None:
                 properties["Description"] = {"rich_text": [{"text": {"content": description}}]}
             
-            response = self.client.pages.update(page_id=expense_id, properties=properties)
-            return self._parse_expense_page(response)
+            response = await self.scheduler.run(self.client.pages.update, page_id=expense_id, properties=properties)
+            await self._mirror_page(response)
+            return self._cache_written_expense(self._parse_expense_page(response))
         except APIResponseError as e:
             raise Exception(f"Failed to update expense: {str(e)}")
     
-    def delete_expense(self, expense_id: str) -> bool:
+    async def delete_expense(self, expense_id: str) -> bool:
         try:
-            self.client.pages.update(page_id=expense_id, archived=True)
+            await self.scheduler.run(self.client.pages.update, page_id=expense_id, archived=True)
+            await self._mirror_tombstone(expense_id)
+            expense_cache.invalidate(expense_id)
+            expense_index.remove(expense_id)
+            self._forget_expense_reads(expense_id)
             return True
         except APIResponseError as e:
             raise Exception(f"Failed to delete expense: {str(e)}")
     
+    def _cache_written_expense(self, expense: dict) -> dict:
+        expense_cache.set(expense["id"], expense)
+        expense_index.upsert(expense)
+        self._forget_expense_reads(expense["id"])
+        return dict(expense)
+    
+    def _forget_expense_reads(self, expense_id: str) -> None:
+        # Query results can't be patched reliably (filters, ordering), so drop them all,
+        # and don't let later readers join a fetch that started before this write
+        expense_query_cache.clear()
+        notion_reads.forget(("expense", expense_id))
+        for bypass in (False, True):
+            notion_reads.forget(("expenses", self.expenses_db_id, bypass))
+    
+    async def _get_database_properties(self, database_id: str, refresh: bool = False) -> tuple:
+        """Return (properties, from_cache) for a database schema"""
+        if not refresh:
+            properties = schema_cache.get(database_id)
+            if properties is not None:
+                return properties, True
+        
+        db_schema = await self.scheduler.run(self.client.databases.retrieve, database_id=database_id)
+        properties = db_schema.get("properties", {})
+        schema_cache.set(database_id, properties)
+        return properties, False
+    
+    async def _create_page(self, database_id: str, build_properties: Callable[[dict], dict]) -> dict:
+        actual_properties, from_cache = await self._get_database_properties(database_id)
+        try:
+            return await self.scheduler.run(
+                self.client.pages.create,
+                parent={"database_id": database_id},
+                properties=build_properties(actual_properties)
+            )
+        except APIResponseError as e:
+            # A validation error against a cached schema usually means the database changed
+            if e.code != APIErrorCode.ValidationError or not from_cache:
+                raise
+            schema_cache.invalidate(database_id)
+            actual_properties, _ = await self._get_database_properties(database_id, refresh=True)
+            return await self.scheduler.run(
+                self.client.pages.create,
+                parent={"database_id": database_id},
+                properties=build_properties(actual_properties)
+            )
+    
+    async def get_expense_parse_plan(self) -> Optional[ParsePlan]:
+        return await self._get_parse_plan(self.expenses_db_id, expense_page_parser)
+    
+    async def _get_parse_plan(self, database_id: str, parser: PageParser) -> Optional[ParsePlan]:
+        """Plan compiled from the (cached) database schema; None parses pages from their own properties"""
+        try:
+            properties, _ = await self._get_database_properties(database_id)
+        except Exception as e:
+            print(f"Error fetching schema for database {database_id}, parsing without a plan: {e}")
+            return None
+        return parser.plan_for(database_id, properties)
+    
+    def _cached_parse_plan(self, database_id: str, parser: PageParser) -> Optional[ParsePlan]:
+        properties = schema_cache.get(database_id)
+        return parser.plan_for(database_id, properties) if properties is not None else None
+    
+    def to_mirror_record(self, page: dict, plan: Optional[ParsePlan] = None) -> dict:
+        record = self._parse_expense_page(page, plan)
+        record["last_edited_time"] = datetime.fromisoformat(
+            page.get("last_edited_time") or page.get("created_time")
+        )
+        record["archived"] = bool(page.get("archived") or page.get("in_trash"))
+        return record
+    
+    async def _use_mirror(self) -> bool:
+        if not self.mirror_enabled:
+            return False
+        if self._mirror_ready:
+            return True
+        
+        # The mirror only becomes authoritative once a full sync has populated it
+        try:
+            state = await asyncio.to_thread(ExpenseMirrorRepository.get_sync_state, self.expenses_db_id)
+            self._mirror_ready = bool(state and state.get("last_full_sync_at"))
+        except Exception as e:
+            print(f"Expenses mirror unavailable, reading from Notion: {e}")
+        return self._mirror_ready
+    
+    async def get_daily_rollup(self, start_date: Optional[str] = None,
+                               end_date: Optional[str] = None) -> Optional[List[dict]]:
+        """Spending per day and category from expense_daily_rollup, or None when the mirror isn't serving reads.
+
+        The rollup is maintained in the same transactions as the mirror, so it's exactly as
+        current as the mirror itself.
+        """
+        if not await self._use_mirror():
+            return None
+        return await asyncio.to_thread(ExpenseRollupRepository.fetch_range, start_date, end_date)
+    
+    async def _mirror_page(self, page: dict) -> None:
+        if not self.mirror_enabled:
+            return
+        try:
+            await asyncio.to_thread(ExpenseMirrorRepository.upsert_expenses, [self.to_mirror_record(page)])
+        except Exception as e:
+            # The next incremental sync picks the page up again
+            print(f"Error writing expense {page.get('id')} to mirror: {e}")
+    
+    async def _mirror_tombstone(self, expense_id: str) -> None:
+        if not self.mirror_enabled:
+            return
+        try:
+            await asyncio.to_thread(ExpenseMirrorRepository.mark_archived, expense_id)
+        except Exception as e:
+            print(f"Error archiving expense {expense_id} in mirror: {e}")
+    
     def _build_expense_properties(self, actual_properties: dict, amount: float, category: str, 
                                   merchant: str, date: str, description: str) -> dict:
         properties = {}
@@ -102,9 +429,13 @@ class NotionService:
         
         return properties
     
-    def _parse_expense_page(self, page: dict) -> dict:
-        props = page.get("properties", {})
-        result = {
+    def _parse_expense_page(self, page: dict, plan: Optional[ParsePlan] = None) -> dict:
+        if plan is None:
+            plan = self._cached_parse_plan(self.expenses_db_id, expense_page_parser)
+        return expense_page_parser.parse(page, self._new_expense, plan)
+    
+    def _new_expense(self, page: dict) -> dict:
+        return {
             "id": page.get("id"),
             "amount": 0.0,
             "category": "",
@@ -113,62 +444,45 @@ class NotionService:
             "description": "",
             "created_time": page.get("created_time"),
         }
-        
-        for prop_name, prop_data in props.items():
-            prop_name_lower = prop_name.lower()
-            prop_type = prop_data.get("type")
-            
-            if "amount" in prop_name_lower and prop_type == "number":
-                result["amount"] = prop_data.get("number", 0) or 0.0
-            elif "category" in prop_name_lower and prop_type == "select":
-                select_data = prop_data.get("select")
-                result["category"] = select_data.get("name", "") if select_data else ""
-            elif "merchant" in prop_name_lower and prop_type == "rich_text":
-                result["merchant"] = self._get_rich_text(prop_data)
-            elif "date" in prop_name_lower and prop_type == "date":
-                date_data = prop_data.get("date")
-                result["date"] = date_data.get("start", "") if date_data else ""
-            elif "description" in prop_name_lower and prop_type == "rich_text":
-                result["description"] = self._get_rich_text(prop_data)
-        
-        return result
     
-    def _get_rich_text(self, rich_text_prop: dict) -> str:
-        rich_text_array = rich_text_prop.get("rich_text", [])
-        if not rich_text_array:
-            return ""
-        return "".join([text.get("plain_text", "") for text in rich_text_array])
+    async def get_all_budgets(self) -> List[dict]:
+        budgets = await notion_reads.do(("budgets", self.budgets_db_id), self._fetch_all_budgets)
+        return [dict(budget) for budget in budgets]
     
-    def get_all_budgets(self) -> List[dict]:
+    async def _fetch_all_budgets(self) -> List[dict]:
         try:
-            response = self.client.databases.query(database_id=self.budgets_db_id)
-            return [self._parse_budget_page(page) for page in response.get("results", [])]
+            plan = await self._get_parse_plan(self.budgets_db_id, budget_page_parser)
+            pages = async_iterate_paginated_api(
+                partial(self.scheduler.run, self.client.databases.query),
+                database_id=self.budgets_db_id,
+                page_size=NOTION_PAGE_SIZE
+            )
+            return [self._parse_budget_page(page, plan) async for page in pages]
         except APIResponseError as e:
             raise Exception(f"Failed to fetch budgets from Notion: {str(e)}")
     
-    def get_budget_by_id(self, budget_id: str) -> Optional[dict]:
+    async def get_budget_by_id(self, budget_id: str) -> Optional[dict]:
         try:
-            page = self.client.pages.retrieve(page_id=budget_id)
+            page = await self.scheduler.run(self.client.pages.retrieve, page_id=budget_id)
             return self._parse_budget_page(page)
         except APIResponseError as e:
             raise Exception(f"Failed to fetch budget {budget_id}: {str(e)}")
     
-    def create_budget(self, category: str, amount: float, period: str = "monthly", start_date: Optional[str] = None) -> dict:
+    async def create_budget(self, category: str, amount: float, period: str = "monthly", start_date: Optional[str] = None) -> dict:
         try:
-            db_schema = self.client.databases.retrieve(database_id=self.budgets_db_id)
-            actual_properties = db_schema.get("properties", {})
-            properties = self._build_budget_properties(actual_properties, category, amount, period, start_date)
-            
-            response = self.client.pages.create(
-                parent={"database_id": self.budgets_db_id},
-                properties=properties
+            response = await self._create_page(
+                self.budgets_db_id,
+                lambda actual_properties: self._build_budget_properties(
+                    actual_properties, category, amount, period, start_date
+                )
             )
+            notion_reads.forget(("budgets", self.budgets_db_id))
             return self._parse_budget_page(response)
         except APIResponseError as e:
             raise Exception(f"Failed to create budget: {str(e)}")
     
-    def update_budget(self, budget_id: str, category: Optional[str] = None, amount: Optional[float] = None, 
-                     period: Optional[str] = None, spent: Optional[float] = None, start_date: Optional[str] = None) -> dict:
+    async def update_budget(self, budget_id: str, category: Optional[str] = None, amount: Optional[float] = None, 
+                            period: Optional[str] = None, spent: Optional[float] = None, start_date: Optional[str] = None) -> dict:
         try:
             properties = {}
             if category is not None:
@@ -182,14 +496,16 @@ class NotionService:
             if start_date is not None:
                 properties["Start Date"] = {"date": {"start": start_date}}
             
-            response = self.client.pages.update(page_id=budget_id, properties=properties)
+            response = await self.scheduler.run(self.client.pages.update, page_id=budget_id, properties=properties)
+            notion_reads.forget(("budgets", self.budgets_db_id))
             return self._parse_budget_page(response)
         except APIResponseError as e:
             raise Exception(f"Failed to update budget: {str(e)}")
     
-    def delete_budget(self, budget_id: str) -> bool:
+    async def delete_budget(self, budget_id: str) -> bool:
         try:
-            self.client.pages.update(page_id=budget_id, archived=True)
+            await self.scheduler.run(self.client.pages.update, page_id=budget_id, archived=True)
+            notion_reads.forget(("budgets", self.budgets_db_id))
             return True
         except APIResponseError as e:
             raise Exception(f"Failed to delete budget: {str(e)}")
@@ -223,9 +539,18 @@ class NotionService:
         
         return properties
     
-    def _parse_budget_page(self, page: dict) -> dict:
-        props = page.get("properties", {})
-        result = {
+    def _parse_budget_page(self, page: dict, plan: Optional[ParsePlan] = None) -> dict:
+        if plan is None:
+            plan = self._cached_parse_plan(self.budgets_db_id, budget_page_parser)
+        result = budget_page_parser.parse(page, self._new_budget, plan)
+        
+        result["remaining"] = result["amount"] - result["spent"]
+        result["percentage"] = (result["spent"] / result["amount"] * 100) if result["amount"] > 0 else 0
+        
+        return result
+    
+    def _new_budget(self, page: dict) -> dict:
+        return {
             "id": page.get("id"),
             "category": "",
             "amount": 0.0,
@@ -234,26 +559,3 @@ class NotionService:
             "start_date": "",
             "created_time": page.get("created_time"),
         }
-        
-        for prop_name, prop_data in props.items():
-            prop_name_lower = prop_name.lower()
-            prop_type = prop_data.get("type")
-            
-            if "category" in prop_name_lower and prop_type == "rich_text":
-                result["category"] = self._get_rich_text(prop_data)
-            elif "amount" in prop_name_lower and prop_type == "number":
-                result["amount"] = prop_data.get("number", 0) or 0.0
-            elif "period" in prop_name_lower and prop_type == "select":
-                select_data = prop_data.get("select")
-                result["period"] = select_data.get("name", "monthly") if select_data else "monthly"
-            elif "spent" in prop_name_lower and prop_type == "number":
-                result["spent"] = prop_data.get("number", 0) or 0.0
-            elif "start" in prop_name_lower and "date" in prop_name_lower and prop_type == "date":
-                date_data = prop_data.get("date")
-                result["start_date"] = date_data.get("start", "") if date_data else ""
-        
-        result["remaining"] = result["amount"] - result["spent"]
-        result["percentage"] = (result["spent"] / result["amount"] * 100) if result["amount"] > 0 else 0
-        
-        return result
-
@@ -0,0 +1,166 @@
+import asyncio
+import base64
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Tuple, Union
+
+from src.service.agent_service import AgentService
+from src.service.receipt_preprocessing import PREPROCESS_WORKERS, PreparedReceipt, prepare_receipt
+
+
+class ReceiptBatchService:
+    """OCRs and saves many receipts at once, yielding each file's result as soon as it's done.
+
+    Preprocessing runs on the receipt thread pool, vision calls are capped process-wide by
+    RECEIPT_BATCH_VISION_CONCURRENCY and Notion writes by RECEIPT_BATCH_SAVE_CONCURRENCY
+    (on top of the shared Notion scheduler), so concurrent batches share one budget. Uploads
+    given as files are read only when the preprocessing pool can take them, so raw images
+    are held a few at a time; only the shrunk copies wait for a vision slot.
+    """
+
+    def __init__(self, agent_service: AgentService):
+        self.agent_service = agent_service
+        self.max_files = int(os.getenv("RECEIPT_BATCH_MAX_FILES", "50"))
+        self._vision_slots = asyncio.Semaphore(
+            int(os.getenv("RECEIPT_BATCH_VISION_CONCURRENCY", "4"))
+        )
+        self._save_slots = asyncio.Semaphore(int(os.getenv("RECEIPT_BATCH_SAVE_CONCURRENCY", "3")))
+        self._prepare_slots = asyncio.Semaphore(PREPROCESS_WORKERS)
+
+    async def process(
+        self,
+        files: List[Tuple[Optional[str], Optional[str], Union[bytes, BinaryIO]]],
+        allow_duplicates: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield one result per (filename, content_type, contents) in completion order, then a summary.
+
+        contents is the image bytes or a binary file to read them from when their turn comes.
+
+        A repeat of an image earlier in the same batch is skipped unless allow_duplicates is set.
+        """
+        seen_hashes: Dict[str, int] = {}
+        tasks = [
+            asyncio.create_task(
+                self._process_one(
+                    index, filename, content_type, contents, allow_duplicates, seen_hashes
+                )
+            )
+            for index, (filename, content_type, contents) in enumerate(files)
+        ]
+        summary = {"done": True, "total": len(files), "saved": 0, "duplicates": 0, "failed": 0}
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                if result["status"] == "saved":
+                    summary["saved"] += 1
+                elif result["status"] == "duplicate":
+                    summary["duplicates"] += 1
+                else:
+                    summary["failed"] += 1
+                yield result
+            yield summary
+        finally:
+            # The client may disconnect mid-batch; don't leave vision calls running for nobody
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _process_one(
+        self,
+        index: int,
+        filename: Optional[str],
+        content_type: Optional[str],
+        contents: Union[bytes, BinaryIO],
+        allow_duplicates: bool,
+        seen_hashes: Dict[str, int],
+    ) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"index": index, "filename": filename}
+        if not content_type or not content_type.startswith("image/"):
+            return {
+                **result,
+                "status": "error",
+                "success": False,
+                "message": "Only image files are allowed",
+            }
+
+        try:
+            receipt = await self._prepare(contents, content_type)
+            image_hash = receipt.sha256
+            if image_hash in seen_hashes and not allow_duplicates:
+                return {
+                    **result,
+                    "status": "duplicate",
+                    "success": False,
+                    "message": "The same receipt appears earlier in this batch",
+                    "duplicate_of_index": seen_hashes[image_hash],
+                }
+            seen_hashes.setdefault(image_hash, index)
+
+            return {**result, **await self.read_receipt(receipt, filename, save=True)}
+        except Exception as e:
+            print(f"Error processing receipt {filename}: {e}")
+            return {
+                **result,
+                "status": "error",
+                "success": False,
+                "message": f"Error processing receipt: {str(e)}",
+            }
+
+    async def _prepare(self, contents: Union[bytes, BinaryIO], content_type: str) -> PreparedReceipt:
+        async with self._prepare_slots:
+            if not isinstance(contents, bytes):
+                contents = await asyncio.to_thread(contents.read)
+            return await prepare_receipt(contents, content_type)
+
+    async def read_receipt(
+        self, receipt: PreparedReceipt, filename: Optional[str], save: bool
+    ) -> Dict[str, Any]:
+        """OCR one preprocessed receipt and, with save, create its expense; likely duplicates are flagged, not skipped"""
+        base64_image = base64.b64encode(receipt.data).decode("utf-8")
+        async with self._vision_slots:
+            expense_data = await self.agent_service.extract_receipt_data(
+                base64_image, receipt.mime_type, receipt.sha256
+            )
+        if not expense_data:
+            return {
+                "status": "unreadable",
+                "success": False,
+                "message": "Could not extract expense details from receipt",
+            }
+
+        duplicates = await self.agent_service.find_duplicate_expenses(expense_data)
+        if not save:
+            return {
+                "status": "read",
+                "success": True,
+                "message": "Receipt processed successfully",
+                "expense_data": expense_data,
+                "possible_duplicates": duplicates,
+            }
+
+        async with self._save_slots:
+            created_expense = await self.agent_service.notion_service.create_expense(
+                amount=expense_data.get("amount", 0),
+                category=expense_data.get("category", "Other"),
+                merchant=expense_data.get("merchant", "Unknown"),
+                date=expense_data.get("date", datetime.now().strftime("%Y-%m-%d")),
+                description=expense_data.get("description", f"Receipt upload: {filename}"),
+            )
+        return {
+            "status": "saved",
+            "success": True,
+            "message": "Receipt processed and expense created",
+            "expense_data": expense_data,
+            "expense_id": created_expense.get("id") if created_expense else None,
+            "possible_duplicates": duplicates,
+        }
+
+    async def run_job(self, payload: dict, attachment: Optional[bytes]) -> Dict[str, Any]:
+        """Job queue handler for "receipt_ocr"; the attachment is the image as preprocessed at enqueue time"""
+        receipt = PreparedReceipt(
+            attachment, payload["mime_type"], payload.get("original_bytes", len(attachment))
+        )
+        result = await self.read_receipt(
+            receipt, payload.get("filename"), save=payload.get("save", False)
+        )
+        return {"filename": payload.get("filename"), **result}
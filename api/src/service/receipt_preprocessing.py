@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+RECEIPT_MAX_EDGE = int(os.getenv("RECEIPT_MAX_EDGE", "1600"))
+RECEIPT_JPEG_QUALITY = int(os.getenv("RECEIPT_JPEG_QUALITY", "80"))
+RECEIPT_GRAYSCALE = os.getenv("RECEIPT_GRAYSCALE", "true").lower() == "true"
+# Below this size an upright image isn't worth decoding; the upload is already cheap
+RECEIPT_SKIP_BELOW_BYTES = int(os.getenv("RECEIPT_SKIP_BELOW_BYTES", "262144"))
+
+# Formats the vision model accepts as-is, by Pillow format name
+PASSTHROUGH_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+EXIF_ORIENTATION = 0x0112
+
+PREPROCESS_WORKERS = int(os.getenv("RECEIPT_PREPROCESS_WORKERS", "2"))
+
+# Decoding, resizing and encoding are CPU-bound; Pillow releases the GIL for most of it
+_pool = ThreadPoolExecutor(
+    max_workers=PREPROCESS_WORKERS,
+    thread_name_prefix="receipt-preprocess",
+)
+
+
+class PreparedReceipt(NamedTuple):
+    data: bytes
+    mime_type: str
+    original_bytes: int
+
+    @property
+    def sha256(self) -> str:
+        """Content address of the normalized image, stable across re-uploads of the same file"""
+        return hashlib.sha256(self.data).hexdigest()
+
+
+def preprocess_receipt(
+    data: bytes,
+    declared_mime_type: Optional[str] = None,
+    max_edge: int = RECEIPT_MAX_EDGE,
+    quality: int = RECEIPT_JPEG_QUALITY,
+    grayscale: bool = RECEIPT_GRAYSCALE,
+) -> PreparedReceipt:
+    """Rotate per EXIF, optionally grayscale, shrink to max_edge and re-encode as JPEG.
+
+    Images Pillow can't decode (e.g. HEIC without a plugin) are passed through with their
+    declared type. Small upright JPEG/PNG/WebP files, or ones re-encoding would only grow,
+    are sent as they are with their real type.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image_format = image.format
+        original_edge = max(image.size)
+        upright = image.getexif().get(EXIF_ORIENTATION, 1) == 1
+        if (
+            upright
+            and image_format in PASSTHROUGH_MIME_TYPES
+            and len(data) < RECEIPT_SKIP_BELOW_BYTES
+        ):
+            return PreparedReceipt(data, PASSTHROUGH_MIME_TYPES[image_format], len(data))
+        # JPEGs can decode straight at 1/2, 1/4 or 1/8 scale, far cheaper than a full decode
+        image.draft("L" if grayscale else "RGB", (max_edge, max_edge))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError) as e:
+        print(f"Receipt preprocessing skipped: {e}")
+        return PreparedReceipt(data, declared_mime_type or "image/jpeg", len(data))
+
+    image = image.convert("L" if grayscale else "RGB")
+    image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality, optimize=True)
+    processed = output.getvalue()
+
+    if (
+        upright
+        and original_edge <= max_edge
+        and image_format in PASSTHROUGH_MIME_TYPES
+        and len(data) <= len(processed)
+    ):
+        return PreparedReceipt(data, PASSTHROUGH_MIME_TYPES[image_format], len(data))
+    return PreparedReceipt(processed, "image/jpeg", len(data))
+
+
+async def prepare_receipt(data: bytes, declared_mime_type: Optional[str] = None) -> PreparedReceipt:
+    """preprocess_receipt on the preprocessing pool, keeping the event loop free"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool, preprocess_receipt, data, declared_mime_type)
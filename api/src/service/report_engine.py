@@ -0,0 +1,405 @@
+from array import array
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Day number NaT casts to; rows with a missing or unparseable date carry it
+NO_DAY = np.iinfo(np.int64).min
+
+GROUPINGS = ("category", "merchant", "day", "week", "month")
+
+
+def _day_numbers(dates: Sequence[str]) -> np.ndarray:
+    """ISO dates as days since 1970-01-01, NO_DAY where there's no valid date"""
+    try:
+        days = np.array(dates, dtype="datetime64[D]")
+    except ValueError:
+        # A bad date in the ledger shouldn't sink the whole report; parse row by row instead
+        days = np.array([_parse_day(value) for value in dates], dtype="datetime64[D]")
+    return days.astype(np.int64)
+
+
+def _parse_day(value: str) -> np.datetime64:
+    try:
+        return np.datetime64(value, "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+
+class ExpenseFrameBuilder:
+    """Collects expenses one at a time (e.g. off a Notion stream) into compact columns"""
+
+    def __init__(self):
+        self._amounts = array("d")
+        self._dates: List[str] = []
+        self._category_codes = array("q")
+        self._merchant_codes = array("q")
+        self._categories: Dict[str, int] = {}
+        self._merchants: Dict[str, int] = {}
+
+    def append(self, expense: dict) -> None:
+        self._amounts.append(expense.get("amount") or 0)
+        # Date properties may carry a time; reports work in whole days
+        self._dates.append((expense.get("date") or "NaT")[:10])
+        category = expense.get("category") or "Other"
+        self._category_codes.append(self._categories.setdefault(category, len(self._categories)))
+        merchant = expense.get("merchant") or "Unknown"
+        self._merchant_codes.append(self._merchants.setdefault(merchant, len(self._merchants)))
+
+    def extend(self, expenses: Iterable[dict]) -> "ExpenseFrameBuilder":
+        for expense in expenses:
+            self.append(expense)
+        return self
+
+    def build(self) -> "ExpenseFrame":
+        return ExpenseFrame(
+            amount=np.frombuffer(self._amounts, dtype=np.float64).copy(),
+            day=_day_numbers(self._dates) if self._dates else np.empty(0, dtype=np.int64),
+            category_codes=np.frombuffer(self._category_codes, dtype=np.int64).copy(),
+            categories=list(self._categories),
+            merchant_codes=np.frombuffer(self._merchant_codes, dtype=np.int64).copy(),
+            merchants=list(self._merchants),
+        )
+
+
+class ExpenseFrame:
+    """Expenses as parallel NumPy columns for reporting.
+
+    amount is float64, day is the date as a day number and category/merchant are codes
+    into the categories/merchants lists (in first-seen order). Group-bys, percentiles and
+    top-N are a handful of whole-array passes (bincount, argpartition, lexsort) rather than a
+    Python loop per expense.
+
+    A frame built from expense_daily_rollup rows instead has one row per day and category,
+    with count holding how many expenses each row sums. It answers the category and time
+    groupings; merchant groupings, percentiles and largest need per-expense rows.
+    """
+
+    def __init__(
+        self,
+        amount: np.ndarray,
+        day: np.ndarray,
+        category_codes: np.ndarray,
+        categories: List[str],
+        merchant_codes: np.ndarray,
+        merchants: List[str],
+        count: Optional[np.ndarray] = None,
+    ):
+        self.amount = amount
+        self.day = day
+        self.category_codes = category_codes
+        self.categories = categories
+        self.merchant_codes = merchant_codes
+        self.merchants = merchants
+        self.count = count
+
+    @classmethod
+    def from_expenses(cls, expenses: Iterable[dict]) -> "ExpenseFrame":
+        return ExpenseFrameBuilder().extend(expenses).build()
+
+    @classmethod
+    def from_rollup(cls, rows: List[dict]) -> "ExpenseFrame":
+        """A frame over {"day", "category", "total_cents", "count"} rollup rows"""
+        categories: Dict[str, int] = {}
+        category_codes = np.fromiter(
+            (categories.setdefault(row["category"] or "Other", len(categories)) for row in rows),
+            dtype=np.int64,
+            count=len(rows),
+        )
+        return cls(
+            amount=np.fromiter(
+                (row["total_cents"] for row in rows), dtype=np.float64, count=len(rows)
+            )
+            / 100,
+            day=(
+                _day_numbers([row["day"] or "NaT" for row in rows])
+                if rows
+                else np.empty(0, dtype=np.int64)
+            ),
+            category_codes=category_codes,
+            categories=list(categories),
+            merchant_codes=np.zeros(len(rows), dtype=np.int64),
+            merchants=[],
+            count=np.fromiter((row["count"] for row in rows), dtype=np.int64, count=len(rows)),
+        )
+
+    @property
+    def aggregated(self) -> bool:
+        return self.count is not None
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def total(self) -> float:
+        return float(self.amount.sum())
+
+    def transactions(self) -> int:
+        return int(self.count.sum()) if self.aggregated else len(self)
+
+    def between(
+        self, start_date: Optional[str] = None, end_date: Optional[str] = None
+    ) -> "ExpenseFrame":
+        """The expenses dated within [start_date, end_date]; undated ones only when neither bound is given"""
+        if not start_date and not end_date:
+            return self
+        mask = self.day != NO_DAY
+        if start_date:
+            mask &= self.day >= _day_numbers([start_date[:10]])[0]
+        if end_date:
+            mask &= self.day <= _day_numbers([end_date[:10]])[0]
+        return ExpenseFrame(
+            self.amount[mask],
+            self.day[mask],
+            self.category_codes[mask],
+            self.categories,
+            self.merchant_codes[mask],
+            self.merchants,
+            self.count[mask] if self.aggregated else None,
+        )
+
+    def percentiles(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, float]:
+        self._require_expenses("percentiles")
+        if not len(self):
+            return {f"p{q:g}": 0.0 for q in percentiles}
+        values = np.percentile(self.amount, percentiles)
+        return {f"p{q:g}": float(value) for q, value in zip(percentiles, values, strict=True)}
+
+    def group_by(
+        self,
+        by: str,
+        percentiles: Sequence[float] = (),
+        top: Optional[int] = None,
+        sort: str = "total",
+    ) -> List[Dict[str, Any]]:
+        """Total, count, average and share of spending per group, optionally with per-group percentiles.
+
+        by is one of GROUPINGS; weeks start on Monday and are labelled by that day, months
+        as YYYY-MM. Time groupings skip undated expenses. sort is "total" (largest first,
+        ties in first-seen order) or "label" (alphabetical, which is chronological for
+        time groupings). top keeps only the N largest groups.
+        """
+        if percentiles:
+            self._require_expenses("percentiles")
+        keys, rows, label = self._grouping(by)
+        amount = self.amount if rows is None else self.amount[rows]
+        groups, inverse = _factorize(keys)
+        totals = np.bincount(inverse, weights=amount, minlength=len(groups))
+        if self.aggregated:
+            weights = self.count if rows is None else self.count[rows]
+            counts = np.bincount(inverse, weights=weights, minlength=len(groups)).astype(np.int64)
+        else:
+            counts = np.bincount(inverse, minlength=len(groups))
+
+        if top is not None and top < len(groups):
+            # Partition out the N largest first so only those get fully sorted
+            chosen = (
+                np.argpartition(-totals, top - 1)[:top] if top > 0 else np.empty(0, dtype=np.int64)
+            )
+            chosen = chosen[np.argsort(-totals[chosen], kind="stable")]
+        elif sort == "total":
+            chosen = np.argsort(-totals, kind="stable")
+        else:
+            chosen = np.arange(len(groups))
+
+        labels = label(groups[chosen])
+        if sort == "label":
+            by_label = sorted(range(len(labels)), key=labels.__getitem__)
+            chosen = chosen[by_label]
+            labels = [labels[position] for position in by_label]
+
+        overall = self.total()
+        rows = [
+            {
+                by: name,
+                "total": float(total),
+                "count": int(count),
+                "average": float(total / count),
+                "percentage": float(total / overall * 100) if overall > 0 else 0,
+            }
+            for name, total, count in zip(labels, totals[chosen], counts[chosen], strict=True)
+        ]
+        if percentiles:
+            # One sort by (group, amount) serves every percentile
+            ordered = amount[np.lexsort((amount, inverse))]
+            for q in percentiles:
+                values = _group_percentile(ordered, counts, q)[chosen]
+                for row, value in zip(rows, values, strict=True):
+                    row[f"p{q:g}"] = float(value)
+        return rows
+
+    def largest(self, n: int = 5) -> List[Dict[str, Any]]:
+        """The n biggest expenses, largest first"""
+        self._require_expenses("largest")
+        n = min(n, len(self))
+        if n <= 0:
+            return []
+        picked = np.argpartition(-self.amount, n - 1)[:n]
+        picked = picked[np.argsort(-self.amount[picked], kind="stable")]
+        return [
+            {
+                "amount": float(self.amount[row]),
+                "date": _day_label(self.day[row]),
+                "category": self.categories[self.category_codes[row]],
+                "merchant": self.merchants[self.merchant_codes[row]],
+            }
+            for row in picked
+        ]
+
+    def _require_expenses(self, what: str) -> None:
+        if self.aggregated:
+            raise ValueError(f"{what} needs per-expense rows, not a daily rollup")
+
+    def _grouping(self, by: str):
+        """(group key per row, mask of the rows grouped or None for all, key array -> labels)"""
+        if by == "category":
+            return (
+                self.category_codes,
+                None,
+                lambda codes: [self.categories[code] for code in codes],
+            )
+        if by == "merchant":
+            self._require_expenses("Grouping by merchant")
+            return self.merchant_codes, None, lambda codes: [self.merchants[code] for code in codes]
+        if by not in GROUPINGS:
+            raise ValueError(
+                f"Can't group expenses by '{by}'; expected one of {', '.join(GROUPINGS)}"
+            )
+
+        dated = self.day != NO_DAY
+        days = self.day[dated]
+        if by == "day":
+            return (
+                days,
+                dated,
+                lambda keys: list(np.datetime_as_string(keys.astype("datetime64[D]"))),
+            )
+        if by == "week":
+            # Day 0 (1970-01-01) was a Thursday, so shifting by 3 makes weeks run Monday to Sunday
+            return (
+                (days + 3) // 7,
+                dated,
+                lambda keys: list(np.datetime_as_string((keys * 7 - 3).astype("datetime64[D]"))),
+            )
+        months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        return months, dated, lambda keys: list(np.datetime_as_string(keys.astype("datetime64[M]")))
+
+
+def _factorize(keys: np.ndarray):
+    """(distinct keys ascending, position of each row's key among them)"""
+    if not len(keys):
+        return keys, keys
+    low = keys.min()
+    span = int(keys.max() - low) + 1
+    if span > 4 * len(keys) + 1024:
+        return np.unique(keys, return_inverse=True)
+    # Codes, day, week and month numbers are dense, so counting beats the sort np.unique does
+    offsets = keys - low
+    present = np.bincount(offsets, minlength=span) > 0
+    return np.flatnonzero(present) + low, (np.cumsum(present) - 1)[offsets]
+
+
+def _group_percentile(ordered: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """The q-th percentile within every group at once, interpolated like np.percentile.
+
+    ordered holds the amounts sorted by group, then amount.
+    """
+    starts = np.cumsum(counts) - counts
+    position = starts + (counts - 1) * (q / 100)
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, starts + counts - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _day_label(day: int) -> str:
+    return "" if day == NO_DAY else str(np.datetime64(int(day), "D"))
+
+
+def _monthly(frame: ExpenseFrame, report: Dict[str, Any]) -> None:
+    start_date, end_date = report["start_date"], report["end_date"]
+    if start_date:
+        days_in_period = (
+            datetime.strptime(end_date or start_date, "%Y-%m-%d")
+            - datetime.strptime(start_date, "%Y-%m-%d")
+        ).days + 1
+    else:
+        days_in_period = 30
+    report["daily_average"] = report["total_spent"] / days_in_period if days_in_period > 0 else 0
+    report["top_merchants"] = frame.group_by("merchant", top=5)
+    report["period_description"] = "This Month"
+
+
+def _category(frame: ExpenseFrame, report: Dict[str, Any]) -> None:
+    report["category_breakdown"] = frame.group_by("category", percentiles=(50,), sort="label")
+    report["total_categories"] = len(report["category_breakdown"])
+    report["period_description"] = "All Time"
+
+
+def _trends(frame: ExpenseFrame, report: Dict[str, Any]) -> None:
+    trend_data = [
+        {"date": row["day"], "amount": row["total"]}
+        for row in frame.group_by("day", sort="label")[-7:]
+    ]
+    report["trend_data"] = trend_data
+    report["period_description"] = "Last 7 Days"
+
+    if len(trend_data) >= 2:
+        recent_avg = (
+            sum(d["amount"] for d in trend_data[-3:]) / 3
+            if len(trend_data) >= 3
+            else trend_data[-1]["amount"]
+        )
+        older_avg = (
+            sum(d["amount"] for d in trend_data[:3]) / 3
+            if len(trend_data) >= 3
+            else trend_data[0]["amount"]
+        )
+        if recent_avg > older_avg * 1.1:
+            report["trend_direction"] = "increasing"
+        elif recent_avg < older_avg * 0.9:
+            report["trend_direction"] = "decreasing"
+        else:
+            report["trend_direction"] = "stable"
+    else:
+        report["trend_direction"] = "insufficient_data"
+
+
+# Report types generate_spending_report knows; each adds its own fields to the common summary
+REPORT_PRESETS: Dict[str, Callable[[ExpenseFrame, Dict[str, Any]], None]] = {
+    "monthly": _monthly,
+    "category": _category,
+    "trends": _trends,
+}
+
+
+# Presets that only group by category and day, which the daily rollup answers exactly; the
+# others need merchants or per-expense amounts and are built from transactions
+ROLLUP_PRESETS = frozenset({"trends"})
+
+
+def rollup_can_build(report_type: str) -> bool:
+    """Whether report_type comes out the same from a daily rollup frame as from transactions"""
+    return report_type in ROLLUP_PRESETS or report_type not in REPORT_PRESETS
+
+
+def build_report(
+    frame: ExpenseFrame,
+    report_type: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    category_breakdown = frame.group_by("category")
+    report = {
+        "success": True,
+        "report_type": report_type,
+        "total_spent": frame.total(),
+        "transaction_count": frame.transactions(),
+        "category_breakdown": category_breakdown,
+        "top_category": category_breakdown[0]["category"] if category_breakdown else None,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    preset = REPORT_PRESETS.get(report_type)
+    if preset:
+        preset(frame, report)
+    return report
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight execution.
+
+    The first caller starts the call as its own task; callers that arrive while it is
+    running await the same task and receive the same result (or exception). Cancelling
+    one caller doesn't cancel the shared call for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        # Tasks are bound to their loop; tests and workers may run several loops
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(function())
+            self._calls[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable) -> None:
+        """Make later callers start a fresh call, e.g. after a write that the running one may miss"""
+        self._calls.pop(key, None)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Every caller may have been cancelled; don't leave the exception unretrieved
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
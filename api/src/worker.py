@@ -0,0 +1,31 @@
+"""Background job worker: `python -m src.worker`.
+
+Runs the same job handlers as the API's in-process workers, without serving HTTP.
+Scale job throughput by running more replicas; they coordinate only through Postgres.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import asyncio
+
+from src.service.clients import Clients
+
+
+async def main() -> None:
+    job_queue = Clients.get_job_queue()
+    print(
+        f"Job worker started: {job_queue.concurrency} workers for {', '.join(job_queue.handlers)}"
+    )
+    try:
+        await job_queue.run_forever()
+    finally:
+        await Clients.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,113 @@
+"""Test per-message AgentRun contexts under concurrent chats"""
+import asyncio
+import json
+import random
+import re
+import threading
+import httpx
+from openai import AsyncOpenAI
+
+
+def test_run_records_phase_timings_and_usage():
+    from types import SimpleNamespace
+    from src.models.agent import AgentState
+    from src.service.agent_run import AgentRun
+
+    run = AgentRun("hello")
+    run.transition(AgentState.ACTING)
+    run.record_llm_call("gpt-oss-120b", 12.5, SimpleNamespace(prompt_tokens=40, completion_tokens=8))
+    run.transition(AgentState.COMPLETED)
+
+    summary = run.summary()
+    assert summary["state"] == "completed"
+    assert set(summary["timings_ms"]) == {"planning", "acting"}
+    assert (summary["llm_calls"], summary["prompt_tokens"], summary["completion_tokens"]) == (1, 40, 8)
+
+
+class JitteryLLM:
+    """Fake OpenAI endpoint that answers from the message number after a random delay, so chats interleave"""
+
+    def __init__(self, seed=7):
+        self.random = random.Random(seed)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        await asyncio.sleep(self.random.uniform(0, 0.02))
+        system, user = body["messages"][0]["content"], body["messages"][-1]["content"]
+        number = int(re.search(r"(\d+)\s*$", user).group(1))
+
+        if system.startswith("You are a financial assistant AI"):
+            intent = "ADD_EXPENSE" if "expense" in user else "GENERAL_RESPONSE"
+            content = json.dumps({"intent": intent, "reasoning": f"message {number}", "confidence": 0.9})
+        elif system.startswith("You are an expense parser"):
+            content = json.dumps({"amount": number, "category": "Other", "merchant": f"Store {number}",
+                                  "date": "2025-12-01", "description": "", "confidence": 0.95})
+        else:
+            content = f"Answer {number}"
+        return httpx.Response(200, json={
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 100 + number, "completion_tokens": 10, "total_tokens": 110 + number},
+        })
+
+
+class JitteryNotion:
+    def __init__(self):
+        self.random = random.Random(11)
+
+    async def create_expense(self, **kwargs):
+        await asyncio.sleep(self.random.uniform(0, 0.02))
+        return {"id": f"page-{kwargs['merchant']}", **kwargs}
+
+
+async def test_200_interleaved_chats_keep_their_own_state(monkeypatch):
+    from src.main import app
+    from src.repository.chat_repository import ChatRepository
+    from src.router import agent_router
+    from src.service.agent_service import AgentService
+    from src.service.clients import Clients
+
+    agent = AgentService()
+    agent.client = AsyncOpenAI(api_key="test", base_url="http://fake-llm/v1",
+                               http_client=httpx.AsyncClient(transport=httpx.MockTransport(JitteryLLM().handle)))
+    agent.notion_service = JitteryNotion()
+    agent.fast_path_enabled = False
+
+    decisions, db_threads = {}, set()
+    monkeypatch.setattr(ChatRepository, "save_message",
+                        staticmethod(lambda **kwargs: db_threads.add(threading.get_ident())))
+    monkeypatch.setattr(agent_router.agent_repository, "log_decision",
+                        lambda decision: decisions.__setitem__(decision.user_message, decision))
+    app.dependency_overrides[Clients.get_agent_service] = lambda: agent
+
+    messages = [f"log expense {i}" if i % 2 else f"quick question {i}" for i in range(200)]
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(
+                client.post("/api/agent/chat", json={"message": message}) for message in messages
+            ))
+    finally:
+        app.dependency_overrides.clear()
+
+    run_ids = set()
+    for index, (message, response) in enumerate(zip(messages, responses, strict=True)):
+        body = response.json()
+        decision = decisions[message]
+        assert body["state"] == "completed"
+        assert body["reasoning"] == f"message {index}"
+        assert body["run"]["llm_calls"] == 2
+        assert body["run"]["prompt_tokens"] == 2 * (100 + index)
+        if index % 2:
+            assert body["data"]["expense"]["merchant"] == f"Store {index}"
+            assert decision.result["expense_id"] == f"page-Store {index}"
+        else:
+            assert body["message"] == f"Answer {index}"
+        assert decision.agent_state.value == "completed"
+        assert decision.llm_reasoning == body["reasoning"]
+        assert decision.result["run"]["run_id"] == body["run"]["run_id"]
+        run_ids.add(body["run"]["run_id"])
+
+    assert len(run_ids) == 200
+    # History writes ran in worker threads, off the event loop the other 199 chats share
+    assert threading.get_ident() not in db_threads
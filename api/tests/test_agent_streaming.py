@@ -0,0 +1,149 @@
+"""Test SSE streaming of agent chat replies against a fake streaming LLM"""
+import asyncio
+import json
+import threading
+import time
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+TOKENS = ["You're ", "on ", "track ", "this ", "month", "!"]
+
+
+class DelayedStream(httpx.AsyncByteStream):
+    def __init__(self, chunks, delay):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+
+class FakeStreamingLLM:
+    """OpenAI-compatible endpoint: JSON plans for planner prompts, SSE token streams for replies"""
+
+    def __init__(self, plan_delay=0.0, token_delay=0.0):
+        self.plan_delay = plan_delay
+        self.token_delay = token_delay
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if not body.get("stream"):
+            await asyncio.sleep(self.plan_delay)
+            plan = {"intent": "GENERAL_RESPONSE", "reasoning": "question", "confidence": 0.9}
+            return httpx.Response(200, json={
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": json.dumps(plan)}}],
+            })
+
+        chunks = [
+            "data: " + json.dumps({
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }) + "\n\n"
+            for token in TOKENS
+        ] + ["data: [DONE]\n\n"]
+        return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                              stream=DelayedStream([c.encode() for c in chunks], self.token_delay))
+
+    async def handle_blocking(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if "response_format" in body:
+            return await self.handle(request)
+        # A non-streamed reply arrives only after every token is generated
+        await asyncio.sleep(self.token_delay * (len(TOKENS) + 1))
+        return httpx.Response(200, json={
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "".join(TOKENS)}}],
+        })
+
+
+def make_agent(handler):
+    from src.service.agent_service import AgentService
+
+    agent = AgentService()
+    agent.client = AsyncOpenAI(api_key="test", base_url="http://fake-llm/v1",
+                               http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    agent.fast_path_enabled = False
+    return agent
+
+
+def parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def test_stream_emits_states_then_tokens_then_done():
+    agent = make_agent(FakeStreamingLLM().handle)
+
+    events = [event async for event in agent.stream_message("how am I doing?")]
+
+    states = [data["state"] for event, data in events if event == "state"]
+    tokens = [data["text"] for event, data in events if event == "token"]
+    assert states == ["planning", "acting", "observing", "completed"]
+    assert tokens == TOKENS
+    assert events[-1][0] == "done"
+    assert events[-1][1]["message"] == "".join(TOKENS)
+    assert events[-1][1]["action_taken"] == "general_response"
+
+
+async def test_stream_endpoint_persists_final_message(monkeypatch):
+    from src.main import app
+    from src.repository.chat_repository import ChatRepository
+    from src.router import agent_router
+    from src.service.clients import Clients
+
+    saved, decisions = [], []
+    monkeypatch.setattr(ChatRepository, "save_message", staticmethod(
+        lambda **kwargs: saved.append({**kwargs, "thread": threading.get_ident()})))
+    monkeypatch.setattr(agent_router.agent_repository, "log_decision", decisions.append)
+    agent = make_agent(FakeStreamingLLM().handle)
+    app.dependency_overrides[Clients.get_agent_service] = lambda: agent
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/agent/chat/stream", json={"message": "how am I doing?"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert events[0] == ("state", {"state": "planning"})
+    assert [s["role"] for s in saved] == ["user", "assistant"]
+    assert saved[1]["content"] == "".join(TOKENS)
+    assert decisions[0].action_taken.value == "general_response"
+    # Postgres writes run in worker threads, not on the event loop serving other requests
+    assert threading.get_ident() not in {s["thread"] for s in saved}
+
+
+@pytest.mark.slow
+async def test_benchmark_time_to_first_token():
+    server = FakeStreamingLLM(plan_delay=0.05, token_delay=0.05)
+
+    streaming = make_agent(server.handle)
+    started = time.perf_counter()
+    first_byte = first_token = None
+    async for event, _ in streaming.stream_message("how am I doing?"):
+        now = time.perf_counter() - started
+        first_byte = first_byte if first_byte is not None else now
+        if event == "token" and first_token is None:
+            first_token = now
+    streamed_total = time.perf_counter() - started
+
+    blocking = make_agent(server.handle_blocking)
+    started = time.perf_counter()
+    await blocking.process_message("how am I doing?")
+    blocking_total = time.perf_counter() - started
+
+    print(f"\nchat/stream: first event {first_byte * 1000:.1f} ms, first token {first_token * 1000:.1f} ms, "
+          f"complete {streamed_total * 1000:.1f} ms; chat: first byte {blocking_total * 1000:.1f} ms")
+
+    assert first_byte < 0.02
+    assert first_token < blocking_total / 2
@@ -0,0 +1,83 @@
+"""Test the shared client registry behind the routers"""
+import time
+import httpx
+import pytest
+
+
+class FakeBudgets:
+    def __init__(self):
+        self.query_calls = 0
+        client = self
+
+        class Databases:
+            async def retrieve(self, database_id):
+                return {"properties": {"Amount": {"type": "number"}}}
+
+            async def query(self, database_id, start_cursor=None, page_size=100, **kwargs):
+                client.query_calls += 1
+                return {"results": [], "has_more": False, "next_cursor": None}
+
+        self.databases = Databases()
+
+
+async def test_budget_requests_share_one_notion_service(monkeypatch):
+    from src.main import app
+    from src.service.clients import Clients
+
+    fake = FakeBudgets()
+    monkeypatch.setattr(Clients.get_notion_service(), "client", fake)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for _ in range(3):
+            assert (await client.get("/api/budgets")).status_code == 200
+
+    # A per-request NotionService would have used a real client, not the patched shared one
+    assert fake.query_calls == 3
+
+
+def test_agent_service_reuses_notion_service_and_pool():
+    from src.service.clients import Clients
+
+    agent_service = Clients.get_agent_service()
+
+    assert agent_service is Clients.get_agent_service()
+    assert agent_service.notion_service is Clients.get_notion_service()
+    assert agent_service.client._client is Clients._openai_http
+
+
+async def test_close_releases_pools():
+    from src.service.clients import Clients
+
+    Clients.get_agent_service()
+    notion_http = Clients._notion_http
+    await Clients.close()
+
+    assert notion_http.is_closed
+    assert Clients._notion_service is None
+
+
+@pytest.mark.slow
+def test_benchmark_per_request_setup():
+    from src.service.agent_service import AgentService
+    from src.service.clients import Clients
+    from src.service.notion_service import NotionService
+
+    requests = 20
+    started = time.perf_counter()
+    for _ in range(requests):
+        NotionService()
+        AgentService()
+    per_request_seconds = (time.perf_counter() - started) / requests
+
+    Clients.get_agent_service()
+    started = time.perf_counter()
+    for _ in range(requests):
+        Clients.get_notion_service()
+        Clients.get_agent_service()
+    shared_seconds = (time.perf_counter() - started) / requests
+
+    print(f"\nper-request construction: {per_request_seconds * 1000:.3f} ms, "
+          f"shared registry: {shared_seconds * 1000:.5f} ms")
+
+    assert shared_seconds < per_request_seconds / 100
@@ -0,0 +1,125 @@
+"""Test the in-process expense cache and its write-through invalidation"""
+import httpx
+import pytest
+
+
+def make_page(page_id, amount=10.0):
+    return {
+        "id": page_id,
+        "created_time": "2025-12-01T12:00:00Z",
+        "properties": {
+            "Amount": {"type": "number", "number": amount},
+            "Merchant": {"type": "rich_text", "rich_text": [{"plain_text": "Store"}]},
+        },
+    }
+
+
+class CountingNotion:
+    def __init__(self):
+        self.calls = []
+        self.rows = {"a": make_page("a"), "b": make_page("b", 20.0)}
+        client = self
+
+        class Databases:
+            async def retrieve(self, database_id):
+                return {"properties": {"Amount": {"type": "number"}, "Merchant": {"type": "rich_text"}}}
+
+            async def query(self, database_id, start_cursor=None, page_size=100, **kwargs):
+                client.calls.append("databases.query")
+                return {"results": list(client.rows.values()), "has_more": False, "next_cursor": None}
+
+        class Pages:
+            async def retrieve(self, page_id):
+                client.calls.append("pages.retrieve")
+                return client.rows[page_id]
+
+            async def create(self, parent, properties):
+                client.calls.append("pages.create")
+                page = make_page("c", properties["Amount"]["number"])
+                client.rows["c"] = page
+                return page
+
+            async def update(self, page_id, properties=None, archived=False):
+                client.calls.append("pages.update")
+                if archived:
+                    return client.rows.pop(page_id)
+                client.rows[page_id] = make_page(page_id, properties["Amount"]["number"])
+                return client.rows[page_id]
+
+        self.databases = Databases()
+        self.pages = Pages()
+
+
+@pytest.fixture
+def service():
+    from src.service.notion_service import NotionService
+
+    service = NotionService()
+    service.client = CountingNotion()
+    return service
+
+
+async def test_repeated_reads_are_served_from_cache(service):
+    from src.service.notion_service import expense_cache, expense_query_cache
+
+    # Counters are process-wide and survive clear(); compare against where they stand now
+    hits, misses = expense_query_cache.hits, expense_query_cache.misses
+    single_hits = expense_cache.hits
+    await service.get_all_expenses()
+    await service.get_all_expenses()
+    await service.get_expense_by_id("a")
+    await service.get_expense_by_id("a")
+
+    assert service.client.calls == ["databases.query", "pages.retrieve"]
+    assert (expense_query_cache.hits - hits, expense_query_cache.misses - misses) == (1, 1)
+    assert expense_cache.hits - single_hits == 1
+
+
+async def test_writes_keep_cached_reads_consistent(service):
+    await service.get_all_expenses()
+    await service.get_expense_by_id("a")
+
+    await service.update_expense("a", amount=99.0)
+    assert (await service.get_expense_by_id("a"))["amount"] == 99.0
+
+    await service.create_expense(5.0, "Dining", "Cafe", "2025-12-02")
+    assert {e["id"] for e in await service.get_all_expenses()} == {"a", "b", "c"}
+
+    await service.delete_expense("b")
+    assert {e["id"] for e in await service.get_all_expenses()} == {"a", "c"}
+
+    assert service.client.calls.count("pages.retrieve") == 1
+
+
+async def test_cached_results_are_copies(service):
+    (await service.get_all_expenses())[0]["amount"] = -1
+
+    assert all(e["amount"] > 0 for e in await service.get_all_expenses())
+
+
+async def test_bypass_skips_cached_reads(service):
+    from src.utils.cache import cache_bypass
+
+    await service.get_all_expenses()
+    token = cache_bypass.set(True)
+    try:
+        await service.get_all_expenses()
+    finally:
+        cache_bypass.reset(token)
+
+    assert service.client.calls == ["databases.query", "databases.query"]
+
+
+async def test_no_cache_header_bypasses_cache(monkeypatch, service):
+    from src.main import app
+    from src.service.clients import Clients
+
+    monkeypatch.setitem(app.dependency_overrides, Clients.get_notion_service, lambda: service)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/api/expenses")
+        await client.get("/api/expenses")
+        await client.get("/api/expenses", headers={"Cache-Control": "no-cache"})
+
+    assert service.client.calls == ["databases.query", "databases.query"]
@@ -0,0 +1,192 @@
+"""Test bulk CSV/OFX expense imports"""
+import asyncio
+import time
+import httpx
+import pytest
+
+EXPENSE_SCHEMA = {
+    "properties": {
+        "Name": {"type": "title"},
+        "Amount": {"type": "number"},
+        "Category": {"type": "select"},
+        "Merchant": {"type": "rich_text"},
+        "Date": {"type": "date"},
+        "Description": {"type": "rich_text"},
+    }
+}
+
+OFX_EXPORT = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20251203120000
+<TRNAMT>-42.10
+<NAME>Grocery Mart
+<MEMO>Weekly shop
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20251204
+<TRNAMT>1500.00
+<NAME>Payroll
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class CreateTrackingNotion:
+    """Fake Notion client that records page creates and how many overlap"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.retrieves = 0
+        self.created = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        client = self
+
+        class Databases:
+            async def retrieve(self, database_id):
+                client.retrieves += 1
+                return EXPENSE_SCHEMA
+
+        class Pages:
+            async def create(self, parent, properties):
+                client.in_flight += 1
+                client.max_in_flight = max(client.max_in_flight, client.in_flight)
+                try:
+                    await asyncio.sleep(client.delay)
+                finally:
+                    client.in_flight -= 1
+                client.created.append(properties)
+                return {"id": f"page-{len(client.created)}", "created_time": "2025-12-01T12:00:00Z", "properties": {}}
+
+        self.databases = Databases()
+        self.pages = Pages()
+
+
+def parse(parser, text):
+    return list(parser(iter(text.splitlines(keepends=True))))
+
+
+def test_csv_rows_map_bank_columns():
+    from src.service.expense_import_service import parse_csv_rows
+
+    rows = parse(parse_csv_rows, "Posted Date,Payee,Amount,Memo\n12/03/2025,Grocery Mart,\"-1,042.10\",Weekly shop\n")
+
+    assert rows == [(2, {
+        "amount": 1042.10,
+        "category": "Other",
+        "merchant": "Grocery Mart",
+        "date": "2025-12-03",
+        "description": "Weekly shop",
+    })]
+
+
+def test_csv_rows_skip_credits_by_spending_sign():
+    from src.service.expense_import_service import parse_csv_rows
+
+    export = "date,merchant,amount\n2025-12-01,Cafe,-4.50\n2025-12-02,Payroll,1500.00\n2025-12-03,Refund,(3.00)\n"
+
+    assert [(row, fields["amount"]) for row, fields in parse(parse_csv_rows, export)] == [(2, 4.5), (4, 3.0)]
+    assert [(row, fields["amount"]) for row, fields in parse(
+        lambda lines: parse_csv_rows(lines, "positive"), export)] == [(3, 1500.0)]
+    # A debit column only holds spending
+    assert [row for row, _ in parse(parse_csv_rows, "date,payee,debit\n2025-12-01,Cafe,4.50\n")] == [2]
+
+
+def test_ofx_rows_skip_credits():
+    from src.service.expense_import_service import parse_ofx_rows
+
+    rows = parse(parse_ofx_rows, OFX_EXPORT)
+
+    assert rows == [(1, {
+        "amount": 42.10,
+        "category": "Other",
+        "merchant": "Grocery Mart",
+        "date": "2025-12-03",
+        "description": "Weekly shop",
+    })]
+
+
+@pytest.fixture
+def import_service():
+    from src.service.notion_service import NotionService
+    from src.service.expense_import_service import ExpenseImportService
+
+    notion_service = NotionService()
+    notion_service.client = CreateTrackingNotion()
+    service = ExpenseImportService(notion_service)
+    service.concurrency = 3
+    return service
+
+
+async def test_import_reports_per_row_errors(import_service, tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_text(
+        "date,merchant,category,amount\n"
+        "2025-12-01,Cafe,Dining,4.50\n"
+        "2025-12-02,,Dining,3.00\n"
+        "2025-12-03,Shop,Shopping,abc\n"
+        "2025-12-04,Books,Shopping,12\n"
+    )
+
+    job = import_service.start_import(str(path), "export.csv", spending_sign="positive")
+    job = await import_service.wait(job["job_id"])
+
+    assert job["status"] == "completed"
+    assert (job["processed"], job["created"], job["failed"]) == (4, 2, 2)
+    assert [error["row"] for error in job["errors"]] == [3, 4]
+    assert "merchant" in job["errors"][0]["error"]
+    assert import_service.notion_service.client.retrieves == 1
+    assert not path.exists()
+
+
+async def test_import_endpoint_returns_job_and_progress(monkeypatch):
+    from src.main import app
+    from src.service.clients import Clients
+
+    fake = CreateTrackingNotion()
+    monkeypatch.setattr(Clients.get_notion_service(), "client", fake)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/expenses/import",
+            files={"file": ("statement.ofx", OFX_EXPORT.encode(), "application/x-ofx")},
+        )
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        await Clients.get_import_service().wait(job_id)
+        job = (await client.get(f"/api/expenses/import/{job_id}")).json()
+
+    assert job["format"] == "ofx"
+    assert job["created"] == 1
+    assert fake.created[0]["Merchant"]["rich_text"][0]["text"]["content"] == "Grocery Mart"
+
+
+@pytest.mark.slow
+async def test_benchmark_import_5000_rows(import_service, tmp_path):
+    import_service.notion_service.client = CreateTrackingNotion(delay=0.01)
+    import_service.concurrency = 8
+    path = tmp_path / "export.csv"
+    with open(path, "w") as f:
+        f.write("date,merchant,amount\n")
+        for index in range(5000):
+            f.write(f"2025-12-{index % 28 + 1:02d},Store {index},{index % 90 + 1}.25\n")
+
+    started = time.perf_counter()
+    job = import_service.start_import(str(path), "export.csv", spending_sign="positive")
+    job = await import_service.wait(job["job_id"])
+    elapsed = time.perf_counter() - started
+
+    print(f"\n5000-row import: {elapsed:.2f}s, max concurrent creates: "
+          f"{import_service.notion_service.client.max_in_flight}")
+
+    assert job["created"] == 5000
+    assert import_service.notion_service.client.max_in_flight == 8
+    # One row at a time this would take at least 5000 * 0.01s = 50s
+    assert elapsed < 25
@@ -0,0 +1,190 @@
+"""Test the incrementally maintained daily spending rollup"""
+import random
+from collections import defaultdict
+from datetime import datetime, timezone
+import pytest
+
+
+def aggregate(rows):
+    """What a rebuild computes: cents and count per (day, category) over live rows"""
+    rollup = defaultdict(lambda: [0, 0])
+    for day, category, cents in rows.values():
+        rollup[(day, category)][0] += cents
+        rollup[(day, category)][1] += 1
+    return dict(rollup)
+
+
+def apply(rollup, deltas):
+    for key, (cents, count) in deltas.items():
+        cell = rollup.setdefault(key, [0, 0])
+        cell[0] += cents
+        cell[1] += count
+        if cell[1] == 0:
+            del rollup[key]
+
+
+def test_deltas_for_create_update_move_and_delete():
+    from src.repository.expense_rollup_repository import rollup_deltas
+
+    assert rollup_deltas({}, {"a": ("2025-12-01", "Dining", 450)}) == {("2025-12-01", "Dining"): [450, 1]}
+    assert rollup_deltas({"a": ("2025-12-01", "Dining", 450)}, {"a": ("2025-12-01", "Dining", 500)}) == {
+        ("2025-12-01", "Dining"): [50, 0],
+    }
+    assert rollup_deltas({"a": ("2025-12-01", "Dining", 450)}, {"a": ("2025-12-02", "Travel", 450)}) == {
+        ("2025-12-01", "Dining"): [-450, -1], ("2025-12-02", "Travel"): [450, 1],
+    }
+    assert rollup_deltas({"a": ("2025-12-01", "Dining", 450)}, {}) == {("2025-12-01", "Dining"): [-450, -1]}
+    # A sync re-reading an unchanged page touches nothing
+    assert rollup_deltas({"a": ("2025-12-01", "Dining", 450)}, {"a": ("2025-12-01", "Dining", 450)}) == {}
+
+
+def test_incremental_rollup_matches_a_rebuild_after_random_writes():
+    from src.repository.expense_rollup_repository import rollup_deltas
+
+    rng = random.Random(5)
+    live, rollup = {}, {}
+    for _ in range(2000):
+        ids = rng.sample([f"page-{n}" for n in range(50)], rng.randint(1, 5))
+        before = {expense_id: live[expense_id] for expense_id in ids if expense_id in live}
+        for expense_id in ids:
+            if rng.random() < 0.25:
+                live.pop(expense_id, None)
+            else:
+                live[expense_id] = (f"2025-12-{rng.randint(1, 5):02d}", rng.choice(["Dining", "Travel", ""]),
+                                    rng.randint(1, 10000))
+        after = {expense_id: live[expense_id] for expense_id in ids if expense_id in live}
+        apply(rollup, rollup_deltas(before, after))
+
+    assert rollup == aggregate(live)
+
+
+LEDGER = [
+    {"id": "a", "amount": 4.5, "category": "Dining", "merchant": "Starbucks", "date": "2025-12-01"},
+    {"id": "b", "amount": 52.1, "category": "Groceries", "merchant": "Whole Foods", "date": "2025-12-01"},
+    {"id": "c", "amount": 12.0, "category": "Transportation", "merchant": "Uber", "date": "2025-12-03"},
+    {"id": "d", "amount": 6.25, "category": "Dining", "merchant": "Starbucks", "date": "2025-12-08"},
+    {"id": "e", "amount": 80.0, "category": "", "merchant": "Costco", "date": "2025-12-09"},
+]
+
+
+def rollup_rows(expenses):
+    live = {e["id"]: (e["date"], e["category"], round(e["amount"] * 100)) for e in expenses}
+    return [
+        {"day": day, "category": category, "total_cents": cents, "count": count}
+        for (day, category), (cents, count) in sorted(aggregate(live).items())
+    ]
+
+
+class UnreachableNotion:
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected Notion call: {name}")
+
+
+@pytest.fixture
+def mirrored_agent(monkeypatch):
+    from src.repository.expense_mirror_repository import ExpenseMirrorRepository
+    from src.repository.expense_rollup_repository import ExpenseRollupRepository
+    from src.service.agent_service import AgentService
+    from src.service.notion_service import NotionService
+
+    fetched = []
+
+    def fetch_range(start_date=None, end_date=None):
+        fetched.append((start_date, end_date))
+        return [row for row in rollup_rows(LEDGER)
+                if (not start_date or row["day"] >= start_date) and (not end_date or row["day"] <= end_date)]
+
+    state = {"watermark": None, "last_synced_at": None, "last_full_sync_at": datetime.now(timezone.utc)}
+    monkeypatch.setattr(ExpenseMirrorRepository, "get_sync_state", lambda database_id: state)
+    monkeypatch.setattr(ExpenseRollupRepository, "fetch_range", fetch_range)
+
+    service = NotionService()
+    service.mirror_enabled = True
+    service.client = UnreachableNotion()
+    agent = AgentService(notion_service=service)
+    agent.fetched = fetched
+    return agent
+
+
+async def test_trends_read_the_rollup_not_transactions(mirrored_agent, monkeypatch):
+    from src.service.report_engine import ExpenseFrame, build_report
+
+    async def no_transactions(*args, **kwargs):
+        raise AssertionError("report scanned raw transactions")
+        yield
+
+    monkeypatch.setattr(mirrored_agent.notion_service, "query_expenses", no_transactions)
+
+    report = await mirrored_agent.generate_spending_report("trends", "2025-12-01", "2025-12-08")
+    raw = build_report(ExpenseFrame.from_expenses(LEDGER).between("2025-12-01", "2025-12-08"),
+                       "trends", "2025-12-01", "2025-12-08")
+
+    assert report["success"] is True
+    assert report.keys() == raw.keys()
+    assert report["total_spent"] == pytest.approx(raw["total_spent"])
+    for key in ("transaction_count", "top_category", "trend_direction"):
+        assert report[key] == raw[key], key
+    assert [(point["date"], round(point["amount"], 2)) for point in report["trend_data"]] == [
+        (point["date"], round(point["amount"], 2)) for point in raw["trend_data"]
+    ]
+    assert [(row["category"], row["count"]) for row in report["category_breakdown"]] == [
+        (row["category"], row["count"]) for row in raw["category_breakdown"]
+    ]
+    assert mirrored_agent.fetched == [("2025-12-01", "2025-12-08")]
+
+
+@pytest.mark.parametrize("report_type, start_date, end_date", [
+    ("monthly", "2025-12-01", "2025-12-08"),
+    ("category", None, None),
+])
+async def test_per_expense_reports_keep_their_shape_with_the_mirror(mirrored_agent, monkeypatch,
+                                                                    report_type, start_date, end_date):
+    from src.repository.expense_mirror_repository import ExpenseMirrorRepository
+    from src.service.report_engine import ExpenseFrame, build_report
+
+    def fetch_expenses_page(after=None, limit=100, start_date=None, end_date=None, **filters):
+        return [] if after else [expense for expense in LEDGER
+                                 if (not start_date or expense["date"] >= start_date)
+                                 and (not end_date or expense["date"] <= end_date)]
+
+    monkeypatch.setattr(ExpenseMirrorRepository, "fetch_expenses_page", fetch_expenses_page)
+
+    report = await mirrored_agent.generate_spending_report(report_type, start_date, end_date)
+    raw = build_report(ExpenseFrame.from_expenses(LEDGER).between(start_date, end_date),
+                       report_type, start_date, end_date)
+
+    # Merchants and per-category medians need transactions, so the rollup isn't consulted
+    assert mirrored_agent.fetched == []
+    assert report == raw
+    if report_type == "monthly":
+        assert report["top_merchants"][0]["merchant"] == "Whole Foods"
+    else:
+        assert "p50" in report["category_breakdown"][0]
+
+
+def test_rollup_frame_refuses_per_expense_questions():
+    from src.service.report_engine import ExpenseFrame
+
+    frame = ExpenseFrame.from_rollup(rollup_rows(LEDGER))
+
+    assert frame.transactions() == 5
+    assert [row["category"] for row in frame.group_by("category")] == ["Other", "Groceries", "Transportation", "Dining"]
+    with pytest.raises(ValueError):
+        frame.group_by("merchant")
+    with pytest.raises(ValueError):
+        frame.percentiles()
+
+
+def test_check_command_reports_drift(monkeypatch, capsys):
+    from src import rollup
+    from src.repository.expense_rollup_repository import ExpenseRollupRepository
+
+    monkeypatch.setattr(ExpenseRollupRepository, "find_drift", staticmethod(lambda: [{
+        "day": "2025-12-01", "category": "Dining", "rollup_cents": 450, "rollup_count": 1,
+        "actual_cents": 1075, "actual_count": 2,
+    }]))
+    assert rollup.main(["check"]) == 1
+    assert "2025-12-01 Dining: rollup 1 expenses / 4.50, mirror 2 expenses / 10.75" in capsys.readouterr().out
+
+    monkeypatch.setattr(ExpenseRollupRepository, "find_drift", staticmethod(lambda: []))
+    assert rollup.main(["check"]) == 0
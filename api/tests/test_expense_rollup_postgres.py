@@ -0,0 +1,71 @@
+"""Run the mirror and rollup SQL against a real Postgres (set TEST_DATABASE_URL; skipped otherwise)"""
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+EDITED = datetime(2025, 12, 1, 10, tzinfo=timezone.utc)
+
+
+def record(expense_id, amount, category, date, edited=EDITED, archived=False):
+    return {
+        "id": expense_id, "amount": amount, "category": category, "merchant": "Store", "date": date,
+        "description": "", "created_time": "2025-12-01T10:00:00.000Z", "last_edited_time": edited,
+        "archived": archived,
+    }
+
+
+def rollup():
+    from src.repository.expense_rollup_repository import ExpenseRollupRepository
+
+    return {(row["day"], row["category"]): (row["total_cents"], row["count"])
+            for row in ExpenseRollupRepository.fetch_range()}
+
+
+def test_mirror_writes_keep_the_rollup_exact(postgres):
+    from src.repository.expense_mirror_repository import ExpenseMirrorRepository
+    from src.repository.expense_rollup_repository import ExpenseRollupRepository
+
+    later = EDITED + timedelta(minutes=5)
+    ExpenseMirrorRepository.upsert_expenses([
+        record("a", 4.5, "Dining", "2025-12-01"),
+        record("b", 52.1, "Groceries", "2025-12-01T18:30:00.000-05:00"),
+        record("c", 6.25, "Dining", "2025-12-01"),
+    ])
+    assert rollup() == {("2025-12-01", "Dining"): (1075, 2), ("2025-12-01", "Groceries"): (5210, 1)}
+
+    # An edit moving "a" to another day, and a stale snapshot that the upsert guard drops
+    ExpenseMirrorRepository.upsert_expenses([record("a", 5.0, "Dining", "2025-12-02", edited=later)])
+    ExpenseMirrorRepository.upsert_expenses([record("a", 99.0, "Travel", "2025-12-09")])
+    assert rollup() == {("2025-12-01", "Dining"): (625, 1), ("2025-12-01", "Groceries"): (5210, 1),
+                        ("2025-12-02", "Dining"): (500, 1)}
+
+    ExpenseMirrorRepository.mark_archived("c")
+    ExpenseMirrorRepository.mark_archived("never-mirrored")
+    assert ("2025-12-01", "Dining") not in rollup()
+
+    started_at = ExpenseMirrorRepository.database_now()
+    assert ExpenseMirrorRepository.archive_missing(["a"], started_at) == 1
+    assert rollup() == {("2025-12-02", "Dining"): (500, 1)}
+    assert ExpenseRollupRepository.find_drift() == []
+
+
+def test_rebuild_repairs_drift(postgres):
+    from src.repository.expense_mirror_repository import ExpenseMirrorRepository
+    from src.repository.expense_rollup_repository import ExpenseRollupRepository
+    from src.service.database.helper import run_sql
+
+    ExpenseMirrorRepository.upsert_expenses([record("a", 4.5, "Dining", "2025-12-01"),
+                                             record("b", 12.0, "Travel", "")])
+    run_sql("UPDATE expense_daily_rollup SET total_cents = 1 WHERE category = 'Dining'")
+    run_sql("INSERT INTO expense_daily_rollup VALUES ('2025-11-30', 'Bills', 100, 1)")
+
+    drift = ExpenseRollupRepository.find_drift()
+    assert [(cell["day"], cell["category"], cell["actual_cents"]) for cell in drift] == [
+        ("2025-11-30", "Bills", None), ("2025-12-01", "Dining", 450),
+    ]
+
+    assert ExpenseRollupRepository.rebuild() == 2
+    assert ExpenseRollupRepository.find_drift() == []
+    assert rollup() == {("2025-12-01", "Dining"): (450, 1), ("", "Travel"): (1200, 1)}
@@ -0,0 +1,259 @@
+"""Test the in-memory expense search index and GET /api/expenses/search"""
+import asyncio
+import random
+import time
+import pytest
+
+LEDGER = [
+    {"id": "a", "amount": 4.5, "category": "Dining", "merchant": "Starbucks", "date": "2025-12-01",
+     "description": "morning coffee", "created_time": "2025-12-01T08:00:00Z"},
+    {"id": "b", "amount": 52.1, "category": "Groceries", "merchant": "Whole Foods", "date": "2025-12-03",
+     "description": "weekly shop", "created_time": "2025-12-03T18:00:00Z"},
+    {"id": "c", "amount": 12.0, "category": "Transportation", "merchant": "Uber", "date": "2025-12-05",
+     "description": "ride to airport", "created_time": "2025-12-05T06:00:00Z"},
+    {"id": "d", "amount": 6.25, "category": "Dining", "merchant": "Starbucks Reserve", "date": "2025-12-07",
+     "description": "", "created_time": "2025-12-07T09:00:00Z"},
+]
+
+
+def scan(expenses, query):
+    """The linear scan search_transactions used before the index"""
+    query_lower = query.lower()
+    return [
+        expense for expense in expenses
+        if query_lower in expense.get("merchant", "").lower()
+        or query_lower in expense.get("category", "").lower()
+        or query_lower in expense.get("description", "").lower()
+        or query_lower in str(expense.get("amount", ""))
+    ]
+
+
+@pytest.fixture
+def index():
+    from src.service.expense_search import ExpenseSearchIndex
+
+    return ExpenseSearchIndex.build(LEDGER)
+
+
+def ids(results):
+    return [expense["id"] for expense in results]
+
+
+def test_substring_matches_any_field_newest_first(index):
+    assert ids(index.search("starb")) == ["d", "a"]
+    assert ids(index.search("airport")) == ["c"]
+    assert ids(index.search("dining")) == ["d", "a"]
+    assert ids(index.search("52.1")) == ["b"]
+    # Shorter than a trigram still works, by verification
+    assert ids(index.search("ub")) == ["c"]
+    assert index.search("nowhere") == []
+
+
+def test_matches_agree_with_the_linear_scan(index):
+    for query in ("s", "st", "sto", "offee", "foods", "5", "2.", "o", "ride to", "DINING", ""):
+        assert sorted(ids(index.search(query))) == sorted(ids(scan(LEDGER, query))), query
+
+
+def test_trigrams_spanning_fields_are_not_matches(index):
+    # "ks d" would only occur if merchant and category were run together
+    assert index.search("ks d") == []
+
+
+def test_amount_and_date_ranges(index):
+    assert ids(index.search(min_amount=5, max_amount=20)) == ["d", "c"]
+    assert ids(index.search(start_date="2025-12-02", end_date="2025-12-05")) == ["c", "b"]
+    assert ids(index.search("starbucks", min_amount=5)) == ["d"]
+
+
+def test_merchant_filter_only_looks_at_merchant(index):
+    assert ids(index.search(merchant="uber")) == ["c"]
+    assert index.search(merchant="coffee") == []
+
+
+def test_fuzzy_tolerates_typos(index):
+    assert index.search("starbuks") == []
+    assert set(ids(index.search("starbuks", fuzzy=True))) == {"a", "d"}
+    assert ids(index.search("whole fods", fuzzy=True)) == ["b"]
+
+
+def test_incremental_add_update_and_remove(index):
+    index.add({"id": "e", "amount": 30.0, "category": "Shopping", "merchant": "Target", "date": "2025-12-08"})
+    assert ids(index.search("target")) == ["e"]
+
+    index.add({**LEDGER[2], "merchant": "Lyft", "amount": 18.0})
+    assert index.search("uber") == []
+    assert ids(index.search("lyft", min_amount=17, max_amount=19)) == ["c"]
+
+    index.remove("a")
+    index.remove("missing")
+    assert ids(index.search("starbucks")) == ["d"]
+    assert len(index) == 4
+
+
+def make_page(expense):
+    return {
+        "id": expense["id"],
+        "created_time": expense["created_time"],
+        "properties": {
+            "Amount": {"type": "number", "number": expense["amount"]},
+            "Category": {"type": "select", "select": {"name": expense["category"]}},
+            "Merchant": {"type": "rich_text", "rich_text": [{"plain_text": expense["merchant"]}]},
+            "Date": {"type": "date", "date": {"start": expense["date"]}},
+            "Description": {"type": "rich_text", "rich_text": [{"plain_text": expense["description"]}]},
+        },
+    }
+
+
+class LedgerNotion:
+    def __init__(self, expenses, query_delay=0.0):
+        self.rows = {expense["id"]: make_page(expense) for expense in expenses}
+        self.queries = 0
+        self.query_delay = query_delay
+        client = self
+
+        class Databases:
+            async def retrieve(self, database_id):
+                return {"properties": {name: {"type": prop["type"]} for name, prop in make_page(LEDGER[0])["properties"].items()}}
+
+            async def query(self, database_id, start_cursor=None, page_size=100, **kwargs):
+                client.queries += 1
+                snapshot = list(client.rows.values())
+                await asyncio.sleep(client.query_delay)
+                return {"results": snapshot, "has_more": False, "next_cursor": None}
+
+        class Pages:
+            async def create(self, parent, properties):
+                expense = {"id": f"new-{len(client.rows)}", "created_time": "2025-12-09T10:00:00Z",
+                           "amount": properties["Amount"]["number"], "category": "Shopping",
+                           "merchant": properties["Merchant"]["rich_text"][0]["text"]["content"],
+                           "date": "2025-12-09", "description": ""}
+                client.rows[expense["id"]] = make_page(expense)
+                return client.rows[expense["id"]]
+
+            async def update(self, page_id, properties=None, archived=False):
+                return client.rows.pop(page_id)
+
+        self.databases = Databases()
+        self.pages = Pages()
+
+
+@pytest.fixture
+def service():
+    from src.service.notion_service import NotionService
+
+    service = NotionService()
+    service.client = LedgerNotion(LEDGER)
+    return service
+
+
+async def test_index_is_built_once_and_kept_current_by_writes(service):
+    assert ids(await service.search_expenses("starbucks")) == ["d", "a"]
+
+    await service.create_expense(amount=30.0, category="Shopping", merchant="Target", date="2025-12-09")
+    await service.delete_expense("a")
+
+    assert ids(await service.search_expenses("target")) == ["new-4"]
+    assert ids(await service.search_expenses("starbucks")) == ["d"]
+    assert service.client.queries == 1
+
+
+async def test_listing_expenses_leaves_the_index_to_searches(service):
+    from src.service.notion_service import expense_index
+
+    await service.get_all_expenses()
+    assert expense_index.index is None
+
+    assert ids(await service.search_expenses("uber")) == ["c"]
+    # The index is built from the listing's cached read
+    assert service.client.queries == 1
+
+
+async def test_write_during_rebuild_is_not_lost(service):
+    service.client.query_delay = 0.05
+
+    rebuild = asyncio.create_task(service.search_expenses("target"))
+    await asyncio.sleep(0.01)
+    # Lands after the ledger snapshot was taken, before the new index is swapped in
+    await service.create_expense(amount=30.0, category="Shopping", merchant="Target", date="2025-12-09")
+    await rebuild
+
+    assert ids(await service.search_expenses("target")) == ["new-4"]
+
+
+async def test_free_text_transaction_search_uses_the_index(service):
+    from src.service.agent_service import AgentService
+
+    agent = AgentService(notion_service=service)
+
+    assert ids(await agent.search_transactions("coffee")) == ["a"]
+    assert ids(await agent.search_transactions("", merchant="starbucks", amount=6.25)) == ["d"]
+    assert service.client.queries == 1
+
+
+async def test_search_endpoint(service):
+    import httpx
+    from src.main import app
+    from src.service.clients import Clients
+
+    app.dependency_overrides[Clients.get_notion_service] = lambda: service
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/expenses/search", params={
+                "q": "dining", "min_amount": 5, "from": "2025-12-01", "to": "2025-12-31",
+            })
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert ids(response.json()) == ["d"]
+
+
+@pytest.mark.slow
+def test_benchmark_index_against_scan_at_100k():
+    from src.service.expense_search import ExpenseSearchIndex
+
+    rng = random.Random(7)
+    merchants = ["Starbucks", "Whole Foods", "Uber", "Target", "Shell", "Chipotle", "Costco", "Amazon", "Delta"]
+    categories = ["Dining", "Groceries", "Transportation", "Shopping", "Bills", "Travel"]
+    expenses = [
+        {"id": f"page-{n}", "amount": round(rng.uniform(1, 500), 2), "category": rng.choice(categories),
+         "merchant": f"{rng.choice(merchants)} #{rng.randint(1, 9999)}", "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+         "description": f"order {rng.randint(100000, 999999)}"}
+        for n in range(100_000)
+    ]
+
+    started = time.perf_counter()
+    index = ExpenseSearchIndex.build(expenses)
+    build_seconds = time.perf_counter() - started
+
+    queries = ["starbucks #42", "order 1234", "chipotle", "uber #9", "499.9"]
+    rounds = 5
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        expected = {query: scan(expenses, query) for query in queries}
+    scan_ms = (time.perf_counter() - started) * 1000 / (rounds * len(queries))
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        found = {query: index.search(query) for query in queries}
+    index_ms = (time.perf_counter() - started) * 1000 / (rounds * len(queries))
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            index.search(query, limit=100)
+    limited_ms = (time.perf_counter() - started) * 1000 / (rounds * len(queries))
+
+    for query in queries:
+        assert sorted(ids(found[query])) == sorted(ids(expected[query]))
+
+    started = time.perf_counter()
+    index.add({"id": "page-new", "amount": 9.99, "category": "Dining", "merchant": "Starbucks #1", "date": "2025-06-01"})
+    index.remove("page-new")
+    update_ms = (time.perf_counter() - started) * 1000
+
+    print(f"\n100k expenses: build {build_seconds:.2f} s, scan {scan_ms:.1f} ms/query, "
+          f"index {index_ms:.2f} ms/query ({limited_ms:.2f} ms with limit=100), add+remove {update_ms:.2f} ms")
+    assert index_ms < scan_ms
@@ -0,0 +1,281 @@
+"""Test the Notion -> Postgres expenses mirror sync"""
+from datetime import datetime, timezone
+import pytest
+
+
+async def iterate(pages):
+    for page in pages:
+        yield page
+
+
+def make_page(page_id, edited, amount=10.0):
+    return {
+        "id": page_id,
+        "created_time": "2025-12-01T12:00:00.000Z",
+        "last_edited_time": edited,
+        "archived": False,
+        "properties": {
+            "Amount": {"type": "number", "number": amount},
+            "Merchant": {"type": "rich_text", "rich_text": [{"plain_text": "Store"}]},
+        },
+    }
+
+
+class InMemoryMirror:
+    """Mirrors the SQL semantics of ExpenseMirrorRepository, using a logical clock for synced_at"""
+
+    def __init__(self):
+        self.rows = {}
+        self.state = None
+        self.clock = 0
+
+    def _tick(self):
+        self.clock += 1
+        return self.clock
+
+    def database_now(self):
+        return self._tick()
+
+    def upsert_expenses(self, records):
+        for record in records:
+            existing = self.rows.get(record["id"])
+            if existing and existing["last_edited_time"] > record["last_edited_time"]:
+                continue
+            self.rows[record["id"]] = dict(record, synced_at=self._tick())
+        return len(records)
+
+    def mark_archived(self, expense_id):
+        now = datetime.now(timezone.utc)
+        row = self.rows.setdefault(expense_id, {"id": expense_id, "last_edited_time": now})
+        row.update(archived=True, last_edited_time=max(row["last_edited_time"], now), synced_at=self._tick())
+
+    def archive_missing(self, seen_ids, started_at):
+        stale = [
+            row for row_id, row in self.rows.items()
+            if row_id not in seen_ids and not row["archived"] and row["synced_at"] < started_at
+        ]
+        for row in stale:
+            row["archived"] = True
+        return len(stale)
+
+    def fetch_expenses_page(self, after, limit, start_date=None, end_date=None, category=None,
+                            amount_eq=None, merchant_contains=None):
+        def matches(row):
+            return ((not start_date or (row["date"] or "") >= start_date)
+                    and (not end_date or (row["date"] or "") <= end_date)
+                    and (not category or row["category"] == category)
+                    and (amount_eq is None or abs(row["amount"] - amount_eq) <= 0.01)
+                    and (not merchant_contains or merchant_contains.lower() in (row["merchant"] or "").lower()))
+
+        live = sorted(
+            (row for row in self.rows.values() if not row["archived"] and matches(row)),
+            key=lambda row: (row["created_time"], row["id"]),
+            reverse=True,
+        )
+        if after:
+            live = [row for row in live if (row["created_time"], row["id"]) < after]
+        return [self._expense(row) for row in live[:limit]]
+
+    def get_expense_by_id(self, expense_id):
+        row = self.rows.get(expense_id)
+        return self._expense(row) if row and not row["archived"] else None
+
+    def _expense(self, row):
+        keys = ("id", "amount", "category", "merchant", "date", "description", "created_time")
+        return {key: row.get(key) for key in keys}
+
+    def get_sync_state(self, database_id):
+        return self.state
+
+    def save_sync_state(self, database_id, watermark, full_sync=False):
+        now = datetime.now(timezone.utc)
+        previous_full = self.state["last_full_sync_at"] if self.state else None
+        self.state = {
+            "watermark": watermark,
+            "last_synced_at": now,
+            "last_full_sync_at": now if full_sync else previous_full,
+        }
+
+
+@pytest.fixture
+def mirror(monkeypatch):
+    from src.repository.expense_mirror_repository import ExpenseMirrorRepository
+
+    fake = InMemoryMirror()
+    names = (
+        "database_now", "upsert_expenses", "mark_archived", "archive_missing", "fetch_expenses_page",
+        "get_expense_by_id", "get_sync_state", "save_sync_state",
+    )
+    for name in names:
+        monkeypatch.setattr(ExpenseMirrorRepository, name, getattr(fake, name))
+    return fake
+
+
+class SchemaOnlyNotion:
+    class databases:
+        @staticmethod
+        async def retrieve(database_id):
+            return {"properties": {"Amount": {"type": "number"}, "Merchant": {"type": "rich_text"}}}
+
+
+@pytest.fixture
+def sync_service():
+    from src.service.notion_service import NotionService
+    from src.service.expense_sync_service import ExpenseSyncService
+
+    notion_service = NotionService()
+    notion_service.client = SchemaOnlyNotion()
+    return ExpenseSyncService(notion_service)
+
+
+async def test_first_sync_is_full_and_tombstones_missing_rows(mirror, sync_service):
+    mirror.rows["gone"] = {"id": "gone", "archived": False, "synced_at": 0}
+    pages = [make_page("a", "2025-12-01T10:00:00.000Z"), make_page("b", "2025-12-02T10:00:00.000Z")]
+    sync_service.notion_service.iter_expense_pages = lambda **kwargs: iterate(pages)
+
+    result = await sync_service.sync_once()
+
+    assert result["mode"] == "full"
+    assert result["synced"] == 2
+    assert mirror.rows["gone"]["archived"] is True
+    assert mirror.state["watermark"] == datetime(2025, 12, 2, 10, tzinfo=timezone.utc)
+
+
+async def test_incremental_sync_queries_from_watermark(mirror, sync_service):
+    watermark = datetime(2025, 12, 2, 10, tzinfo=timezone.utc)
+    mirror.state = {
+        "watermark": watermark,
+        "last_synced_at": datetime.now(timezone.utc),
+        "last_full_sync_at": datetime.now(timezone.utc),
+    }
+    captured = {}
+
+    def iter_expense_pages(**kwargs):
+        captured.update(kwargs)
+        return iterate([make_page("b", "2025-12-03T08:00:00.000Z", amount=12.0)])
+
+    sync_service.notion_service.iter_expense_pages = iter_expense_pages
+
+    result = await sync_service.sync_once()
+
+    assert result["mode"] == "incremental"
+    assert captured["filter"]["last_edited_time"]["on_or_after"] == watermark.isoformat()
+    assert mirror.rows["b"]["amount"] == 12.0
+    assert mirror.state["watermark"] == datetime(2025, 12, 3, 8, tzinfo=timezone.utc)
+
+
+async def test_full_sync_keeps_rows_written_during_the_sync(mirror, sync_service):
+    sync_service.notion_service.mirror_enabled = True
+    created_mid_sync = make_page("new", "2025-12-03T10:00:00.000Z")
+
+    async def pages_with_concurrent_create(**kwargs):
+        yield make_page("a", "2025-12-01T10:00:00.000Z")
+        # An API create lands after the paginated read already passed its position
+        await sync_service.notion_service._mirror_page(created_mid_sync)
+
+    sync_service.notion_service.iter_expense_pages = pages_with_concurrent_create
+
+    await sync_service.sync_once()
+
+    assert mirror.rows["new"]["archived"] is False
+
+
+async def test_stale_snapshot_does_not_overwrite_newer_row(mirror, sync_service):
+    service = sync_service.notion_service
+    mirror.upsert_expenses([service.to_mirror_record(make_page("a", "2025-12-05T10:00:00.000Z", amount=20.0))])
+
+    mirror.upsert_expenses([service.to_mirror_record(make_page("a", "2025-12-01T10:00:00.000Z", amount=5.0))])
+
+    assert mirror.rows["a"]["amount"] == 20.0
+
+
+async def test_tombstone_wins_over_in_flight_sync_snapshot(mirror, sync_service):
+    service = sync_service.notion_service
+    service.mirror_enabled = True
+    snapshot = service.to_mirror_record(make_page("a", "2025-12-01T10:00:00.000Z"))
+    mirror.upsert_expenses([snapshot])
+
+    await service._mirror_tombstone("a")
+    mirror.upsert_expenses([snapshot])
+
+    assert mirror.rows["a"]["archived"] is True
+    assert mirror.rows["a"]["last_edited_time"] > snapshot["last_edited_time"]
+
+
+@pytest.fixture
+def mirrored_service(mirror):
+    from src.service.notion_service import NotionService
+
+    service = NotionService()
+    service.mirror_enabled = True
+    mirror.state = {"watermark": None, "last_synced_at": None, "last_full_sync_at": datetime.now(timezone.utc)}
+    return service
+
+
+class UnreachableNotion:
+    """Fails the test if a read that should be served by the mirror reaches Notion"""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected Notion call: {name}")
+
+
+async def test_mirror_reads_follow_keyset_pages(mirror, mirrored_service):
+    pages = [make_page(f"p{i:03d}", "2025-12-01T10:00:00.000Z", amount=i) for i in range(25)]
+    for i, page in enumerate(pages):
+        page["created_time"] = f"2025-12-01T10:{i:02d}:00.000Z"
+    mirror.upsert_expenses([mirrored_service.to_mirror_record(page) for page in pages])
+    mirrored_service.client = UnreachableNotion()
+
+    expenses = [expense async for expense in mirrored_service.iter_expenses(page_size=10)]
+
+    assert [expense["id"] for expense in expenses] == [f"p{i:03d}" for i in reversed(range(25))]
+
+
+async def test_get_expense_by_id_falls_back_to_notion_when_missing_from_mirror(mirror, mirrored_service):
+    retrieved = []
+
+    class Pages:
+        async def retrieve(self, page_id):
+            retrieved.append(page_id)
+            return make_page(page_id, "2025-12-01T10:00:00.000Z", amount=7.0)
+
+    mirrored_service.client = type("Client", (), {"pages": Pages()})()
+    mirror.upsert_expenses([mirrored_service.to_mirror_record(make_page("known", "2025-12-01T10:00:00.000Z"))])
+
+    assert (await mirrored_service.get_expense_by_id("known"))["id"] == "known"
+    assert (await mirrored_service.get_expense_by_id("unknown"))["amount"] == 7.0
+    assert retrieved == ["unknown"]
+
+
+async def test_mirror_is_not_used_before_first_full_sync(mirror, mirrored_service):
+    mirror.state = {"watermark": None, "last_synced_at": datetime.now(timezone.utc), "last_full_sync_at": None}
+    assert await mirrored_service._use_mirror() is False
+
+    mirror.state["last_full_sync_at"] = datetime.now(timezone.utc)
+    assert await mirrored_service._use_mirror() is True
+
+
+async def test_writes_go_through_to_the_mirror(mirror, mirrored_service):
+    class Pages:
+        async def update(self, page_id, **kwargs):
+            amount = kwargs.get("properties", {}).get("Amount", {}).get("number", 0)
+            return make_page(page_id, "2025-12-04T10:00:00.000Z", amount=amount)
+
+    mirrored_service.client = type("Client", (), {"pages": Pages()})()
+
+    await mirrored_service.update_expense("a", amount=42.0)
+    assert mirror.rows["a"]["amount"] == 42.0
+
+    await mirrored_service.delete_expense("a")
+    assert mirror.rows["a"]["archived"] is True
+    assert [expense async for expense in mirrored_service.iter_expenses()] == []
+
+
+async def test_filtered_reads_are_served_by_the_mirror(mirror, mirrored_service):
+    pages = [make_page(f"p{i}", "2025-12-01T10:00:00.000Z", amount=i) for i in range(5)]
+    mirror.upsert_expenses([mirrored_service.to_mirror_record(page) for page in pages])
+    mirrored_service.client = UnreachableNotion()
+
+    expenses = [expense async for expense in mirrored_service.query_expenses(amount_eq=3, merchant_contains="store")]
+
+    assert [expense["id"] for expense in expenses] == ["p3"]
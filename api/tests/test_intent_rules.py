@@ -0,0 +1,152 @@
+"""Test the rule-based fast path that skips the LLM planner"""
+import json
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+
+TODAY = datetime(2025, 12, 10)
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("spent $12.50 at Chipotle", "ADD_EXPENSE"),
+    ("I paid 40 for gas at Shell yesterday", "ADD_EXPENSE"),
+    ("$5 coffee at starbucks", "ADD_EXPENSE"),
+    ("set my dining budget to $300", "SET_BUDGET"),
+    ("delete the $25 expense at Target", "DELETE_EXPENSE"),
+    ("remove my last transaction", "DELETE_EXPENSE"),
+])
+def test_obvious_messages_are_classified(message, intent):
+    from src.service.intent_rules import classify_message
+
+    assert classify_message(message, TODAY)["intent"] == intent
+
+
+@pytest.mark.parametrize("message", [
+    "how much did I spend on food last month?",
+    "hello!",
+    "delete my account",
+    "remove my $400 dining budget",
+    "delete the groceries category",
+    "delete the $50 budget for Target",
+    "spent $12 at Shell last week",
+    "spent 12 at Chipotle and 8 at Starbucks",
+    "spent 3 at gas station for 2 hours",
+    "spent $5 at Starbucks on 2025-02-30",
+    "$20 for pizza and wings at Dominos",
+    "spent some money at the store",
+])
+def test_unclear_messages_fall_through(message):
+    from src.service.intent_rules import classify_message
+
+    assert classify_message(message, TODAY) is None
+
+
+def test_expense_payload_is_parsed():
+    from src.service.intent_rules import classify_message
+
+    plan = classify_message("I paid 40 for gas at Shell yesterday", TODAY)
+
+    assert plan["expense"].model_dump() == {
+        "amount": 40.0,
+        "category": "Transportation",
+        "merchant": "Shell",
+        "date": "2025-12-09",
+        "description": "gas",
+        "confidence": 0.95,
+    }
+
+
+def test_explicit_dates_are_validated():
+    from src.service.intent_rules import classify_message
+
+    assert classify_message("spent $5 at Starbucks on 2025-02-28", TODAY)["expense"].date == "2025-02-28"
+    assert classify_message("spent $5 at Starbucks on 2025-02-30", TODAY) is None
+
+
+def test_budget_and_delete_payloads():
+    from src.service.intent_rules import classify_message
+
+    budget = classify_message("Set the groceries budget to $1,200 per week", TODAY)["budget"]
+    deletion = classify_message("delete the $25 expense at Target on 2025-12-01", TODAY)["deletion"]
+
+    assert (budget.category, budget.amount, budget.period) == ("Groceries", 1200.0, "weekly")
+    assert deletion == {"amount": 25.0, "merchant": "Target", "date": "2025-12-01"}
+
+
+@pytest.mark.parametrize("message, deletion", [
+    ("delete the $20 expense from yesterday", {"amount": 20.0}),
+    ("remove the $12 charge from last week", {"amount": 12.0}),
+    ("delete the $5 purchase at Starbucks yesterday", {"amount": 5.0, "merchant": "Starbucks"}),
+    ("delete the $8 expense from Chipotle last Friday", {"amount": 8.0, "merchant": "Chipotle"}),
+    ("remove the expense from this month", None),
+    ("delete my transaction at Target on monday", {"merchant": "Target"}),
+])
+def test_time_phrases_are_not_read_as_merchants(message, deletion):
+    from src.service.intent_rules import classify_message
+
+    plan = classify_message(message, TODAY)
+
+    assert plan["intent"] == "DELETE_EXPENSE"
+    assert plan.get("deletion") == deletion
+
+
+class RecordingOpenAI:
+    """Fake OpenAI client that answers every completion with a fixed plan"""
+
+    def __init__(self, plan):
+        self.calls = []
+        client = self
+
+        class Completions:
+            async def create(self, **kwargs):
+                client.calls.append(kwargs)
+                return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(plan)))])
+
+        self.chat = SimpleNamespace(completions=Completions())
+
+
+class RecordingNotion:
+    def __init__(self):
+        self.created = []
+
+    async def create_expense(self, **kwargs):
+        self.created.append(kwargs)
+        return {"id": "page-1", **kwargs}
+
+
+@pytest.fixture
+def agent():
+    from src.service.agent_service import AgentService
+
+    agent = AgentService()
+    agent.notion_service = RecordingNotion()
+    agent.client = RecordingOpenAI({"intent": "GENERAL_CHAT", "reasoning": "small talk", "confidence": 0.9})
+    return agent
+
+
+async def test_fast_path_skips_the_llm(agent):
+    agent.llm_latency_ms = 800.0
+
+    response = await agent.process_message("spent $12.50 at Chipotle")
+
+    assert agent.client.calls == []
+    assert agent.notion_service.created[0]["merchant"] == "Chipotle"
+    assert (response.plan_source, response.llm_calls_saved) == ("rules", 2)
+    assert response.latency_saved_ms == 1600.0
+
+
+async def test_unclear_message_uses_the_llm_planner(agent):
+    response = await agent.process_message("what's a good way to save money?")
+
+    assert len(agent.client.calls) == 2
+    assert (response.plan_source, response.llm_calls_saved) == ("llm", 0)
+    assert agent.llm_latency_ms is not None
+
+
+async def test_fast_path_can_be_disabled(agent):
+    agent.fast_path_enabled = False
+
+    response = await agent.process_message("spent $12.50 at Chipotle")
+
+    assert response.plan_source == "llm"
+    assert agent.client.calls
@@ -0,0 +1,237 @@
+"""Test the Postgres-backed background job queue"""
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+
+
+class InMemoryJobs:
+    """Mirrors the SQL semantics of JobRepository, with a clock the tests can move forward"""
+
+    def __init__(self):
+        self.rows = {}
+        self.now = datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+    def enqueue(self, job_id, kind, payload, attachment, max_attempts):
+        self.rows[job_id] = {
+            "id": job_id, "kind": kind, "payload": json.loads(json.dumps(payload)), "attachment": attachment,
+            "status": "queued", "attempts": 0, "max_attempts": max_attempts, "run_at": self.now,
+            "locked_by": None, "locked_until": None, "result": None, "last_error": None,
+            "created_at": self.now, "finished_at": None,
+        }
+        return self._public(self.rows[job_id])
+
+    def claim(self, worker_id, kinds, visibility_timeout):
+        runnable = sorted(
+            (row for row in self.rows.values() if row["kind"] in kinds and (
+                (row["status"] == "queued" and row["run_at"] <= self.now)
+                or (row["status"] == "running" and row["locked_until"] < self.now))),
+            key=lambda row: row["run_at"],
+        )
+        if not runnable:
+            return None
+        row = runnable[0]
+        row.update(status="running", attempts=row["attempts"] + 1, locked_by=worker_id,
+                   locked_until=self.now + timedelta(seconds=visibility_timeout))
+        return {key: row[key] for key in ("id", "kind", "payload", "attachment", "attempts", "max_attempts")}
+
+    def _owned(self, job_id, worker_id):
+        row = self.rows.get(job_id)
+        return row if row and row["locked_by"] == worker_id and row["status"] == "running" else None
+
+    def extend_lease(self, job_id, worker_id, visibility_timeout):
+        row = self._owned(job_id, worker_id)
+        if row:
+            row["locked_until"] = self.now + timedelta(seconds=visibility_timeout)
+        return bool(row)
+
+    def complete(self, job_id, worker_id, result):
+        row = self._owned(job_id, worker_id)
+        if row:
+            row.update(status="succeeded", result=json.loads(json.dumps(result)), attachment=None, last_error=None,
+                       locked_by=None, locked_until=None, finished_at=self.now)
+        return bool(row)
+
+    def retry(self, job_id, worker_id, error, delay_seconds):
+        row = self._owned(job_id, worker_id)
+        if row:
+            row.update(status="queued", last_error=error, run_at=self.now + timedelta(seconds=delay_seconds),
+                       locked_by=None, locked_until=None)
+        return bool(row)
+
+    def fail(self, job_id, worker_id, error):
+        row = self._owned(job_id, worker_id)
+        if row:
+            row.update(status="failed", last_error=error, attachment=None, locked_by=None, locked_until=None,
+                       finished_at=self.now)
+        return bool(row)
+
+    def get(self, job_id):
+        row = self.rows.get(job_id)
+        return self._public(row) if row else None
+
+    def _public(self, row):
+        keys = ("id", "kind", "payload", "status", "attempts", "max_attempts", "run_at", "result", "last_error",
+                "created_at", "finished_at")
+        return {key: row[key] for key in keys}
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    from src.repository.job_repository import JobRepository
+
+    fake = InMemoryJobs()
+    for name in ("enqueue", "claim", "extend_lease", "complete", "retry", "fail", "get"):
+        monkeypatch.setattr(JobRepository, name, getattr(fake, name))
+    return fake
+
+
+@pytest.fixture
+def queue(jobs):
+    from src.service.job_queue import JobQueue
+
+    queue = JobQueue()
+    queue.poll_interval = 0.01
+    return queue
+
+
+async def test_job_runs_once_and_stores_its_result(jobs, queue):
+    seen = []
+
+    async def handler(payload, attachment):
+        seen.append((payload, attachment))
+        return {"total": payload["amount"] * 2}
+
+    queue.register("double", handler)
+    job = await queue.enqueue("double", {"amount": 21}, attachment=b"blob")
+
+    assert await queue.run_once("worker-a") is True
+    assert await queue.run_once("worker-a") is False
+
+    stored = await queue.get(job["id"])
+    assert seen == [({"amount": 21}, b"blob")]
+    assert (stored["status"], stored["attempts"], stored["result"]) == ("succeeded", 1, {"total": 42})
+    assert jobs.rows[job["id"]]["attachment"] is None
+
+
+async def test_failures_back_off_then_give_up(jobs, queue):
+    async def handler(payload, attachment):
+        raise RuntimeError("vision model timed out")
+
+    queue.register("flaky", handler)
+    queue.max_attempts = 3
+    job = await queue.enqueue("flaky", {})
+
+    await queue.run_once("worker-a")
+    row = jobs.rows[job["id"]]
+    assert row["status"] == "queued"
+    assert row["run_at"] > jobs.now
+    # Not due until the backoff has passed
+    assert await queue.run_once("worker-a") is False
+
+    for _ in range(2):
+        jobs.now += timedelta(seconds=queue.backoff_max)
+        await queue.run_once("worker-a")
+
+    assert row["status"] == "failed"
+    assert row["attempts"] == 3
+    assert row["last_error"] == "RuntimeError: vision model timed out"
+
+
+async def test_expired_lease_is_reclaimed_and_stale_worker_cannot_finish(jobs, queue):
+    async def handler(payload, attachment):
+        return {"ok": True}
+
+    queue.register("work", handler)
+    job = await queue.enqueue("work", {})
+
+    from src.repository.job_repository import JobRepository
+    # worker-a claims the job and then goes silent
+    claimed = JobRepository.claim("worker-a", ["work"], queue.visibility_timeout)
+    assert await queue.run_once("worker-b") is False
+
+    jobs.now += timedelta(seconds=queue.visibility_timeout + 1)
+    assert await queue.run_once("worker-b") is True
+
+    assert JobRepository.complete(claimed["id"], "worker-a", {"ok": "stale"}) is False
+    stored = await queue.get(job["id"])
+    assert (stored["status"], stored["attempts"], stored["result"]) == ("succeeded", 2, {"ok": True})
+
+
+async def test_unknown_job_kind_is_rejected(queue):
+    with pytest.raises(ValueError):
+        await queue.enqueue("nope", {})
+
+
+class ReceiptAgent:
+    def __init__(self):
+        self.notion_service = self
+        self.created = []
+
+    async def extract_receipt_data(self, base64_image, mime_type="image/jpeg", image_hash=None):
+        return {"merchant": "Cafe", "amount": 4.5, "date": "2025-12-01", "category": "Dining", "confidence": 0.9}
+
+    async def find_duplicate_expenses(self, expense_data):
+        return []
+
+    async def create_expense(self, **fields):
+        self.created.append(fields)
+        return {"id": "page-1", **fields}
+
+
+async def test_receipt_job_endpoints_accept_poll_and_stream(jobs, queue):
+    import httpx
+    from src.main import app
+    from src.service.clients import Clients
+    from src.service.receipt_batch_service import ReceiptBatchService
+
+    agent = ReceiptAgent()
+    queue.register("receipt_ocr", ReceiptBatchService(agent).run_job)
+    app.dependency_overrides[Clients.get_job_queue] = lambda: queue
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/receipts/jobs", params={"save": "true"},
+                                         files={"file": ("receipt.png", b"tiny image", "image/png")})
+            assert response.status_code == 202
+            accepted = response.json()
+            assert (await client.get(accepted["status_url"])).json()["status"] == "queued"
+
+            await queue.run_once("worker-a")
+
+            job = (await client.get(accepted["status_url"])).json()
+            events = (await client.get(accepted["events_url"])).text
+            missing = await client.get("/api/jobs/00000000-0000-0000-0000-000000000000")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert job["status"] == "succeeded"
+    assert job["result"]["status"] == "saved"
+    assert job["result"]["expense_id"] == "page-1"
+    assert events.startswith("event: done\n")
+    assert missing.status_code == 404
+    assert len(agent.created) == 1
+
+
+async def test_chat_job_records_the_reply(jobs, queue, monkeypatch):
+    from src.models.agent import ActionType, AgentState, ChatResponse
+    from src.repository.chat_repository import ChatRepository
+    from src.service import chat_log
+    from src.service.chat_log import AgentChatJob
+
+    class Agent:
+        async def process_message(self, message):
+            return ChatResponse(message=f"echo: {message}", action_taken=ActionType.GENERAL_RESPONSE,
+                                state=AgentState.COMPLETED)
+
+    saved, decisions = [], []
+    monkeypatch.setattr(ChatRepository, "save_message", staticmethod(lambda **kwargs: saved.append(kwargs)))
+    monkeypatch.setattr(chat_log.agent_repository, "log_decision", decisions.append)
+    queue.register("agent_chat", AgentChatJob(Agent()).run)
+
+    job = await queue.enqueue("agent_chat", {"user_id": "user-1", "message": "hello"})
+    await queue.run_once("worker-a")
+
+    stored = await queue.get(job["id"])
+    assert stored["result"]["message"] == "echo: hello"
+    assert saved[0]["user_id"] == "user-1"
+    assert decisions[0].user_message == "hello"
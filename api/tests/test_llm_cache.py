@@ -0,0 +1,151 @@
+"""Test the LLM result cache in front of the parser prompts"""
+import json
+from types import SimpleNamespace
+import pytest
+
+
+class CountingOpenAI:
+    """Fake OpenAI client that always answers with the same JSON"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+        client = self
+
+        class Completions:
+            async def create(self, **kwargs):
+                client.calls += 1
+                return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(client.answer)))])
+
+        self.chat = SimpleNamespace(completions=Completions())
+
+
+EXPENSE = {"amount": 5.0, "category": "Dining", "merchant": "Starbucks", "date": "2025-12-05",
+           "description": "coffee", "confidence": 0.95}
+
+
+@pytest.fixture
+def agent():
+    from src.service.agent_service import AgentService
+
+    agent = AgentService()
+    agent.client = CountingOpenAI(EXPENSE)
+    return agent
+
+
+async def test_repeated_phrase_is_served_from_cache(agent):
+    from src.service.llm_cache import llm_cache
+
+    first = await agent.parse_expense_from_text("coffee $5 starbucks")
+    second = await agent.parse_expense_from_text("  Coffee   $5 Starbucks. ")
+
+    assert agent.client.calls == 1
+    assert first == second
+    stats = llm_cache.stats()["by_prompt_type"]["expense"]
+    assert (stats["memory_hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+async def test_low_confidence_answers_are_not_cached(agent):
+    from src.service.llm_cache import llm_cache
+
+    agent.client.answer = {**EXPENSE, "confidence": 0.6}
+
+    await agent.parse_expense_from_text("coffee $5 starbucks")
+    await agent.parse_expense_from_text("coffee $5 starbucks")
+
+    assert agent.client.calls == 2
+    assert llm_cache.stats()["by_prompt_type"]["expense"]["skipped_low_confidence"] == 2
+
+
+async def test_low_confidence_payload_in_plan_is_not_cached():
+    from src.service.llm_cache import LLMCache
+
+    cache = LLMCache()
+    await cache.put("plan_combined", "key", "model", {"intent": "ADD_EXPENSE", "confidence": 0.9,
+                                                "expense": {**EXPENSE, "confidence": 0.3}})
+
+    assert await cache.get("plan_combined", "key") is None
+
+
+def test_key_depends_on_prompt_and_date():
+    from src.service.llm_cache import LLMCache
+
+    base = LLMCache.key("gpt-oss-120b", "prompt", "coffee $5", "2025-12-05")
+
+    assert base == LLMCache.key("gpt-oss-120b", "prompt", "COFFEE  $5!", "2025-12-05")
+    assert base != LLMCache.key("gpt-oss-120b", "prompt", "coffee $5", "2025-12-06")
+    assert base != LLMCache.key("gpt-oss-120b", "prompt v2", "coffee $5", "2025-12-05")
+    assert base != LLMCache.key("gemma3-27b", "prompt", "coffee $5", "2025-12-05")
+
+
+async def test_cache_bypass_skips_reads(agent):
+    from src.utils.cache import cache_bypass
+
+    await agent.parse_expense_from_text("coffee $5 starbucks")
+    token = cache_bypass.set(True)
+    try:
+        await agent.parse_expense_from_text("coffee $5 starbucks")
+    finally:
+        cache_bypass.reset(token)
+
+    assert agent.client.calls == 2
+
+
+async def test_postgres_tier_refills_memory(monkeypatch):
+    from src.repository.llm_cache_repository import LLMCacheRepository
+    from src.service.llm_cache import LLMCache
+
+    table = {}
+    monkeypatch.setattr(LLMCacheRepository, "get", staticmethod(lambda key: table.get(key)))
+    monkeypatch.setattr(LLMCacheRepository, "put", staticmethod(
+        lambda key, prompt_type, model, response, ttl: table.__setitem__(key, json.loads(json.dumps(response)))))
+
+    cache = LLMCache()
+    cache.persistent = True
+    await cache.put("budget", "key", "model", {"category": "Dining", "confidence": 1.0})
+    # A restarted process starts with an empty memory tier
+    cache.memory.clear()
+
+    assert await cache.get("budget", "key") == {"category": "Dining", "confidence": 1.0}
+    assert await cache.get("budget", "key") == {"category": "Dining", "confidence": 1.0}
+    assert cache.stats()["by_prompt_type"]["budget"]["db_hits"] == 1
+    assert cache.stats()["by_prompt_type"]["budget"]["memory_hits"] == 1
+
+
+async def test_hit_counts_are_written_in_batches(monkeypatch):
+    from src.repository.llm_cache_repository import LLMCacheRepository
+    from src.service.llm_cache import LLMCache
+
+    flushed = []
+    monkeypatch.setattr(LLMCacheRepository, "put", staticmethod(lambda *args: None))
+    monkeypatch.setattr(LLMCacheRepository, "record_hits", staticmethod(lambda hits: flushed.append(dict(hits))))
+
+    cache = LLMCache()
+    cache.persistent = True
+    cache.hit_flush_size = 3
+    await cache.put("plan", "a", "model", {"confidence": 1.0})
+    await cache.put("plan", "b", "model", {"confidence": 1.0})
+
+    for key in ("a", "b"):
+        await cache.get("plan", key)
+    assert flushed == []
+    await cache.get("plan", "a")
+    assert flushed == [{"a": 2, "b": 1}]
+
+    await cache.get("plan", "b")
+    await cache.flush_hits()
+    await cache.flush_hits()
+    assert flushed == [{"a": 2, "b": 1}, {"b": 1}]
+
+
+async def test_memory_tier_evicts_least_recently_used():
+    from src.service.llm_cache import LLMCache
+    from src.utils.cache import TTLCache
+
+    cache = LLMCache()
+    cache.memory = TTLCache(maxsize=2, ttl=60)
+    for key in ("a", "b", "c"):
+        await cache.put("plan", key, "model", {"intent": "GENERAL_RESPONSE", "confidence": 0.9})
+
+    assert await cache.get("plan", "a") is None
+    assert await cache.get("plan", "c") is not None
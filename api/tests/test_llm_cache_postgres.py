@@ -0,0 +1,35 @@
+"""Run the LLM cache SQL against a real Postgres (set TEST_DATABASE_URL; skipped otherwise)"""
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+def hit_counts():
+    from src.service.database.helper import run_sql
+
+    return {key: (hits, last_hit is not None)
+            for key, hits, last_hit in run_sql("SELECT cache_key, hit_count, last_hit_at FROM llm_response_cache")}
+
+
+async def test_reads_do_not_write_and_hits_land_in_one_batch(postgres):
+    from src.repository.llm_cache_repository import LLMCacheRepository
+    from src.service.llm_cache import LLMCache
+
+    cache = LLMCache()
+    cache.persistent = True
+    for key in ("a", "b", "c"):
+        await cache.put("plan", key, "model", {"intent": "GENERAL_RESPONSE", "confidence": 0.9})
+    cache.memory.clear()
+
+    assert await cache.get("plan", "a") == {"intent": "GENERAL_RESPONSE", "confidence": 0.9}
+    await cache.get("plan", "a")
+    await cache.get("plan", "b")
+    assert await cache.get("plan", "missing") is None
+    assert hit_counts() == {"a": (0, False), "b": (0, False), "c": (0, False)}
+
+    await cache.flush_hits()
+    assert hit_counts() == {"a": (2, True), "b": (1, True), "c": (0, False)}
+
+    # Unhit rows go first once the table is over its limit
+    assert LLMCacheRepository.evict(2) == 1
+    assert set(hit_counts()) == {"a", "b"}
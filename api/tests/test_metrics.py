@@ -0,0 +1,95 @@
+"""Test LLM call instrumentation and the Prometheus metrics endpoint"""
+import json
+from types import SimpleNamespace
+import httpx
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    from src.utils.metrics import registry
+
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def test_histogram_renders_cumulative_buckets():
+    from src.utils.metrics import Histogram
+
+    histogram = Histogram("demo_seconds", "Demo", ["route"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, route='say "hi"')
+    histogram.observe(0.5, route='say "hi"')
+    histogram.observe(3.0, route='say "hi"')
+
+    assert histogram.render() == [
+        "# HELP demo_seconds Demo",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{route="say \\"hi\\"",le="0.1"} 1',
+        'demo_seconds_bucket{route="say \\"hi\\"",le="1"} 2',
+        'demo_seconds_bucket{route="say \\"hi\\"",le="+Inf"} 3',
+        'demo_seconds_sum{route="say \\"hi\\""} 3.55',
+        'demo_seconds_count{route="say \\"hi\\""} 3',
+    ]
+
+
+class UsageOpenAI:
+    """Fake OpenAI client returning a fixed plan and token usage, or failing on request"""
+
+    def __init__(self, fail_prompts=()):
+        client = self
+        self.fail_prompts = fail_prompts
+
+        class Completions:
+            async def create(self, **kwargs):
+                system = kwargs["messages"][0]["content"]
+                if any(system.startswith(prefix) for prefix in client.fail_prompts):
+                    raise RuntimeError("model overloaded")
+                content = json.dumps({"intent": "GENERAL_RESPONSE", "reasoning": "chat", "confidence": 0.9})
+                return SimpleNamespace(
+                    choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                    usage=SimpleNamespace(prompt_tokens=300, completion_tokens=20),
+                )
+
+        self.chat = SimpleNamespace(completions=Completions())
+
+
+@pytest.fixture
+def agent():
+    from src.service.agent_service import AgentService
+
+    agent = AgentService()
+    agent.fast_path_enabled = False
+    return agent
+
+
+async def test_llm_calls_are_exported_and_attached_to_the_run(agent):
+    from src.utils.metrics import registry
+
+    agent.client = UsageOpenAI(fail_prompts=("You are a helpful financial assistant",))
+
+    response = await agent.process_message("what can you do?")
+
+    calls = response.run["llm"]
+    assert [(c["prompt_type"], c["outcome"]) for c in calls] == [("plan", "ok"), ("general_response", "error")]
+    assert calls[0]["prompt_tokens"] == 300
+    text = registry.render()
+    assert 'llm_request_duration_seconds_count{model="gpt-oss-120b",prompt_type="plan",outcome="ok"} 1' in text
+    assert 'llm_request_duration_seconds_count{model="gpt-oss-120b",prompt_type="general_response",outcome="error"} 1' in text
+    assert 'llm_tokens_sum{model="gpt-oss-120b",prompt_type="plan",kind="prompt"} 300' in text
+
+
+async def test_metrics_endpoint_serves_prometheus_text(agent):
+    from src.main import app
+
+    agent.client = UsageOpenAI()
+    await agent.parse_expense_from_text("coffee $4 at the corner cafe")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/api/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE llm_request_duration_seconds histogram" in response.text
+    assert 'prompt_type="expense",outcome="ok",le="+Inf"} 1' in response.text
@@ -0,0 +1,79 @@
+"""Test that Notion calls no longer block the event loop"""
+import asyncio
+import time
+import httpx
+
+NOTION_DELAY_SECONDS = 0.2
+
+
+class DelayedNotionClient:
+    """Stand-in for AsyncClient whose queries take a fixed time and track overlap"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        client = self
+
+        class Databases:
+            async def retrieve(self, database_id):
+                return {"properties": {"Amount": {"type": "number"}}}
+
+            async def query(self, database_id, start_cursor=None, page_size=100, **kwargs):
+                client.in_flight += 1
+                client.max_in_flight = max(client.max_in_flight, client.in_flight)
+                try:
+                    await asyncio.sleep(NOTION_DELAY_SECONDS)
+                finally:
+                    client.in_flight -= 1
+                return {
+                    "results": [{
+                        "id": "page-1",
+                        "created_time": "2025-12-01T12:00:00Z",
+                        "properties": {"Amount": {"type": "number", "number": 10.0}},
+                    }],
+                    "has_more": False,
+                    "next_cursor": None,
+                }
+
+        class Pages:
+            async def retrieve(self, page_id):
+                return await client._delayed({
+                    "id": page_id,
+                    "created_time": "2025-12-01T12:00:00Z",
+                    "properties": {"Amount": {"type": "number", "number": 10.0}},
+                })
+
+        self.databases = Databases()
+        self.pages = Pages()
+
+    async def _delayed(self, result):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(NOTION_DELAY_SECONDS)
+        finally:
+            self.in_flight -= 1
+        return result
+
+
+async def test_parallel_expense_requests_overlap(monkeypatch):
+    from src.main import app
+    from src.service.clients import Clients
+    from src.service.notion_scheduler import NotionRequestScheduler
+
+    fake = DelayedNotionClient()
+    monkeypatch.setattr(Clients.get_notion_service(), "client", fake)
+    # Measure event-loop overlap, not the production rate limit
+    monkeypatch.setattr(Clients.get_notion_service(), "scheduler", NotionRequestScheduler(rate=1000, burst=100))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        started = time.perf_counter()
+        # Distinct pages, so single-flight coalescing doesn't merge the reads
+        responses = await asyncio.gather(*[client.get(f"/api/expenses/page-{i}") for i in range(50)])
+        elapsed = time.perf_counter() - started
+
+    assert all(response.status_code == 200 for response in responses)
+    assert fake.max_in_flight == 50
+    # Serialized, 50 requests would take 50 * 0.2s = 10s
+    assert elapsed < NOTION_DELAY_SECONDS * 5
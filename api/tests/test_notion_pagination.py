@@ -0,0 +1,135 @@
+"""Test cursor pagination in NotionService"""
+import time
+import tracemalloc
+import pytest
+
+
+def make_expense_page(index):
+    return {
+        "id": f"page-{index}",
+        "created_time": "2025-12-01T12:00:00Z",
+        "properties": {
+            "Name": {"type": "title", "title": []},
+            "Amount": {"type": "number", "number": float(index % 200) + 0.5},
+            "Category": {"type": "select", "select": {"name": "Food"}},
+            "Merchant": {"type": "rich_text", "rich_text": [{"plain_text": f"Store {index % 50}"}]},
+            "Date": {"type": "date", "date": {"start": f"2025-{index % 12 + 1:02d}-15"}},
+            "Description": {"type": "rich_text", "rich_text": []},
+        },
+    }
+
+
+class FakeDatabases:
+    """Generates result pages lazily so the fake itself holds no rows in memory"""
+
+    def __init__(self, total_rows):
+        self.total_rows = total_rows
+        self.query_calls = 0
+
+    async def retrieve(self, database_id):
+        return {"properties": {name: {"type": prop["type"]} for name, prop in make_expense_page(0)["properties"].items()}}
+
+    async def query(self, database_id, start_cursor=None, page_size=100, **kwargs):
+        self.query_calls += 1
+        start = int(start_cursor) if start_cursor else 0
+        end = min(start + page_size, self.total_rows)
+        has_more = end < self.total_rows
+        return {
+            "results": [make_expense_page(i) for i in range(start, end)],
+            "has_more": has_more,
+            "next_cursor": str(end) if has_more else None,
+        }
+
+
+class FakeNotionClient:
+    def __init__(self, total_rows):
+        self.databases = FakeDatabases(total_rows)
+
+
+def make_service(total_rows):
+    from src.service.notion_service import NotionService
+
+    service = NotionService()
+    service.client = FakeNotionClient(total_rows)
+    return service
+
+
+async def test_get_all_expenses_follows_cursor():
+    service = make_service(250)
+
+    expenses = await service.get_all_expenses()
+
+    assert len(expenses) == 250
+    assert service.client.databases.query_calls == 3
+    assert expenses[-1]["id"] == "page-249"
+
+
+async def test_iter_expenses_is_lazy():
+    service = make_service(1000)
+
+    iterator = service.iter_expenses()
+    first = await anext(iterator)
+
+    assert first["id"] == "page-0"
+    assert service.client.databases.query_calls == 1
+
+
+async def test_streaming_reads_leave_the_query_cache_empty():
+    from src.service.notion_service import expense_query_cache
+
+    service = make_service(250)
+
+    assert len([expense async for expense in service.iter_expenses()]) == 250
+    assert len(expense_query_cache) == 0
+
+    await service.get_all_expenses()
+    assert len(expense_query_cache) == 1
+
+
+async def test_spending_report_counts_every_page():
+    from src.service.agent_service import AgentService
+
+    agent_service = AgentService()
+    agent_service.notion_service = make_service(450)
+
+    report = await agent_service.generate_spending_report(report_type="category")
+
+    assert report["success"] is True
+    assert report["transaction_count"] == 450
+
+
+async def _measure(total_rows):
+    from src.service.notion_service import expense_query_cache
+    from src.utils.cache import cache_bypass
+
+    expense_query_cache.clear()
+    service = make_service(total_rows)
+    # Bypassed so neither run can be served from, or inflated by, a cached result set
+    token = cache_bypass.set(True)
+    tracemalloc.start()
+    started = time.perf_counter()
+    iterator = service.iter_expenses()
+    await anext(iterator)
+    first_row = time.perf_counter() - started
+    count = 1
+    async for _ in iterator:
+        count += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    cache_bypass.reset(token)
+    return count, first_row, peak
+
+
+@pytest.mark.slow
+async def test_benchmark_streaming_50k_rows():
+    small_count, small_first_row, small_peak = await _measure(5_000)
+    large_count, large_first_row, large_peak = await _measure(50_000)
+
+    print(f"\n5k rows:  first row {small_first_row * 1000:.2f} ms, peak {small_peak / 1024:.0f} KiB")
+    print(f"50k rows: first row {large_first_row * 1000:.2f} ms, peak {large_peak / 1024:.0f} KiB")
+
+    assert small_count == 5_000
+    assert large_count == 50_000
+    # Only one Notion page is ever resident, so 10x the rows must not mean 10x the memory
+    assert large_peak < small_peak * 2
+    assert large_first_row < small_first_row * 5 + 0.01
@@ -0,0 +1,156 @@
+"""Test compiled parse plans for Notion pages"""
+import timeit
+import pytest
+
+
+def legacy_rich_text(prop):
+    rich_text_array = prop.get("rich_text", [])
+    if not rich_text_array:
+        return ""
+    return "".join([text.get("plain_text", "") for text in rich_text_array])
+
+
+def legacy_parse_expense_page(page):
+    """The per-property substring matching NotionService used before parse plans"""
+    props = page.get("properties", {})
+    result = {
+        "id": page.get("id"),
+        "amount": 0.0,
+        "category": "",
+        "merchant": "",
+        "date": "",
+        "description": "",
+        "created_time": page.get("created_time"),
+    }
+    for prop_name, prop_data in props.items():
+        prop_name_lower = prop_name.lower()
+        prop_type = prop_data.get("type")
+        if "amount" in prop_name_lower and prop_type == "number":
+            result["amount"] = prop_data.get("number", 0) or 0.0
+        elif "category" in prop_name_lower and prop_type == "select":
+            select_data = prop_data.get("select")
+            result["category"] = select_data.get("name", "") if select_data else ""
+        elif "merchant" in prop_name_lower and prop_type == "rich_text":
+            result["merchant"] = legacy_rich_text(prop_data)
+        elif "date" in prop_name_lower and prop_type == "date":
+            date_data = prop_data.get("date")
+            result["date"] = date_data.get("start", "") if date_data else ""
+        elif "description" in prop_name_lower and prop_type == "rich_text":
+            result["description"] = legacy_rich_text(prop_data)
+    return result
+
+
+def make_page(index, database_id="expenses-db"):
+    return {
+        "id": f"page-{index}",
+        "created_time": "2025-12-01T12:00:00Z",
+        "parent": {"type": "database_id", "database_id": database_id},
+        "properties": {
+            "Name": {"type": "title", "title": [{"plain_text": f"Store {index}"}]},
+            "Amount": {"type": "number", "number": None if index % 97 == 0 else index * 0.25},
+            "Category": {"type": "select", "select": None if index % 13 == 0 else {"name": "Dining"}},
+            "Merchant": {"type": "rich_text", "rich_text": [{"plain_text": "Store "}, {"plain_text": str(index)}]},
+            "Date": {"type": "date", "date": {"start": f"2025-{index % 12 + 1:02d}-01"}},
+            "Description": {"type": "rich_text", "rich_text": []},
+            "Receipt Date Notes": {"type": "rich_text", "rich_text": []},
+        },
+    }
+
+
+def schema_of(page):
+    return {name: {"type": prop["type"]} for name, prop in page["properties"].items()}
+
+
+class SchemaNotionClient:
+    def __init__(self, properties):
+        self.properties = properties
+        client = self
+
+        class Databases:
+            async def retrieve(self, database_id):
+                return {"properties": client.properties}
+
+        self.databases = Databases()
+
+
+@pytest.fixture
+def service():
+    from src.service.notion_service import NotionService
+
+    service = NotionService()
+    service.client = SchemaNotionClient(schema_of(make_page(1)))
+    return service
+
+
+async def test_plan_matches_legacy_output(service):
+    plan = await service.get_expense_parse_plan()
+
+    for index in range(300):
+        page = make_page(index)
+        assert service._parse_expense_page(page, plan) == legacy_parse_expense_page(page)
+
+
+async def test_page_not_matching_plan_is_parsed_from_its_own_properties(service):
+    plan = await service.get_expense_parse_plan()
+
+    renamed = make_page(2)
+    renamed["properties"]["Cost Amount"] = renamed["properties"].pop("Amount")
+
+    assert service._parse_expense_page(renamed, plan) == legacy_parse_expense_page(renamed)
+
+
+async def test_plan_is_rebuilt_when_schema_is_refreshed(service):
+    schema = schema_of(make_page(1))
+    schema["Total Amount"] = {"type": "formula"}
+    service.client.properties = schema
+    first = await service.get_expense_parse_plan()
+
+    # "Total Amount" changes from formula to number; the planned properties are untouched
+    retyped = make_page(3)
+    retyped["properties"]["Total Amount"] = {"type": "number", "number": 99.0}
+    service.client.properties = schema_of(retyped)
+    await service._get_database_properties(service.expenses_db_id, refresh=True)
+
+    assert service._parse_expense_page(retyped) == legacy_parse_expense_page(retyped)
+    assert service._parse_expense_page(retyped)["amount"] == 99.0
+    assert await service.get_expense_parse_plan() is not first
+
+
+def test_budget_page_parsing(service):
+    page = {
+        "id": "budget-1",
+        "created_time": "2025-12-01T12:00:00Z",
+        "properties": {
+            "Category": {"type": "rich_text", "rich_text": [{"plain_text": "Dining"}]},
+            "Amount": {"type": "number", "number": 400},
+            "Period": {"type": "select", "select": None},
+            "Spent": {"type": "number", "number": 100},
+            "Start Date": {"type": "date", "date": {"start": "2025-12-01"}},
+        },
+    }
+
+    budget = service._parse_budget_page(page)
+
+    assert budget["category"] == "Dining"
+    assert budget["period"] == "monthly"
+    assert budget["start_date"] == "2025-12-01"
+    assert budget["remaining"] == 300
+    assert budget["percentage"] == 25
+
+
+@pytest.mark.slow
+async def test_benchmark_decode_100k_pages(service):
+    pages = [make_page(index) for index in range(100_000)]
+    plan = await service.get_expense_parse_plan()
+
+    legacy = [legacy_parse_expense_page(page) for page in pages]
+    planned = [service._parse_expense_page(page, plan) for page in pages]
+    assert planned == legacy
+
+    # Best of several runs with GC paused, so allocation noise doesn't swamp the decode cost.
+    # Timings are informational only: wall-clock ratios are too noisy on shared runners to assert.
+    legacy_seconds = min(timeit.repeat(lambda: [legacy_parse_expense_page(page) for page in pages], number=1, repeat=5))
+    planned_seconds = min(timeit.repeat(lambda: [service._parse_expense_page(page, plan) for page in pages], number=1, repeat=5))
+
+    print(f"\nlegacy: {legacy_seconds:.3f}s, compiled plan: {planned_seconds:.3f}s "
+          f"({legacy_seconds / planned_seconds:.2f}x)")
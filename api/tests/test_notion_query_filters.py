@@ -0,0 +1,122 @@
+"""Test that expense filters are pushed down into Notion database queries"""
+from datetime import date, timedelta
+import pytest
+
+SCHEMA = {
+    "Name": {"type": "title"},
+    "Cost Amount": {"type": "number"},
+    "Category": {"type": "select"},
+    "Merchant": {"type": "rich_text"},
+    "Spent On Date": {"type": "date"},
+}
+
+
+def make_page(index, day):
+    return {
+        "id": f"page-{index}",
+        "created_time": "2025-12-01T12:00:00Z",
+        "properties": {
+            "Name": {"type": "title", "title": []},
+            "Cost Amount": {"type": "number", "number": float(index % 50) + 0.5},
+            "Category": {"type": "select", "select": {"name": "Dining" if index % 2 else "Travel"}},
+            "Merchant": {"type": "rich_text", "rich_text": [{"plain_text": f"Store {index % 7}"}]},
+            "Spent On Date": {"type": "date", "date": {"start": day}},
+        },
+    }
+
+
+def date_condition_matches(page, condition):
+    value = page["properties"][condition["property"]]["date"]["start"]
+    bounds = condition["date"]
+    return value >= bounds.get("on_or_after", value) and value <= bounds.get("on_or_before", value)
+
+
+class LedgerNotion:
+    """Fake Notion database over a multi-year ledger that evaluates date filters like the real API"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.filters = []
+        self.pages_returned = 0
+        client = self
+
+        class Databases:
+            async def retrieve(self, database_id):
+                return {"properties": SCHEMA}
+
+            async def query(self, database_id, start_cursor=None, page_size=100, filter=None, **kwargs):
+                client.filters.append(filter)
+                conditions = [] if filter is None else filter.get("and", [filter])
+                matching = [
+                    page for page in client.pages
+                    if all(date_condition_matches(page, c) for c in conditions if "date" in c)
+                ]
+                start = int(start_cursor) if start_cursor else 0
+                end = min(start + page_size, len(matching))
+                client.pages_returned += end - start
+                has_more = end < len(matching)
+                return {"results": matching[start:end], "has_more": has_more, "next_cursor": str(end) if has_more else None}
+
+        self.databases = Databases()
+
+
+def three_year_ledger():
+    first = date(2023, 1, 1)
+    return [make_page(index, (first + timedelta(days=index % 1095)).isoformat()) for index in range(3 * 1095)]
+
+
+@pytest.fixture
+def service():
+    from src.service.notion_service import NotionService
+
+    service = NotionService()
+    service.client = LedgerNotion(three_year_ledger())
+    return service
+
+
+async def test_filters_use_schema_property_names(service):
+    expenses = [e async for e in service.query_expenses(
+        start_date="2025-01-01", end_date="2025-01-31", category="Dining", amount_eq=10.5, merchant_contains="store 3"
+    )]
+
+    assert service.client.filters[-1] == {"and": [
+        {"property": "Spent On Date", "date": {"on_or_after": "2025-01-01"}},
+        {"property": "Spent On Date", "date": {"on_or_before": "2025-01-31"}},
+        {"property": "Category", "select": {"equals": "Dining"}},
+        {"property": "Cost Amount", "number": {"greater_than_or_equal_to": 10.49}},
+        {"property": "Cost Amount", "number": {"less_than_or_equal_to": 10.51}},
+        {"property": "Merchant", "rich_text": {"contains": "store 3"}},
+    ]}
+    assert all(e["category"] == "Dining" and e["amount"] == 10.5 and e["merchant"] == "Store 3" for e in expenses)
+
+
+async def test_unfiltered_iteration_sends_no_filter(service):
+    await service.get_all_expenses()
+
+    assert service.client.filters[-1] is None
+
+
+async def test_monthly_report_only_fetches_the_month(service):
+    from src.service.agent_service import AgentService
+
+    agent = AgentService()
+    agent.notion_service = service
+
+    report = await agent.generate_spending_report("monthly", start_date="2024-06-01", end_date="2024-06-30")
+
+    assert report["success"] is True
+    assert report["transaction_count"] == 90
+    # A whole-ledger scan would transfer all 3285 pages
+    assert service.client.pages_returned == 90
+
+
+async def test_search_with_filters_pushes_date_down(service):
+    from src.service.agent_service import AgentService
+
+    agent = AgentService()
+    agent.notion_service = service
+
+    matches = await agent.search_transactions("", date="2024-06-15")
+
+    assert {m["date"] for m in matches} == {"2024-06-15"}
+    assert service.client.pages_returned == len(matches)
@@ -0,0 +1,75 @@
+"""Test the rate-limit-aware Notion request scheduler"""
+import asyncio
+import time
+import httpx
+import pytest
+from notion_client.errors import APIErrorCode, APIResponseError
+
+
+def rate_limited_error(retry_after):
+    response = httpx.Response(429, headers={"Retry-After": str(retry_after)})
+    return APIResponseError(response, "Rate limited", APIErrorCode.RateLimited)
+
+
+class RateLimitedFake:
+    """Local Notion stand-in that rejects anything beyond `limit` calls per rolling window"""
+
+    def __init__(self, limit, window=1.0, retry_after=0.2):
+        self.limit = limit
+        self.window = window
+        self.retry_after = retry_after
+        self.accepted = []
+        self.rejected = 0
+
+    async def query(self, **kwargs):
+        now = time.monotonic()
+        recent = [t for t in self.accepted if now - t < self.window]
+        if len(recent) >= self.limit:
+            self.rejected += 1
+            raise rate_limited_error(self.retry_after)
+        self.accepted.append(now)
+        return {"results": [], "has_more": False, "next_cursor": None}
+
+
+async def test_burst_is_queued_instead_of_failing():
+    from src.service.notion_scheduler import NotionRequestScheduler
+
+    scheduler = NotionRequestScheduler(rate=40, burst=2)
+    fake = RateLimitedFake(limit=42)
+
+    results = await asyncio.gather(*[scheduler.run(fake.query) for _ in range(60)])
+
+    assert len(results) == 60
+    assert fake.rejected == 0
+    assert scheduler.stats()["max_queue_depth"] > 1
+    assert scheduler.stats()["wait_seconds_max"] > 0
+
+
+async def test_retry_after_is_honored():
+    from src.service.notion_scheduler import NotionRequestScheduler
+
+    scheduler = NotionRequestScheduler(rate=100, burst=100, base_backoff=0.01)
+    fake = RateLimitedFake(limit=1, window=0.2, retry_after=0.2)
+
+    started = time.perf_counter()
+    await scheduler.run(fake.query)
+    await scheduler.run(fake.query)
+    elapsed = time.perf_counter() - started
+
+    assert fake.rejected == 1
+    assert scheduler.stats()["rate_limited"] == 1
+    assert elapsed >= 0.2
+
+
+async def test_gives_up_after_max_retries():
+    from src.service.notion_scheduler import NotionRequestScheduler
+
+    scheduler = NotionRequestScheduler(rate=100, burst=100, max_retries=2)
+
+    async def always_limited():
+        raise rate_limited_error(0)
+
+    with pytest.raises(APIResponseError) as raised:
+        await scheduler.run(always_limited)
+    assert raised.value.status == 429
+    assert scheduler.stats()["retries"] == 2
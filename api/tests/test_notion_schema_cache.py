@@ -0,0 +1,70 @@
+"""Test database schema caching for Notion inserts"""
+import httpx
+import pytest
+from notion_client.errors import APIErrorCode, APIResponseError
+
+EXPENSE_SCHEMA = {
+    "properties": {
+        "Name": {"type": "title"},
+        "Amount": {"type": "number"},
+        "Category": {"type": "select"},
+        "Merchant": {"type": "rich_text"},
+        "Date": {"type": "date"},
+        "Description": {"type": "rich_text"},
+    }
+}
+
+
+class CountingNotionClient:
+    def __init__(self, reject_next_create=False):
+        self.calls = []
+        self.reject_next_create = reject_next_create
+        client = self
+
+        class Databases:
+            async def retrieve(self, database_id):
+                client.calls.append("databases.retrieve")
+                return EXPENSE_SCHEMA
+
+        class Pages:
+            async def create(self, parent, properties):
+                client.calls.append("pages.create")
+                if client.reject_next_create:
+                    client.reject_next_create = False
+                    raise APIResponseError(httpx.Response(400), "Amount is not a property", APIErrorCode.ValidationError)
+                return {"id": "new-page", "created_time": "2025-12-01T12:00:00Z", "properties": {}}
+
+        self.databases = Databases()
+        self.pages = Pages()
+
+
+@pytest.fixture
+def service():
+    from src.service.notion_service import NotionService, schema_cache
+
+    schema_cache.clear()
+    service = NotionService()
+    service.client = CountingNotionClient()
+    return service
+
+
+async def test_steady_state_insert_is_one_call(service):
+    await service.create_expense(12.5, "Dining", "Chipotle", "2025-12-01")
+    service.client.calls.clear()
+
+    await service.create_expense(4.0, "Dining", "Starbucks", "2025-12-02")
+
+    assert service.client.calls == ["pages.create"]
+
+
+async def test_validation_error_refreshes_cached_schema(service):
+    from src.service.notion_service import schema_cache
+
+    await service.create_expense(12.5, "Dining", "Chipotle", "2025-12-01")
+    service.client.calls.clear()
+    service.client.reject_next_create = True
+
+    await service.create_expense(4.0, "Dining", "Starbucks", "2025-12-02")
+
+    assert service.client.calls == ["pages.create", "databases.retrieve", "pages.create"]
+    assert schema_cache.stats()["hits"] >= 1
@@ -0,0 +1,78 @@
+"""Test that concurrent identical Notion reads share one upstream fetch"""
+import asyncio
+import pytest
+
+
+class SlowNotion:
+    """Local Notion stand-in whose queries take long enough for callers to pile up"""
+
+    def __init__(self):
+        self.query_calls = 0
+        client = self
+
+        class Databases:
+            async def retrieve(self, database_id):
+                return {"properties": {"Amount": {"type": "number"}}}
+
+            async def query(self, database_id, start_cursor=None, page_size=100, **kwargs):
+                client.query_calls += 1
+                await asyncio.sleep(0.05)
+                page = {"id": f"{database_id}-1", "created_time": "2025-12-01T12:00:00Z",
+                        "properties": {"Amount": {"type": "number", "number": 25.0}}}
+                return {"results": [page], "has_more": False, "next_cursor": None}
+
+        self.databases = Databases()
+
+
+@pytest.fixture
+def service():
+    from src.service.notion_service import NotionService
+
+    service = NotionService()
+    service.client = SlowNotion()
+    return service
+
+
+@pytest.mark.parametrize("callers", [2, 10, 50])
+async def test_parallel_expense_reads_make_one_upstream_call(service, callers):
+    results = await asyncio.gather(*[service.get_all_expenses() for _ in range(callers)])
+
+    assert service.client.query_calls == 1
+    assert all(result == results[0] for result in results)
+    # Every caller gets its own copies
+    assert len({id(result[0]) for result in results}) == callers
+
+
+async def test_parallel_budget_reads_make_one_upstream_call(service):
+    await asyncio.gather(*[service.get_all_budgets() for _ in range(20)])
+
+    assert service.client.query_calls == 1
+
+
+async def test_cancelled_caller_does_not_cancel_shared_fetch(service):
+    first = asyncio.ensure_future(service.get_all_expenses())
+    second = asyncio.ensure_future(service.get_all_expenses())
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert len(await second) == 1
+    assert service.client.query_calls == 1
+
+
+async def test_errors_reach_every_caller():
+    from src.utils.singleflight import SingleFlight
+
+    flights = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(*[flights.do("key", failing) for _ in range(5)], return_exceptions=True)
+
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flights.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4}
@@ -0,0 +1,150 @@
+"""Test multi-file receipt uploads with bounded concurrency and NDJSON results"""
+import asyncio
+import json
+
+
+class SlowVisionAgent:
+    """Fake AgentService whose vision calls take a while and record how many overlap"""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.vision_calls = 0
+        self.notion_service = self
+        self.created = []
+        self.existing = []
+
+    async def extract_receipt_data(self, base64_image, mime_type="image/jpeg", image_hash=None):
+        self.vision_calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(base64_image, 0.02))
+        finally:
+            self.in_flight -= 1
+        if base64_image == "YmxhbmsgcGFnZQ==":  # b"blank page"
+            return None
+        return {"merchant": f"Store {base64_image}", "amount": 10.0, "date": "2025-12-01", "category": "Dining",
+                "confidence": 0.9}
+
+    async def find_duplicate_expenses(self, expense_data):
+        return [expense for expense in self.existing if expense["merchant"] == expense_data["merchant"]]
+
+    async def create_expense(self, **fields):
+        self.created.append(fields)
+        return {"id": f"page-{len(self.created)}", **fields}
+
+
+def batch(*contents, content_type="image/png"):
+    return [(f"receipt-{index}.png", content_type, data) for index, data in enumerate(contents)]
+
+
+async def collect(service, files, **kwargs):
+    return [result async for result in service.process(files, **kwargs)]
+
+
+async def test_vision_calls_stay_under_the_cap(monkeypatch):
+    from src.service.receipt_batch_service import ReceiptBatchService
+
+    monkeypatch.setenv("RECEIPT_BATCH_VISION_CONCURRENCY", "3")
+    agent = SlowVisionAgent()
+    service = ReceiptBatchService(agent)
+
+    results = await collect(service, batch(*(f"receipt {n}".encode() for n in range(12))))
+
+    assert agent.vision_calls == 12
+    assert agent.max_in_flight == 3
+    assert len(agent.created) == 12
+    assert results[-1] == {"done": True, "total": 12, "saved": 12, "duplicates": 0, "failed": 0}
+
+
+async def test_results_arrive_in_completion_order():
+    from src.service.receipt_batch_service import ReceiptBatchService
+
+    slow, fast = b"slow receipt", b"fast receipt"
+    agent = SlowVisionAgent(delays={"c2xvdyByZWNlaXB0": 0.2})
+    service = ReceiptBatchService(agent)
+
+    results = await collect(service, batch(slow, fast))
+
+    assert [result["index"] for result in results[:-1]] == [1, 0]
+
+
+async def test_duplicates_and_failures_are_reported_per_file():
+    from src.service.receipt_batch_service import ReceiptBatchService
+
+    agent = SlowVisionAgent()
+    agent.existing = [{"id": "old", "merchant": "Store YWxyZWFkeSBzYXZlZA=="}]  # b"already saved"
+    service = ReceiptBatchService(agent)
+
+    results = await collect(service, batch(b"new", b"already saved", b"blank page", b"new"))
+    by_index = {result["index"]: result for result in results[:-1]}
+
+    # The same image twice in one batch is read and saved once
+    assert sorted([by_index[0]["status"], by_index[3]["status"]]) == ["duplicate", "saved"]
+    # A likely duplicate of an existing expense is still saved, with the match flagged
+    assert by_index[1]["status"] == "saved"
+    assert by_index[1]["possible_duplicates"][0]["id"] == "old"
+    assert by_index[2]["status"] == "unreadable"
+    assert agent.vision_calls == 3
+    assert results[-1] == {"done": True, "total": 4, "saved": 2, "duplicates": 1, "failed": 1}
+
+
+async def test_uploaded_files_are_read_a_few_at_a_time(monkeypatch):
+    import io
+    from src.service import receipt_batch_service
+    from src.service.receipt_batch_service import ReceiptBatchService
+
+    class CountingFile(io.BytesIO):
+        held = max_held = 0
+
+        def read(self, *args):
+            CountingFile.held += 1
+            CountingFile.max_held = max(CountingFile.max_held, CountingFile.held)
+            return super().read(*args)
+
+    prepare = receipt_batch_service.prepare_receipt
+
+    async def slow_prepare(data, mime_type=None):
+        await asyncio.sleep(0.01)
+        CountingFile.held -= 1
+        return await prepare(data, mime_type)
+
+    monkeypatch.setattr(receipt_batch_service, "prepare_receipt", slow_prepare)
+    agent = SlowVisionAgent()
+    service = ReceiptBatchService(agent)
+    files = batch(*(CountingFile(f"receipt {n}".encode()) for n in range(12)))
+
+    results = await collect(service, files)
+
+    # Raw uploads stay on disk until the preprocessing pool can take them
+    assert CountingFile.max_held <= receipt_batch_service.PREPROCESS_WORKERS
+    assert results[-1]["saved"] == 12
+
+
+async def test_batch_endpoint_streams_ndjson():
+    import httpx
+    from src.main import app
+    from src.service.clients import Clients
+    from src.service.receipt_batch_service import ReceiptBatchService
+
+    agent = SlowVisionAgent()
+    app.dependency_overrides[Clients.get_receipt_batch_service] = lambda: ReceiptBatchService(agent)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/receipts/batch", files=[
+                ("files", ("a.png", b"first", "image/png")),
+                ("files", ("b.png", b"second", "image/png")),
+                ("files", ("notes.txt", b"text", "text/plain")),
+            ])
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert {line["filename"]: line["status"] for line in lines[:-1]} == {
+        "a.png": "saved", "b.png": "saved", "notes.txt": "error",
+    }
+    assert lines[-1]["saved"] == 2
@@ -0,0 +1,134 @@
+"""Test the content-addressed receipt OCR cache and duplicate expense detection"""
+import json
+from types import SimpleNamespace
+import pytest
+
+RECEIPT = {"merchant": "Whole Foods", "amount": 45.67, "date": "2025-11-19", "category": "Groceries",
+           "description": "Weekly groceries", "confidence": 0.95}
+
+
+class VisionModel:
+    """Fake OpenAI client that reads every image as the same receipt"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+        client = self
+
+        class Completions:
+            async def create(self, **kwargs):
+                client.calls += 1
+                return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(client.answer)))])
+
+        self.chat = SimpleNamespace(completions=Completions())
+
+
+class ExpenseLedger:
+    """Fake NotionService over a fixed list of expenses"""
+
+    def __init__(self, expenses):
+        self.expenses = expenses
+        self.created = []
+
+    async def query_expenses(self, start_date=None, end_date=None, amount_eq=None, **kwargs):
+        for expense in self.expenses:
+            if start_date <= expense["date"] <= end_date and abs(expense["amount"] - amount_eq) <= 0.01:
+                yield expense
+
+    async def create_expense(self, **fields):
+        self.created.append(fields)
+        return {"id": "new-page", **fields}
+
+
+@pytest.fixture
+def agent():
+    from src.service.agent_service import AgentService
+
+    agent = AgentService(notion_service=ExpenseLedger([]))
+    agent.client = VisionModel(RECEIPT)
+    return agent
+
+
+async def test_same_image_is_read_once(agent):
+    first = await agent.extract_receipt_data("aW1hZ2U=", "image/jpeg", image_hash="a" * 64)
+    second = await agent.extract_receipt_data("aW1hZ2U=", "image/jpeg", image_hash="a" * 64)
+
+    assert agent.client.calls == 1
+    assert first == second == RECEIPT
+
+
+async def test_different_images_are_read_separately(agent):
+    await agent.extract_receipt_data("aW1hZ2U=", "image/jpeg", image_hash="a" * 64)
+    await agent.extract_receipt_data("b3RoZXI=", "image/jpeg", image_hash="b" * 64)
+
+    assert agent.client.calls == 2
+
+
+async def test_same_image_is_read_again_on_a_new_day(agent, monkeypatch):
+    from datetime import datetime
+    from src.service import agent_service
+
+    class Tomorrow(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2099, 1, 2)
+
+    await agent.extract_receipt_data("aW1hZ2U=", "image/jpeg", image_hash="a" * 64)
+    # An undated receipt is read as dated today, so yesterday's answer can't be reused
+    monkeypatch.setattr(agent_service, "datetime", Tomorrow)
+    await agent.extract_receipt_data("aW1hZ2U=", "image/jpeg", image_hash="a" * 64)
+    await agent.extract_receipt_data("aW1hZ2U=", "image/jpeg", image_hash="a" * 64)
+
+    assert agent.client.calls == 2
+
+
+async def test_without_hash_nothing_is_cached(agent):
+    await agent.extract_receipt_data("aW1hZ2U=")
+    await agent.extract_receipt_data("aW1hZ2U=")
+
+    assert agent.client.calls == 2
+
+
+async def test_duplicates_match_date_amount_and_merchant(agent):
+    agent.notion_service.expenses = [
+        {"id": "same", "merchant": "WHOLE FOODS MARKET", "amount": 45.67, "date": "2025-11-19"},
+        {"id": "other-store", "merchant": "Target", "amount": 45.67, "date": "2025-11-19"},
+        {"id": "other-day", "merchant": "Whole Foods", "amount": 45.67, "date": "2025-11-18"},
+        {"id": "no-merchant", "merchant": "", "amount": 45.67, "date": "2025-11-19"},
+    ]
+
+    duplicates = await agent.find_duplicate_expenses(RECEIPT)
+
+    assert [expense["id"] for expense in duplicates] == ["same"]
+    # Same day and amount alone isn't enough when the receipt has no merchant either
+    assert await agent.find_duplicate_expenses({**RECEIPT, "merchant": ""}) == []
+
+
+async def save(agent, data, **params):
+    import httpx
+    from src.main import app
+    from src.service.clients import Clients
+
+    app.dependency_overrides[Clients.get_agent_service] = lambda: agent
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/receipts/upload-and-save", params=params,
+                                     files={"file": ("receipt.png", data, "image/png")})
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def test_repeat_upload_skips_ocr_and_is_saved_with_a_duplicate_flag(agent):
+    image = b"\x89PNG not decodable, passed through as-is"
+
+    first = await save(agent, image)
+    agent.notion_service.expenses.append({"id": "new-page", **RECEIPT})
+    second = await save(agent, image)
+
+    assert first.json()["success"] is True
+    assert first.json()["possible_duplicates"] == []
+    assert second.json()["success"] is True
+    assert second.json()["possible_duplicates"][0]["id"] == "new-page"
+    assert agent.client.calls == 1
+    assert len(agent.notion_service.created) == 2
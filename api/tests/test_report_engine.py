@@ -0,0 +1,174 @@
+"""Test the columnar report engine behind generate_spending_report"""
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+import numpy as np
+import pytest
+
+LEDGER = [
+    {"amount": 4.5, "category": "Dining", "merchant": "Starbucks", "date": "2025-12-01"},
+    {"amount": 52.1, "category": "Groceries", "merchant": "Whole Foods", "date": "2025-12-01"},
+    {"amount": 12.0, "category": "Transportation", "merchant": "Uber", "date": "2025-12-03"},
+    {"amount": 6.25, "category": "Dining", "merchant": "Starbucks", "date": "2025-12-08T09:30:00.000-05:00"},
+    {"amount": 80.0, "category": "Groceries", "merchant": "Costco", "date": "2026-01-02"},
+    {"amount": 20.0, "category": "Dining", "merchant": "Chipotle", "date": ""},
+    {"amount": 9.0, "category": None, "merchant": "Corner Shop", "date": "not a date"},
+]
+
+
+@pytest.fixture
+def frame():
+    from src.service.report_engine import ExpenseFrame
+
+    return ExpenseFrame.from_expenses(LEDGER)
+
+
+def by(rows, key):
+    return {row[key]: (round(row["total"], 2), row["count"]) for row in rows}
+
+
+def test_category_and_merchant_totals(frame):
+    categories = frame.group_by("category")
+
+    assert [row["category"] for row in categories] == ["Groceries", "Dining", "Transportation", "Other"]
+    assert by(categories, "category") == {
+        "Groceries": (132.1, 2), "Dining": (30.75, 3), "Transportation": (12.0, 1), "Other": (9.0, 1),
+    }
+    assert categories[0]["percentage"] == pytest.approx(132.1 / frame.total() * 100)
+    assert by(frame.group_by("merchant", top=2), "merchant") == {"Costco": (80.0, 1), "Whole Foods": (52.1, 1)}
+
+
+def test_time_groupings_skip_undated_expenses(frame):
+    assert by(frame.group_by("day", sort="label"), "day") == {
+        "2025-12-01": (56.6, 2), "2025-12-03": (12.0, 1), "2025-12-08": (6.25, 1), "2026-01-02": (80.0, 1),
+    }
+    # Weeks run Monday to Sunday and are labelled by their Monday
+    assert by(frame.group_by("week", sort="label"), "week") == {
+        "2025-12-01": (68.6, 3), "2025-12-08": (6.25, 1), "2025-12-29": (80.0, 1),
+    }
+    assert by(frame.group_by("month", sort="label"), "month") == {"2025-12": (74.85, 4), "2026-01": (80.0, 1)}
+    assert len(frame) == 7
+
+
+def test_between_keeps_dated_expenses_in_range(frame):
+    december = frame.between("2025-12-01", "2025-12-31")
+
+    assert len(december) == 4
+    assert december.total() == pytest.approx(74.85)
+    assert len(frame.between()) == 7
+
+
+def test_group_percentiles_match_numpy():
+    rng = random.Random(3)
+    expenses = [
+        {"amount": round(rng.uniform(1, 200), 2), "category": rng.choice("ABCDE"), "merchant": "m", "date": "2025-01-01"}
+        for _ in range(500)
+    ]
+    from src.service.report_engine import ExpenseFrame
+
+    rows = ExpenseFrame.from_expenses(expenses).group_by("category", percentiles=(10, 50, 90))
+
+    for row in rows:
+        amounts = [e["amount"] for e in expenses if e["category"] == row["category"]]
+        for q in (10, 50, 90):
+            assert row[f"p{q}"] == pytest.approx(np.percentile(amounts, q))
+
+
+def test_percentiles_and_largest(frame):
+    assert frame.percentiles((50,)) == {"p50": 12.0}
+    assert [(e["merchant"], e["date"]) for e in frame.largest(3)] == [
+        ("Costco", "2026-01-02"), ("Whole Foods", "2025-12-01"), ("Chipotle", ""),
+    ]
+
+
+def test_unknown_grouping_is_rejected(frame):
+    with pytest.raises(ValueError):
+        frame.group_by("weekday")
+
+
+def test_presets_keep_the_report_shape(frame):
+    from src.service.report_engine import build_report
+
+    monthly = build_report(frame, "monthly", "2025-12-01", "2025-12-31")
+    assert monthly["top_category"] == "Groceries"
+    assert monthly["daily_average"] == pytest.approx(frame.total() / 31)
+    assert monthly["top_merchants"][0]["merchant"] == "Costco"
+
+    category = build_report(frame, "category")
+    assert [row["category"] for row in category["category_breakdown"]] == ["Dining", "Groceries", "Other", "Transportation"]
+    assert category["total_categories"] == 4
+
+    trends = build_report(frame, "trends")
+    assert [point["date"] for point in trends["trend_data"]] == ["2025-12-01", "2025-12-03", "2025-12-08", "2026-01-02"]
+    assert trends["trend_direction"] == "increasing"
+
+
+def loop_report(expenses):
+    """The per-expense dictionary loops generate_spending_report used before the engine"""
+    total_spent = 0
+    by_category = {}
+    by_date = {}
+    for expense in expenses:
+        amount = expense.get('amount', 0)
+        total_spent += amount
+        cat = expense.get('category', 'Other')
+        if cat not in by_category:
+            by_category[cat] = {'total': 0, 'count': 0}
+        by_category[cat]['total'] += amount
+        by_category[cat]['count'] += 1
+        if expense['date']:
+            by_date[expense['date']] = by_date.get(expense['date'], 0) + amount
+    by_merchant = defaultdict(float)
+    for expense in expenses:
+        by_merchant[expense['merchant']] += expense['amount']
+    return by_category, by_date, sorted(by_merchant.items(), key=lambda item: item[1], reverse=True)[:10]
+
+
+@pytest.mark.slow
+def test_benchmark_engine_against_loops_at_1m():
+    from src.service.report_engine import ExpenseFrame
+
+    rng = random.Random(11)
+    first = date(2023, 1, 1)
+    days = [(first + timedelta(days=n)).isoformat() for n in range(1095)]
+    merchants = [f"Merchant {n}" for n in range(5000)]
+    categories = ["Dining", "Groceries", "Transportation", "Shopping", "Bills", "Travel", "Health", "Other"]
+    expenses = [
+        {"amount": round(rng.uniform(1, 500), 2), "category": rng.choice(categories),
+         "merchant": rng.choice(merchants), "date": rng.choice(days)}
+        for _ in range(1_000_000)
+    ]
+
+    started = time.perf_counter()
+    by_category, by_date, top_merchants = loop_report(expenses)
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    frame = ExpenseFrame.from_expenses(expenses)
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    categories_out = frame.group_by("category")
+    days_out = frame.group_by("day", sort="label")
+    merchants_out = frame.group_by("merchant", top=10)
+    group_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    frame.group_by("week")
+    frame.group_by("month", percentiles=(50, 90))
+    frame.percentiles()
+    frame.largest(10)
+    extra_seconds = time.perf_counter() - started
+
+    assert {row["category"]: row["count"] for row in categories_out} == {
+        cat: data["count"] for cat, data in by_category.items()
+    }
+    for row in days_out:
+        assert row["total"] == pytest.approx(by_date[row["day"]])
+    assert [row["merchant"] for row in merchants_out] == [name for name, _ in top_merchants]
+
+    print(f"\n1M expenses: dict loops {loop_seconds:.2f} s; engine load {load_seconds:.2f} s, "
+          f"category/day/top-10 merchant group-bys {group_seconds * 1000:.0f} ms, "
+          f"week/month+percentiles/top-10 expenses {extra_seconds * 1000:.0f} ms")
+    assert group_seconds < loop_seconds